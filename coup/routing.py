@@ -3,17 +3,21 @@ from channels.auth import AuthMiddlewareStack
 from channels.routing import URLRouter
 import game.routing
 from game.consumers import  RoomManagerConsumer
+from game.sharding import get_room_manager_channels
+from game.channel_layer import InProcessWorkers
 from channels.auth import AuthMiddlewareStack
 
 
-application = ProtocolTypeRouter({
+# Room managers run in the web process with the in-process channel layer, by runworker otherwise
+application = InProcessWorkers(ProtocolTypeRouter({
     # (http->django views is added by default)
+    # One room manager per shard channel. Rooms are placed on shards by game.sharding
     'channel':ChannelNameRouter({
-        'room-manager':RoomManagerConsumer
+        channel_name: RoomManagerConsumer for channel_name in get_room_manager_channels()
     }),
     'websocket': AuthMiddlewareStack(
          URLRouter(
              game.routing.websocket_urlpatterns
          )
     )
-})
\ No newline at end of file
+}), get_room_manager_channels())
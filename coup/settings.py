@@ -143,6 +143,20 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    # Game engine, quieted while the search bot plays, see game.coup_game.mcts.
+    # Listed so its loggers stay enabled when created before logging is configured.
+    'loggers': {
+        'game.coup_game': {},
+    },
+}
+
+# Shared by the web server and the room managers run by runworker, which
+# publish the lobby room registry to it, see game.room_registry
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
 }
 
 ASGI_APPLICATION = 'coup.routing.application'
@@ -153,4 +167,75 @@ CHANNEL_LAYERS = {
             "hosts": [('127.0.0.1', 6379)],
         },
     },
-}
\ No newline at end of file
+}
+# Single process deployments and load tests can do without Redis:
+#   COUP_CHANNEL_LAYER=local python manage.py runserver
+# Room managers then run in the web process, see game.channel_layer.
+if os.environ.get('COUP_CHANNEL_LAYER') == 'local':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'game.channel_layer.LocalChannelLayer',
+            'CONFIG': {
+                'capacity': 1000,
+            },
+        },
+    }
+
+# Coup
+# Time in milliseconds the search bot may think for each move it makes
+# on behalf of a player who ran out of time.
+COUP_BOT_BUDGET_MS = 100
+# Worker threads searching default moves, off the event loop of the room manager
+COUP_BOT_THREADS = 2
+# Resolution in seconds of the timer wheel driving move timeouts
+COUP_TIMER_TICK_SEC = 0.1
+# Number of room manager shards. Run one worker per shard channel:
+#   python manage.py runworker room-manager-0 ... room-manager-<N-1>
+COUP_ROOM_MANAGER_SHARDS = 1
+# Room table writes are coalesced and flushed every interval, or sooner once
+# batch size rooms are waiting. Up to one interval of writes is lost on a crash.
+COUP_DB_FLUSH_INTERVAL_SEC = 1.0
+COUP_DB_FLUSH_BATCH_SIZE = 100
+# Seconds the lobby views reuse the room list read from the room registry.
+# Room managers publish the registry to the cache, see game.room_registry.
+COUP_LOBBY_TTL_SEC = 1.0
+# Room managers publish the changes to their rooms at most once per interval
+COUP_REGISTRY_PUBLISH_INTERVAL_SEC = 0.5
+# Directory of the event logs of games, one file per game, see
+# game.coup_game.event_log. None to not log games.
+COUP_EVENT_LOG_DIR = os.path.join(BASE_DIR, 'game_logs')
+# Event logs snapshot games every this many moves, so replays can seek to
+# any move replaying at most this many moves
+COUP_REPLAY_SNAPSHOT_INTERVAL = 50
+# Event logs are flushed to their file every this many records, so a crash
+# loses at most this many records of each game
+COUP_EVENT_LOG_FLUSH_RECORDS = 20
+# Directory of the game checkpoints, one SQLite file per room manager shard.
+# Games are checkpointed every interval and restored when a room manager
+# restarts, losing at most one interval of moves. None to not checkpoint.
+COUP_CHECKPOINT_DIR = os.path.join(BASE_DIR, 'checkpoints')
+COUP_CHECKPOINT_INTERVAL_SEC = 5.0
+# Checkpoints dump this many rooms at a time, letting other events run in between
+COUP_CHECKPOINT_CHUNK_ROOMS = 100
+# Move timers of restored games are spread over this many extra seconds, so
+# they do not all expire on the same tick after a restart
+COUP_WARM_START_TIMER_SPREAD_SEC = 10.0
+# Record latency histograms of the stages of handling a move from the start.
+# Toggled at runtime with: python manage.py latency enable|disable|reset|report
+COUP_LATENCY_HISTOGRAMS = False
+# Events waiting per room beyond which the room manager drops new events of the room
+COUP_ROOM_INBOX_SIZE = 256
+# Chat messages waiting per room beyond which new chat of the room is dropped,
+# and game events waiting on the shard beyond which all chat is dropped
+COUP_ROOM_CHAT_INBOX_SIZE = 16
+COUP_CHAT_THROTTLE_PENDING = 100
+# Messages per second, and burst, a client connection and a room may send; None for no limit.
+# The limit of a room only counts moves and controls, chat has its own inbox bound.
+COUP_CLIENT_MESSAGES_PER_SEC = 10
+COUP_CLIENT_MESSAGE_BURST = 20
+COUP_ROOM_MESSAGES_PER_SEC = 30
+COUP_ROOM_MESSAGE_BURST = 60
+# Frames waiting to be sent to a client beyond which the oldest are dropped
+COUP_CLIENT_SEND_BUFFER = 32
+# Game events and joins waiting on a shard beyond which client events are shed; None to never shed
+COUP_SHED_PENDING = 1000
@@ -15,7 +15,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
-from game.views import test_view, lobby_view, room_view, RoomListView, RoomCreateView
+from game.views import test_view, lobby_view, room_view
 import game.views as views
 
 urlpatterns = [
@@ -25,8 +25,7 @@ urlpatterns = [
     path('accounts/', include('django.contrib.auth.urls')),
     path('lobby/', lobby_view), #TODO
     path('room/<slug:room_name>', room_view),    #TODO
-    path('api/rooms/', views.RoomListView.as_view()),
-    path('api/rooms-detail/<slug:name>', views.RoomDetailView.as_view()),
-    path('api/rooms-create/', views.RoomCreateView.as_view()),
-    path('api/rooms-delete/<slug:name>', views.RoomDeleteView.as_view()),
+    path('api/rooms/', views.room_list_view),
+    path('api/rooms-detail/<slug:name>', views.room_detail_view),
+    path('api/replays/<slug:log_name>/<int:move>', views.ReplayView.as_view()),
 ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Channel layer benchmark.
+Measures, on the channel layers available, the round trip of a message
+between two consumers (send, then receive on the other side) and the
+throughput of group_send to rooms of players, each player receiving the
+frames of their room, as room managers broadcast to rooms. Compares the
+in-process LocalChannelLayer with channels' InMemoryChannelLayer and,
+if channels_redis is installed and a Redis server answers, with Redis.
+
+    python -m game.benchmarks.channel_layer --messages 20000 --redis redis://127.0.0.1:6379
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+FRAME = {'type': 'frontend.patch', 'text': json.dumps({'type': 'frontend.patch', 'base': 1, 'version': 2,
+         'ops': [{'op': 'replace', 'path': '/game_view/0/coins', 'value': 3}]})}
+
+def make_layers(redis_url=None):
+    """Channel layers by name. Redis is left out, with the reason, if unavailable."""
+    from channels.layers import InMemoryChannelLayer
+    from game.channel_layer import LocalChannelLayer
+    layers = {
+        'local': lambda: LocalChannelLayer(capacity=100000),
+        'in_memory': lambda: InMemoryChannelLayer(capacity=100000),
+    }
+    skipped = dict()
+    if redis_url:
+        try:
+            from channels_redis.core import RedisChannelLayer
+        except ImportError:
+            skipped['redis'] = 'channels_redis is not installed'
+        else:
+            layers['redis'] = lambda: RedisChannelLayer(hosts=[redis_url], capacity=100000)
+    return layers, skipped
+
+async def _round_trips(layer, num_messages):
+    """Seconds per send and receive of a message between two consumers"""
+    ping, pong = await layer.new_channel(), await layer.new_channel()
+    async def echo():
+        for _ in range(num_messages):
+            await layer.send(pong, await layer.receive(ping))
+    echoer = asyncio.ensure_future(echo())
+    start = time.perf_counter()
+    for _ in range(num_messages):
+        await layer.send(ping, FRAME)
+        await layer.receive(pong)
+    elapsed = time.perf_counter() - start
+    await echoer
+    return elapsed / num_messages / 2
+
+async def _group_sends(layer, num_messages, num_rooms, num_players):
+    """Messages delivered per second by group_send to rooms of num_players players"""
+    rooms = [f'room{index}' for index in range(num_rooms)]
+    members = dict()
+    for room in rooms:
+        members[room] = [await layer.new_channel() for _ in range(num_players)]
+        for channel in members[room]:
+            await layer.group_add(room, channel)
+    num_sends = num_messages // num_players
+    per_room = num_sends // num_rooms
+    async def player(channel):
+        for _ in range(per_room):
+            await layer.receive(channel)
+    players = [asyncio.ensure_future(player(channel)) for channels in members.values() for channel in channels]
+    start = time.perf_counter()
+    for _ in range(per_room):
+        for room in rooms:
+            await layer.group_send(room, FRAME)
+        # Let players keep up, as they would between moves
+        await asyncio.sleep(0)
+    await asyncio.gather(*players)
+    elapsed = time.perf_counter() - start
+    return per_room * num_rooms * num_players / elapsed
+
+async def _measure(make_layer, num_messages, num_rooms, num_players):
+    layer = make_layer()
+    try:
+        round_trip = await asyncio.wait_for(_round_trips(layer, num_messages), 60)
+        delivered = await asyncio.wait_for(_group_sends(layer, num_messages, num_rooms, num_players), 60)
+    finally:
+        await layer.flush()
+        await layer.close()
+    return {'send_receive_us': round_trip * 1e6, 'group_send_deliveries_per_sec': delivered}
+
+def measure_channel_layers(num_messages, num_rooms=100, num_players=4, redis_url=None):
+    layers, skipped = make_layers(redis_url)
+    results = dict()
+    for name, make_layer in layers.items():
+        try:
+            results[name] = asyncio.run(_measure(make_layer, num_messages, num_rooms, num_players))
+        except (OSError, asyncio.TimeoutError) as ex:
+            skipped[name] = f'unavailable: {ex!r}'
+    for name, reason in skipped.items():
+        results[name] = {'skipped': reason}
+    if 'redis' in results and 'skipped' not in results['redis']:
+        results['local_speedup_over_redis'] = (results['redis']['send_receive_us'] / results['local']['send_receive_us'])
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Channel layer round trip and group_send throughput')
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--redis', default='redis://127.0.0.1:6379', help="Redis URL, '' to skip Redis")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    print(json.dumps(measure_channel_layers(args.messages, args.rooms, args.players, args.redis), indent=4))
+
+if __name__ == '__main__':
+    main()
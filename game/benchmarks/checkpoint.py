@@ -0,0 +1,121 @@
+"""Checkpoint and warm start benchmark.
+Checkpoints a number of active rooms to a SQLite checkpoint store, then
+checkpoints again after a tenth of the rooms made a move, and finally
+restores every room from the store and arms its move timer, as a room
+manager does on restart: a room manager is restarted on the store and
+warm started. Also measures how long a full checkpoint of the room
+manager holds the event loop, dumping a chunk of rooms at a time.
+
+    python -m game.benchmarks.checkpoint --rooms 10000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from game.benchmarks.memory import make_active_room
+from game.checkpoint_store import CheckpointStore
+from game.coup_game.simulator import random_policy
+
+def _timed_checkpoint(store, games):
+    start = time.perf_counter()
+    changes = store.collect(games)
+    collected = time.perf_counter()
+    store.write(changes)
+    return len(changes[0]), collected - start, time.perf_counter() - collected
+
+async def _max_stall(coroutine):
+    """Runs coroutine, returns the longest the event loop was held by it in seconds"""
+    longest = 0.0
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    await coroutine
+    task.cancel()
+    return longest
+
+async def _warm_start(path):
+    """Restarts a room manager on the checkpoint store, as on the first message after a restart"""
+    from django.core.cache import cache
+    from game.benchmarks.room_actors import make_room_manager
+    cache.clear()
+    room_manager, _ = make_room_manager(set(), 0)
+    room_manager.checkpoints = CheckpointStore(path)
+    room_manager.checkpoint_interval = 3600
+    num_publishes = 0
+    publish = room_manager.room_registry.publish
+    def counted_publish():
+        nonlocal num_publishes
+        num_publishes += 1
+        publish()
+    room_manager.room_registry.publish = counted_publish
+    start = time.perf_counter()
+    await room_manager.warm_start()
+    warm_start_sec = time.perf_counter() - start
+    # Nothing changed since restored, checkpoint them all to measure the event loop stall
+    room_manager.checkpoints._written.clear()
+    checkpoint_stall = await _max_stall(room_manager.checkpoint())
+    room_manager.move_timer_wheel.stop()
+    room_manager.checkpoints.close()
+    return len(room_manager.games), warm_start_sec, num_publishes, checkpoint_stall
+
+def measure_checkpoint(num_rooms, num_players=4, seed=0):
+    rng = random.Random(seed)
+    games = {f'room{index}': make_active_room(index, num_players, rng) for index in range(num_rooms)}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'room-manager-0.sqlite3')
+        store = CheckpointStore(path)
+        full_rooms, full_collect, full_write = _timed_checkpoint(store, games)
+        for game in rng.sample(list(games.values()), num_rooms // 10):
+            movers = [player for player in game.players if game.get_valid_moves_for_player(player)]
+            if game.started and movers:
+                player = rng.choice(movers)
+                game.player_make_move(player, *random_policy(game, player, rng))
+        incremental_rooms, incremental_collect, incremental_write = _timed_checkpoint(store, games)
+        store.close()
+        file_bytes = os.path.getsize(path)
+        restored, warm_start_sec, num_publishes, checkpoint_stall = asyncio.run(_warm_start(path))
+    return {
+        'rooms': num_rooms,
+        'file_bytes_per_room': file_bytes / num_rooms,
+        'full_checkpoint_rooms': full_rooms,
+        'full_collect_sec': full_collect,
+        'full_write_sec': full_write,
+        'incremental_checkpoint_rooms': incremental_rooms,
+        'incremental_collect_sec': incremental_collect,
+        'incremental_write_sec': incremental_write,
+        'restored_rooms': restored,
+        'warm_start_sec': warm_start_sec,
+        'warm_start_registry_publishes': num_publishes,
+        'checkpoint_max_event_loop_stall_sec': checkpoint_stall,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Checkpoint and warm start time of rooms')
+    parser.add_argument('--rooms', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coup.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+    # Publish every registry change at once, to count them
+    settings.COUP_REGISTRY_PUBLISH_INTERVAL_SEC = 0
+    logging.disable(logging.WARNING)
+    print(json.dumps(measure_checkpoint(args.rooms, args.players), indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Benchmark of the ways to copy a game for lookahead search:
+copy.deepcopy, CoupGame.clone and CoupGame.snapshot/restore.
+
+    python -m game.benchmarks.clone
+"""
+
+import argparse
+import copy
+import json
+import logging
+import random
+import timeit
+from game.benchmarks.memory import make_active_room
+
+def time_per_call_usec(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Game copy benchmark')
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--number', type=int, default=2000, help='calls per timing run')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    game = make_active_room(0, args.players, random.Random(0))
+    snapshot = game.snapshot()
+    result = {
+        'players': args.players,
+        'deepcopy_usec': time_per_call_usec(lambda: copy.deepcopy(game), args.number),
+        'clone_usec': time_per_call_usec(game.clone, args.number),
+        'snapshot_usec': time_per_call_usec(game.snapshot, args.number),
+        'restore_usec': time_per_call_usec(lambda: game.restore(snapshot), args.number),
+    }
+    result['clone_speedup'] = result['deepcopy_usec'] / result['clone_usec']
+    result['snapshot_restore_speedup'] = result['deepcopy_usec'] / (result['snapshot_usec'] + result['restore_usec'])
+    print(json.dumps(result, indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Websocket codec benchmark.
+Compares bytes and encode/decode time of JSON against the binary
+protocol, for inbound moves and for outbound frontend frames of random
+games.
+
+    python -m game.benchmarks.codec --games 100
+"""
+
+import argparse
+import json
+import logging
+import random
+import timeit
+from game.codec import encode_move, decode_move, msgpack, TARGET_NONE, TARGET_SEAT, TARGET_INFLUENCE
+from game.coup_game.objects import Influence
+from game.coup_game.simulator import random_policy
+from game.coup_game.coup_game import CoupGamePlayer, CoupGameFrontend
+from game.benchmarks.memory import make_idle_room
+from game.benchmarks.frontend import frontend_state
+from game.frontend_delta import FrontendState
+
+def collect_moves_and_frames(num_games, num_players, seed=0):
+    """Moves as (move, target) played in random games, and the frames sent for them"""
+    rng = random.Random(seed)
+    frontend = CoupGameFrontend()
+    moves = list()
+    frames = list()
+    for index in range(num_games):
+        game = make_idle_room(index, num_players, rng)
+        game.start()
+        state = FrontendState()
+        state.snapshot(*frontend_state(frontend, game), game.version)
+        while game.started:
+            player = rng.choice([pl for pl in game.players if game.get_valid_moves_for_player(pl)])
+            move, target = random_policy(game, player, rng)
+            seat = game.get_players_in_seating_order().index(target) if isinstance(target, CoupGamePlayer) else None
+            moves.append((player.name, move, target, seat))
+            game.player_make_move(player, move, target)
+            public, private = frontend_state(frontend, game)
+            base_version, public_ops, private_ops = state.update(public, private, game.version)
+            name = game.players[0].name
+            frames.append(dict(public, type='frontend.update', version=game.version, **private[name]))
+            frames.append({'type': 'frontend.patch', 'base': base_version, 'version': game.version,
+                           'ops': public_ops + private_ops[name]})
+    return moves, frames
+
+def _time_per_item(function, items, repeat=3):
+    return min(timeit.repeat(lambda: [function(item) for item in items], number=1, repeat=repeat)) / len(items)
+
+def measure_codecs(num_games, num_players=4):
+    moves, frames = collect_moves_and_frames(num_games, num_players)
+    json_moves = list()
+    binary_moves = list()
+    for player_name, move, target, seat in moves:
+        json_target = target.name if seat is not None else (target.value if target else None)
+        json_moves.append(json.dumps({'type': 'game.move', 'player': player_name, 'move': move.value, 'target': json_target}))
+        if seat is not None:
+            binary_moves.append(encode_move(move, TARGET_SEAT, seat))
+        elif isinstance(target, Influence):
+            binary_moves.append(encode_move(move, TARGET_INFLUENCE, target))
+        else:
+            binary_moves.append(encode_move(move, TARGET_NONE))
+
+    result = {
+        'moves': len(moves),
+        'json_move_bytes': sum(map(len, json_moves)) / len(moves),
+        'binary_move_bytes': sum(map(len, binary_moves)) / len(moves),
+        'json_move_decode_usec': _time_per_item(json.loads, json_moves) * 1e6,
+        'binary_move_decode_usec': _time_per_item(decode_move, binary_moves) * 1e6,
+        'frames': len(frames),
+        'json_frame_bytes': sum(len(json.dumps(frame)) for frame in frames) / len(frames),
+        'json_frame_encode_usec': _time_per_item(json.dumps, frames) * 1e6,
+    }
+    if msgpack is not None:
+        result.update({
+            'msgpack_frame_bytes': sum(len(msgpack.packb(frame)) for frame in frames) / len(frames),
+            'msgpack_frame_encode_usec': _time_per_item(msgpack.packb, frames) * 1e6,
+        })
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON against binary websocket codec')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--players', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    print(json.dumps(measure_codecs(args.games, args.players), indent=4))
+
+if __name__ == '__main__':
+    main()
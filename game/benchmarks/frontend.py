@@ -0,0 +1,85 @@
+"""Frontend update payload benchmark.
+Plays random games and compares the bytes and JSON encoding time per
+move of full frontend snapshots against JSON patch deltas. Also compares
+the bytes moved through the channel layer when every player's patch is
+broadcast to the whole room against sending each player only their own.
+
+    python -m game.benchmarks.frontend --games 200
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from game.coup_game.coup_game import CoupGameFrontend
+from game.coup_game.simulator import random_policy
+from game.benchmarks.memory import make_idle_room
+from game.frontend_delta import FrontendState
+
+def frontend_state(frontend, game):
+    """Public and private frontend state, as sent by the room manager"""
+    public = {'game_view': frontend.game_view(game)}
+    private = {player.name: {
+        'interface': frontend.player_interface(game, player),
+        'player_view': frontend.player_view(game, player)
+    } for player in game.players}
+    return public, private
+
+def measure_payloads(num_games, num_players=4, seed=0):
+    rng = random.Random(seed)
+    frontend = CoupGameFrontend()
+    totals = {'moves': 0, 'full_bytes': 0, 'delta_bytes': 0, 'full_sec': 0.0, 'delta_sec': 0.0,
+              'broadcast_layer_bytes': 0, 'targeted_layer_bytes': 0}
+    perf_counter = time.perf_counter
+    for index in range(num_games):
+        game = make_idle_room(index, num_players, rng)
+        game.start()
+        state = FrontendState()
+        state.snapshot(*frontend_state(frontend, game), game.version)
+        while game.started:
+            movers = [player for player in game.players if game.get_valid_moves_for_player(player)]
+            player = rng.choice(movers)
+            game.player_make_move(player, *random_policy(game, player, rng))
+            public, private = frontend_state(frontend, game)
+
+            start = perf_counter()
+            full = json.dumps(dict(public, type='frontend.update')) + json.dumps(dict(private, type='individual.frontend.update'))
+            totals['full_sec'] += perf_counter() - start
+
+            start = perf_counter()
+            base_version, public_ops, private_ops = state.update(public, private, game.version)
+            delta = json.dumps({'type': 'frontend.patch', 'base': base_version, 'version': game.version,
+                                'ops': public_ops, 'players': private_ops})
+            totals['delta_sec'] += perf_counter() - start
+
+            totals['moves'] += 1
+            totals['full_bytes'] += len(full)
+            totals['delta_bytes'] += len(delta)
+            # A group send delivers a copy of the event to every member
+            totals['broadcast_layer_bytes'] += len(delta) * len(game.players)
+            for name, ops in private_ops.items():
+                patch = {'type': 'frontend.patch', 'base': base_version, 'version': game.version, 'ops': public_ops + ops}
+                totals['targeted_layer_bytes'] += len(json.dumps(patch))
+    moves = totals['moves']
+    return {
+        'moves': moves,
+        'full_bytes_per_move': totals['full_bytes'] / moves,
+        'delta_bytes_per_move': totals['delta_bytes'] / moves,
+        'full_encode_usec_per_move': totals['full_sec'] / moves * 1e6,
+        'delta_encode_usec_per_move': totals['delta_sec'] / moves * 1e6,
+        'broadcast_layer_bytes_per_move': totals['broadcast_layer_bytes'] / moves,
+        'targeted_layer_bytes_per_move': totals['targeted_layer_bytes'] / moves,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Frontend update bytes per move')
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--players', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    print(json.dumps(measure_payloads(args.games, args.players), indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Memory benchmark for rooms held by a room manager.
+Builds a number of idle rooms (players seated, game not started) and
+active rooms (game started and a few turns played) and reports the
+number of bytes allocated per room.
+
+    python -m game.benchmarks.memory --rooms 100000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import random
+import tracemalloc
+from game.coup_game.coup_game import CoupGame
+from game.coup_game.simulator import random_policy
+
+def make_idle_room(index, num_players, rng):
+    game = CoupGame(f'room{index}', rng=rng)
+    for seat in range(num_players):
+        game.add_player(f'room{index}-player{seat}')
+    return game
+
+def make_active_room(index, num_players, rng, num_moves=10):
+    game = make_idle_room(index, num_players, rng)
+    game.start()
+    for _ in range(num_moves):
+        movers = [player for player in game.players if game.get_valid_moves_for_player(player)]
+        if not game.started or not movers:
+            break
+        player = rng.choice(movers)
+        game.player_make_move(player, *random_policy(game, player, rng))
+    return game
+
+def measure_bytes_per_room(make_room, num_rooms, num_players, seed=0):
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rooms = {f'room{index}': make_room(index, num_players, rng) for index in range(num_rooms)}
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del rooms
+    return allocated / num_rooms
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bytes allocated per room')
+    parser.add_argument('--rooms', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=6)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    result = {
+        'rooms': args.rooms,
+        'players_per_room': args.players,
+        'idle_bytes_per_room': measure_bytes_per_room(make_idle_room, args.rooms, args.players),
+        'active_bytes_per_room': measure_bytes_per_room(make_active_room, args.rooms, args.players),
+    }
+    print(json.dumps(result, indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""PlayerConsumer.receive throughput benchmark.
+Feeds chat, move and control messages through PlayerConsumer.receive,
+with the channel layer and websocket replaced by sinks, and reports
+messages/sec with the fast validators and with the DRF serializers.
+
+    python -m game.benchmarks.receive --messages 20000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+MESSAGES = [
+    {'type': 'game.move', 'player': 'bob', 'move': 'income', 'target': None},
+    {'type': 'game.move', 'player': 'bob', 'move': 'coup', 'target': 'tom'},
+    {'type': 'game.control', 'player': 'bob', 'control': 'change-seat', 'value': 3},
+    {'type': 'chat', 'player': 'bob', 'message': 'hello'},
+]
+
+class _Sink(object):
+    """Stands in for the channel layer sender and the websocket"""
+    def __init__(self):
+        self.num_messages = 0
+
+    async def send_to_consumer(self, consumer_name, data):
+        self.num_messages += 1
+
+    async def broadcast_to_group(self, group_name, data):
+        self.num_messages += 1
+
+def make_consumer():
+    from game.consumers import PlayerConsumer
+    consumer = PlayerConsumer({'type': 'websocket'})
+    consumer.room_name = 'room'
+    consumer.player_name = 'bob'
+    consumer.room_manager_channel = 'room-manager-0'
+    consumer.channel_layer_sender = _Sink()
+    consumer.rate_limit = None
+    async def send(text_data=None, bytes_data=None):
+        raise AssertionError(f'Unexpected error reply {text_data}')
+    consumer.send = send
+    return consumer
+
+def measure_receive(num_messages, use_drf=False):
+    """Messages/sec through PlayerConsumer.receive"""
+    import game.serializers as serializers
+    texts = [json.dumps(MESSAGES[index % len(MESSAGES)]) for index in range(num_messages)]
+    consumer = make_consumer()
+    create_serializer = serializers.create_serializer
+    if use_drf:
+        serializers.create_serializer = serializers.create_drf_serializer
+
+    async def run():
+        for text in texts:
+            await consumer.receive(text)
+    try:
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+    finally:
+        serializers.create_serializer = create_serializer
+    assert consumer.channel_layer_sender.num_messages == num_messages
+    return num_messages / elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Messages/sec through PlayerConsumer.receive')
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coup.settings')
+    import django
+    django.setup()
+    logging.disable(logging.WARNING)
+    drf = measure_receive(args.messages, use_drf=True)
+    fast = measure_receive(args.messages)
+    print(json.dumps({'messages': args.messages, 'drf_messages_per_sec': drf,
+                      'fast_messages_per_sec': fast, 'speedup': fast / drf}, indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Room manager tail latency benchmark, sequential vs per-room actors.
+Runs a room manager on the in-memory channel layer with a client per
+room making random moves with a random think time in between, waiting
+for each move to be handled before the next. A share of the rooms is
+I/O heavy: handling their moves awaits a round trip, like a database
+write awaited in the handler. Measures move latency, from the client
+sending the move to the room manager having handled it, of the other
+rooms and of the I/O heavy rooms, with the room manager handling every
+event in turn as before (sequential) and with per-room actors.
+
+    python -m game.benchmarks.room_actors --rooms 200 --slow-rooms 20 --io-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    def at(percent):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))] * 1000
+    return {'moves': len(latencies), 'p50_ms': at(50), 'p95_ms': at(95), 'p99_ms': at(99), 'max_ms': latencies[-1] * 1000}
+
+def make_room_manager(slow_rooms, io_sec):
+    from channels.consumer import AsyncConsumer
+    from game.consumers import RoomManagerConsumer
+
+    class BenchmarkRoomManager(RoomManagerConsumer):
+        async def game_move(self, event):
+            if event['room'] in slow_rooms:
+                await asyncio.sleep(io_sec)
+            try:
+                await super().game_move(event)
+            finally:
+                event['done'].set_result(None)
+
+    class NoDatabase(object):
+        def add_room(self, room_name):
+            pass
+
+        def update_room(self, room_name, num_players, game_started):
+            pass
+
+        def delete_room(self, room_name):
+            pass
+
+    room_manager = BenchmarkRoomManager({'type': 'channel'})
+    room_manager.room_store = NoDatabase()
+    room_manager.event_log_dir = None
+    room_manager.checkpoints = None
+    room_manager.warm_started = True
+    return room_manager, AsyncConsumer.dispatch
+
+async def _run(num_rooms, slow_rooms, io_sec, moves_per_room, think_sec, use_actors, seed):
+    from game.coup_game.simulator import random_policy
+    room_manager, sequential_dispatch = make_room_manager(slow_rooms, io_sec)
+    rng = random.Random(seed)
+    # Messages in the order the channel layer delivers them to the consumer
+    messages = asyncio.Queue()
+    latencies = {'fast': list(), 'slow': list()}
+
+    async def consume():
+        while True:
+            message = await messages.get()
+            if use_actors:
+                await room_manager.dispatch(message)
+            else:
+                await sequential_dispatch(room_manager, message)
+
+    async def client(room):
+        for name in ('bob', 'tom', 'ann', 'joe'):
+            await room_manager.join_game({'type': 'join.game', 'player': name, 'room': room, 'channel': f'{room}-{name}'})
+        game = room_manager.games[room]
+        game.start()
+        kind = 'slow' if room in slow_rooms else 'fast'
+        for _ in range(moves_per_room):
+            await asyncio.sleep(rng.expovariate(1 / think_sec))
+            if not game.started:
+                break
+            player = rng.choice([pl for pl in game.players if game.get_valid_moves_for_player(pl)])
+            move, target = random_policy(game, player, rng)
+            done = asyncio.get_event_loop().create_future()
+            start = time.perf_counter()
+            await messages.put({'type': 'game.move', 'room': room, 'player': player.name, 'move': move.value,
+                                'target': target.name if hasattr(target, 'name') else getattr(target, 'value', None),
+                                'done': done})
+            await done
+            latencies[kind].append(time.perf_counter() - start)
+        room_manager.clear_move_timer(room)
+
+    consumer = asyncio.get_event_loop().create_task(consume())
+    start = time.perf_counter()
+    await asyncio.gather(*[client(f'room{index}') for index in range(num_rooms)])
+    wall_time = time.perf_counter() - start
+    consumer.cancel()
+    room_manager.move_timer_wheel.stop()
+    return {
+        'mode': 'actors' if use_actors else 'sequential',
+        'wall_sec': wall_time,
+        'fast_rooms': _percentiles(latencies['fast']),
+        'slow_rooms': _percentiles(latencies['slow']) if latencies['slow'] else None,
+    }
+
+def measure_room_actors(num_rooms, num_slow_rooms, io_ms, moves_per_room=20, think_ms=200, seed=0):
+    slow_rooms = {f'room{index}' for index in range(num_slow_rooms)}
+    return [asyncio.run(_run(num_rooms, slow_rooms, io_ms / 1000, moves_per_room, think_ms / 1000, use_actors, seed))
+            for use_actors in (False, True)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Move latency of a room manager with I/O heavy rooms')
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--slow-rooms', type=int, default=20, help='rooms awaiting I/O on every move')
+    parser.add_argument('--io-ms', type=float, default=20, help='I/O round trip of slow rooms')
+    parser.add_argument('--moves', type=int, default=20, help='moves per room')
+    parser.add_argument('--think-ms', type=float, default=200, help='mean time between moves of a room')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coup.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+    logging.disable(logging.ERROR)
+    print(json.dumps(measure_room_actors(args.rooms, args.slow_rooms, args.io_ms, args.moves, args.think_ms), indent=4))
+
+if __name__ == '__main__':
+    main()
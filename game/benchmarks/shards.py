@@ -0,0 +1,93 @@
+"""Room manager shard scaling benchmark.
+Places rooms on shards with the consistent hash ring and runs every
+shard in its own process, as separate runworker processes would. Each
+shard plays random games in its rooms doing the per move work of a room
+manager: apply the move and build the frontend views sent to players.
+Reports total moves/sec for an increasing number of shards.
+
+    python -m game.benchmarks.shards --rooms 600 --moves 200 --shards 1,2,4,8
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from multiprocessing import Pool
+from game.coup_game.coup_game import CoupGameFrontend
+from game.benchmarks.memory import make_idle_room
+from game.coup_game.simulator import random_policy
+from game.sharding import HashRing, get_room_manager_channels
+
+def _run_shard(args):
+    """Worker process entry point. Returns (moves played, busy seconds)."""
+    room_names, num_players, moves_per_room, seed = args
+    logging.disable(logging.WARNING)
+    rng = random.Random(seed)
+    frontend = CoupGameFrontend()
+    games = dict()
+    num_moves = 0
+    start = time.perf_counter()
+    for index, room in enumerate(room_names):
+        games[room] = make_idle_room(index, num_players, rng)
+        games[room].start()
+    # Interleave rooms like a room manager serving live traffic
+    for _ in range(moves_per_room):
+        for room, game in games.items():
+            if not game.started:
+                continue
+            movers = [player for player in game.players if game.get_valid_moves_for_player(player)]
+            player = rng.choice(movers)
+            game.player_make_move(player, *random_policy(game, player, rng))
+            frontend.game_view(game)
+            for pl in game.players:
+                frontend.player_interface(game, pl)
+                frontend.player_view(game, pl)
+            num_moves += 1
+    return num_moves, time.perf_counter() - start
+
+def place_rooms(num_rooms, num_shards):
+    """Room names assigned to each shard channel"""
+    channels = get_room_manager_channels(num_shards)
+    ring = HashRing(channels)
+    placement = {channel: list() for channel in channels}
+    for index in range(num_rooms):
+        room = f'room{index}'
+        placement[ring.get_node(room)].append(room)
+    return placement
+
+def measure_shards(num_rooms, num_shards, num_players=4, moves_per_room=100, seed=0):
+    placement = place_rooms(num_rooms, num_shards)
+    jobs = [(rooms, num_players, moves_per_room, seed + index) for index, rooms in enumerate(placement.values())]
+    start = time.perf_counter()
+    with Pool(num_shards) as pool:
+        results = pool.map(_run_shard, jobs)
+    wall_time = time.perf_counter() - start
+    num_moves = sum(moves for moves, _ in results)
+    rooms_per_shard = [len(rooms) for rooms in placement.values()]
+    return {
+        'shards': num_shards,
+        'moves': num_moves,
+        'wall_sec': wall_time,
+        'moves_per_sec': num_moves / wall_time,
+        'rooms_per_shard_min': min(rooms_per_shard),
+        'rooms_per_shard_max': max(rooms_per_shard),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Room manager throughput by number of shards')
+    parser.add_argument('--rooms', type=int, default=600)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--moves', type=int, default=100, help='moves per room')
+    parser.add_argument('--shards', default='1,2,4', help='comma separated shard counts')
+    args = parser.parse_args(argv)
+
+    curve = list()
+    for num_shards in map(int, args.shards.split(',')):
+        point = measure_shards(args.rooms, num_shards, args.players, args.moves)
+        point['speedup'] = point['moves_per_sec'] / curve[0]['moves_per_sec'] if curve else 1.0
+        curve.append(point)
+    print(json.dumps(curve, indent=4))
+
+if __name__ == '__main__':
+    main()
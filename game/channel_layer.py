@@ -0,0 +1,229 @@
+"""In-process channel layer for single process deployments and load tests.
+Consumers of one process talk through it without serializing messages or
+going through Redis. Unlike channels' InMemoryChannelLayer, meant for
+tests, it does not deep copy messages, hands a message straight to a
+receiver already waiting on its channel, bounds every channel queue, and
+indexes group membership both ways, so expiring a channel does not scan
+every group.
+
+Messages are passed by reference, the same dict to every member of a
+group: senders must not change a message once sent, and receivers must
+not change the messages they get. The consumers of this repo do neither.
+
+Messages not received within expiry seconds are dropped, and their
+channel is removed from its groups, as with Redis. Group memberships
+expire after group_expiry seconds.
+
+With this layer, room managers must run in the web process. Wrap the ASGI
+application with InProcessWorkers to start them on the first connection:
+
+    CHANNEL_LAYERS = {'default': {'BACKEND': 'game.channel_layer.LocalChannelLayer'}}
+"""
+
+import asyncio
+import collections
+import itertools
+import secrets
+import time
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer, get_channel_layer
+from channels.worker import Worker
+
+class _Channel(object):
+    __slots__ = ('messages', 'waiters', 'capacity')
+
+    def __init__(self, capacity):
+        self.messages = collections.deque()     # (expiry time, message)
+        self.waiters = collections.deque()      # Futures of receivers waiting for a message
+        self.capacity = capacity
+
+class LocalChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None, clock=time.monotonic, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.group_expiry = group_expiry
+        self.clock = clock
+        self.channels = dict()      # _Channel by channel name
+        self.groups = dict()        # Join time by channel name by group
+        self.channel_groups = dict()    # Groups by channel name
+        self._client_prefix = secrets.token_hex(4)
+        self._counter = itertools.count()
+        self._next_cleanup = clock() + expiry
+        # Metrics
+        self.num_sent = 0
+        self.num_handed_over = 0    # Sent straight to a waiting receiver
+        self.num_full = 0
+        self.num_expired = 0
+
+    def _get_channel(self, name):
+        channel = self.channels.get(name)
+        if channel is None:
+            channel = self.channels[name] = _Channel(self.get_capacity(name))
+        return channel
+
+    def _deliver(self, name, message):
+        """Hand message to a receiver waiting on the channel, or queue it.
+        Returns False if the channel is full."""
+        channel = self._get_channel(name)
+        while channel.waiters:
+            waiter = channel.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(message)
+                self.num_sent += 1
+                self.num_handed_over += 1
+                return True
+        if len(channel.messages) >= channel.capacity:
+            self.num_full += 1
+            return False
+        channel.messages.append((self.clock() + self.expiry, message))
+        self.num_sent += 1
+        return True
+
+    ### Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        self._clean_expired()
+        if not self._deliver(channel, message):
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        self._clean_expired()
+        queue = self._get_channel(channel)
+        if queue.messages:
+            _, message = queue.messages.popleft()
+            self._discard_if_unused(channel, queue)
+            return message
+        waiter = asyncio.get_event_loop().create_future()
+        queue.waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Cancelled after the message was handed over, keep it for the next receiver
+            if waiter.done() and not waiter.cancelled():
+                queue.messages.appendleft((self.clock() + self.expiry, waiter.result()))
+            raise
+        finally:
+            if waiter in queue.waiters:
+                queue.waiters.remove(waiter)
+            self._discard_if_unused(channel, queue)
+
+    async def new_channel(self, prefix='specific.'):
+        return f'{prefix}.local-{self._client_prefix}!{next(self._counter)}'
+
+    def _discard_if_unused(self, name, channel):
+        if not channel.messages and not channel.waiters and self.channels.get(name) is channel:
+            del self.channels[name]
+
+    ### Expiry
+
+    def _clean_expired(self):
+        """Drop expired messages and memberships, at most once per expiry period"""
+        now = self.clock()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + min(self.expiry, self.group_expiry)
+        for name, channel in list(self.channels.items()):
+            expired = False
+            while channel.messages and channel.messages[0][0] < now:
+                channel.messages.popleft()
+                self.num_expired += 1
+                expired = True
+            if expired:
+                # Nobody is receiving on the channel, as with Redis it leaves its groups
+                self._remove_from_groups(name)
+            self._discard_if_unused(name, channel)
+        oldest = now - self.group_expiry
+        for group, members in list(self.groups.items()):
+            for name, joined in list(members.items()):
+                if joined < oldest:
+                    self._discard(group, name)
+
+    def _remove_from_groups(self, name):
+        for group in list(self.channel_groups.get(name, ())):
+            self._discard(group, name)
+
+    ### Groups extension
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        self.groups.setdefault(group, dict())[channel] = self.clock()
+        self.channel_groups.setdefault(channel, set()).add(group)
+
+    async def group_discard(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        self._discard(group, channel)
+
+    def _discard(self, group, channel):
+        members = self.groups.get(group)
+        if members is not None:
+            members.pop(channel, None)
+            if not members:
+                del self.groups[group]
+        groups = self.channel_groups.get(channel)
+        if groups is not None:
+            groups.discard(group)
+            if not groups:
+                del self.channel_groups[channel]
+
+    async def group_send(self, group, message):
+        """Send message to every member of the group. Members whose channel is full miss it."""
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_group_name(group), "Group name not valid"
+        self._clean_expired()
+        for channel in list(self.groups.get(group, ())):
+            self._deliver(channel, message)
+
+    ### Flush extension
+
+    async def flush(self):
+        # Receivers waiting keep waiting
+        for name, channel in list(self.channels.items()):
+            channel.messages.clear()
+            self._discard_if_unused(name, channel)
+        self.groups = dict()
+        self.channel_groups = dict()
+
+    async def close(self):
+        pass
+
+    def get_metrics(self):
+        return {
+            'channels': len(self.channels),
+            'groups': len(self.groups),
+            'sent': self.num_sent,
+            'handed_over': self.num_handed_over,
+            'full': self.num_full,
+            'expired': self.num_expired,
+        }
+
+class InProcessWorkers(object):
+    """ASGI application running the consumers of the given channels, e.g. room
+    managers, in this process from the first connection on, when the channel
+    layer is a LocalChannelLayer. Otherwise they are left to runworker."""
+    def __init__(self, application, channels):
+        self.application = application
+        self.channels = channels
+        self.worker = None
+        self.task = None
+
+    def __call__(self, scope):
+        if self.worker is None and scope['type'] != 'channel':
+            channel_layer = get_channel_layer()
+            if isinstance(channel_layer, LocalChannelLayer):
+                self.worker = Worker(self.application, self.channels, channel_layer)
+                self.task = asyncio.ensure_future(self.worker.handle())
+            else:
+                self.worker = False
+        return self.application(scope)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
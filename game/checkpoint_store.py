@@ -0,0 +1,108 @@
+"""SQLite store of the checkpoints of the games of a room manager.
+Each room manager shard has its own database file holding one row per
+room: the game version and the game dumped by game.coup_game.checkpoint
+as JSON. Checkpoints are incremental: collect only dumps games whose
+version changed since they were last written, and rooms gone since are
+deleted. A checkpoint is written in one transaction, so the store always
+holds a consistent state of every room, at most one checkpoint interval
+old. On restart the room manager loads all rooms back with load_all.
+
+    store = CheckpointStore('checkpoints/room-manager-0.sqlite3')
+    store.write(store.collect(games))     # Periodically, write off the event loop
+    games = store.load_all()               # On restart
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from game.coup_game.checkpoint import dump_game, load_game
+
+class CheckpointStore(object):
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+        self._written = dict()      # (game, version) last written by room name
+        self._failed_deletes = set()
+        # Metrics
+        self.num_checkpoints = 0
+        self.num_rooms_written = 0
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Written from a worker thread, one thread at a time
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS checkpoint '
+                                     '(room TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL)')
+        return self._connection
+
+    def collect(self, games):
+        """Rows to write and rooms to delete for the games by room name.
+        Dumps the games, so must run where games are changed, i.e. on the event loop."""
+        rows = list()
+        for room, game in games.items():
+            row = self.collect_room(room, game)
+            if row is not None:
+                rows.append(row)
+        return rows, self.collect_deleted(games)
+
+    def collect_room(self, room, game):
+        """Row to write for the game of room, None if unchanged since last written.
+        Lets callers dump a few rooms at a time, then collect_deleted."""
+        written = self._written.get(room)
+        if written is not None and written[0] is game and written[1] == game.version:
+            return None
+        self._written[room] = (game, game.version)
+        return (room, game.version, json.dumps(dump_game(game), separators=(',', ':')))
+
+    def collect_deleted(self, games):
+        """Rooms to delete, gone from the games by room name since last written"""
+        deleted = [room for room in self._written if room not in games]
+        for room in deleted:
+            del self._written[room]
+        deleted.extend(room for room in self._failed_deletes if room not in games and room not in deleted)
+        self._failed_deletes.clear()
+        return deleted
+
+    def write(self, changes):
+        """Write the changes returned by collect in one transaction. Blocking.
+        On failure the changes are collected again by the next collect.
+        Not to be called concurrently with collect."""
+        rows, deleted = changes
+        if not rows and not deleted:
+            return
+        try:
+            connection = self._connect()
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO checkpoint (room, version, data) VALUES (?, ?, ?)', rows)
+                connection.executemany('DELETE FROM checkpoint WHERE room = ?', [(room,) for room in deleted])
+        except Exception:
+            for room, _, _ in rows:
+                self._written.pop(room, None)
+            self._failed_deletes.update(deleted)
+            raise
+        self.num_checkpoints += 1
+        self.num_rooms_written += len(rows)
+
+    def load_all(self, default_move_policy=None):
+        """Games of every room by room name. Blocking.
+        Rooms that fail to load are logged and skipped."""
+        games = dict()
+        for room, data in self._connect().execute('SELECT room, data FROM checkpoint'):
+            try:
+                games[room] = load_game(json.loads(data), default_move_policy)
+            except Exception as ex:
+                logging.error(f"Unable to restore room {room} from checkpoint: {ex}")
+                continue
+            self._written[room] = (games[room], games[room].version)
+        return games
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
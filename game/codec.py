@@ -0,0 +1,69 @@
+"""Websocket frame codecs.
+Clients offering the binary subprotocol send moves as fixed 4 byte
+frames and receive frontend frames encoded with msgpack. Other clients,
+and any text frame (chats, controls), use JSON.
+
+Binary move frame, see game.coup_game.codes for the codes:
+    byte 0: message kind, 1 for game.move
+    byte 1: move code
+    byte 2: target kind, 0 none, 1 seat, 2 influence
+    byte 3: target. Seat is the index in seating order of the in game players,
+            the order of the game view. Influence is an influence code.
+"""
+
+import json
+import struct
+from game.coup_game.codes import MOVE_TO_CODE, INFLUENCE_TO_CODE, code_to_move, code_to_influence
+
+try:
+    import msgpack
+except ImportError:
+    # Comes with channels_redis. Without it only JSON is offered.
+    msgpack = None
+
+BINARY_SUBPROTOCOL = 'coup.binary.v1'
+
+MESSAGE_GAME_MOVE = 1
+TARGET_NONE = 0
+TARGET_SEAT = 1
+TARGET_INFLUENCE = 2
+MOVE_FRAME = struct.Struct('!BBBB')
+
+def encode_move(move, target_kind=TARGET_NONE, target=0):
+    """Binary frame of a move. target is a seat index or an Influence depending on target_kind."""
+    if target_kind == TARGET_INFLUENCE:
+        target = INFLUENCE_TO_CODE[target]
+    return MOVE_FRAME.pack(MESSAGE_GAME_MOVE, MOVE_TO_CODE[move], target_kind, target)
+
+def decode_move(bytes_data):
+    """Decode a binary move frame into a game.move event. The move and influence
+    targets are given by value as in JSON events, seat targets as target_seat.
+    Raises ValueError for malformed frames."""
+    if len(bytes_data) != MOVE_FRAME.size:
+        raise ValueError(f"Binary frame must be {MOVE_FRAME.size} bytes, got {len(bytes_data)}")
+    kind, move_code, target_kind, target = MOVE_FRAME.unpack(bytes_data)
+    if kind != MESSAGE_GAME_MOVE:
+        raise ValueError(f"Unknown binary message kind {kind}")
+    move = code_to_move(move_code)
+    if move is None:
+        raise ValueError(f"Unknown move code {move_code}")
+    event = {'type': 'game.move', 'move': move.value, 'target': None, 'target_seat': None}
+    if target_kind == TARGET_SEAT:
+        event['target_seat'] = target
+    elif target_kind == TARGET_INFLUENCE:
+        influence = code_to_influence(target)
+        if influence is None:
+            raise ValueError(f"Unknown influence code {target}")
+        event['target'] = influence.value
+    elif target_kind != TARGET_NONE:
+        raise ValueError(f"Unknown target kind {target_kind}")
+    return event
+
+# Outbound frame formats. Field is the event field carrying the encoded frame,
+# matching the text_data or bytes_data of a websocket send.
+JSON_FORMAT = 'json'
+MSGPACK_FORMAT = 'msgpack'
+FRAME_ENCODERS = {JSON_FORMAT: json.dumps}
+FRAME_FIELDS = {JSON_FORMAT: 'text', MSGPACK_FORMAT: 'bytes'}
+if msgpack is not None:
+    FRAME_ENCODERS[MSGPACK_FORMAT] = msgpack.packb
@@ -1,43 +1,88 @@
+import asyncio
 import logging
 import json
-from asgiref.sync import async_to_sync
-from threading import Timer
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.layers import get_channel_layer
 from channels.consumer import AsyncConsumer
+from channels.exceptions import ChannelFull
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
 from game.models import Room
 from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.coup_game.mcts import ISMCTSBot
 from game.coup_game.move import str_to_move
 from game.coup_game.objects import str_to_inf
 from game.coup_game.exceptions import BadPlayerMove, BadGameState, BadTurnState
 from django.db import IntegrityError
+from game.timer_wheel import TimerWheel
+from game.sharding import get_room_manager_channel, get_room_manager_channels
+from game.frontend_delta import FrontendState
+from game.frame_cache import FrameCache
+from game.room_store import WriteBehindRoomStore
+from game.room_registry import RoomRegistry
+from game.coup_game.event_log import GameEventLog
+from game.checkpoint_store import CheckpointStore
+from game.room_actor import RoomActors, PRIORITY_GAME, PRIORITY_MEMBERSHIP, PRIORITY_CHAT
+from game.flow_control import TokenBucket, FrameBuffer, FRAME_CHAT, FRAME_FULL, FRAME_PATCH
+import game.flow_control as flow_control
+import game.coup_game.latency as latency
 import game.serializers as serializers
+import game.codec as codec
 
 class PlayerConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.room_name = self.scope['url_route']['kwargs']['room_name']
         self.player_name = self.scope['user'].username
+        self.room_manager_channel = get_room_manager_channel(self.room_name)
+        # Binary protocol if the client offers it, JSON otherwise
+        subprotocol = None
+        self.frame_format = codec.JSON_FORMAT
+        if codec.BINARY_SUBPROTOCOL in self.scope.get('subprotocols', ()) and codec.msgpack is not None:
+            subprotocol = codec.BINARY_SUBPROTOCOL
+            self.frame_format = codec.MSGPACK_FORMAT
         self.channel_layer_sender = ChannelLayerMessageSender(self.channel_layer)
         self.move_timeout_timer = None
+        # Messages of the client are rate limited, frames to it are buffered
+        self.rate_limit = None
+        if settings.COUP_CLIENT_MESSAGES_PER_SEC:
+            self.rate_limit = TokenBucket(settings.COUP_CLIENT_MESSAGES_PER_SEC, settings.COUP_CLIENT_MESSAGE_BURST)
+        self.rate_limited = False
+        self.num_rate_limited = 0
+        self.frame_buffer = FrameBuffer(self.send, settings.COUP_CLIENT_SEND_BUFFER)
 
         await self.channel_layer.group_add(self.room_name, self.channel_name)
-        await self.channel_layer_sender.send_to_consumer('room-manager', 
-            {'type': 'join.game', 'player':self.player_name, 'room': self.room_name}
+        await self.channel_layer_sender.send_to_consumer(self.room_manager_channel, 
+            {'type': 'join.game', 'player':self.player_name, 'room': self.room_name, 'channel': self.channel_name,
+             'frame_format': self.frame_format}
         )
-        await self.accept()
+        await self.accept(subprotocol)
         logging.info(f'Joined {self.player_name}')
 
     async def disconnect(self, close_code):
         print('disconnect')
-        await self.channel_layer_sender.send_to_consumer('room-manager', 
+        self.frame_buffer.close()
+        if self.num_rate_limited or self.frame_buffer.num_dropped:
+            logging.warning(f'{self.player_name} in {self.room_name}: {self.num_rate_limited} messages rate limited, '
+                            f'{self.frame_buffer.num_dropped} frames dropped, {self.frame_buffer.num_coalesced} coalesced')
+        await self.channel_layer_sender.send_to_consumer(self.room_manager_channel, 
             {'type': 'disconnect.from.game', 'player':self.player_name, 'room': self.room_name}
         )
         await self.channel_layer.group_discard(self.room_name, self.channel_name)
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
+        if self.rate_limit is not None and not self.rate_limit.take():
+            await self._drop_rate_limited()
+            return
+        self.rate_limited = False
+        if bytes_data is not None:
+            await self._receive_binary(bytes_data)
+            return
         data = serializers.text_data_to_data(text_data)
-        logging.info(f'Received data {data}')
+        logging.info('Received data %s', data)
 
         try:
             serializer = serializers.create_serializer(data)
@@ -53,30 +98,52 @@ class PlayerConsumer(AsyncWebsocketConsumer):
                 await self.send(text_data=json.dumps(resp))
                 logging.error(f'Error: Serializered data is not valid. {serializer.errors}')
     
+    async def _drop_rate_limited(self):
+        """Drop a message over the rate limit, telling the client once per run of dropped messages"""
+        flow_control.counters['client_rate_limited'] += 1
+        self.num_rate_limited += 1
+        if not self.rate_limited:
+            self.rate_limited = True
+            await self.send(text_data=json.dumps({'errors': 'Too many messages, slow down'}))
+
     async def chat(self, event):
-        await self.send(text_data=serializers.data_to_text_data(event))
+        self.frame_buffer.put(FRAME_CHAT, text_data=serializers.data_to_text_data(event))
+
+    async def player_error(self, event):
+        """Event of this player refused by the room manager"""
+        await self.send(text_data=json.dumps({'errors': event.get('errors')}))
     
     async def frontend_update(self, event):
-        await self.send(text_data=serializers.data_to_text_data(event))
+        """Full frontend addressed to this player, already encoded by the room manager.
+        Frontend frames still waiting to be sent are stale and dropped."""
+        self.frame_buffer.put(FRAME_FULL, text_data=event.get('text'), bytes_data=event.get('bytes'))
 
-    async def individual_frontend_update(self, event):
-        """Pick up the event addressed to this player and pass it to client"""
-        if self.player_name not in event:
-            logging.error(f'No update for player {self.player_name} in individual update event {event}')
-            resp = {'errors': 'Internal server error. No update for player'}
-            await self.send(text_data=json.dumps(resp))
+    async def frontend_patch(self, event):
+        """Frontend changes addressed to this player, already encoded by the room manager"""
+        self.frame_buffer.put(FRAME_PATCH, text_data=event.get('text'), bytes_data=event.get('bytes'))
+
+    async def _receive_binary(self, bytes_data):
+        """Binary frames are moves of the player of this connection"""
+        try:
+            data = codec.decode_move(bytes_data)
+        except ValueError as ex:
+            await self.send(text_data=json.dumps({'errors': str(ex)}))
+            logging.error(f'Error: Bad binary frame {bytes_data}. {ex}')
             return
-        player_event = event[self.player_name]
-        player_event['type'] = 'frontend.update'
-        await self.send(text_data=serializers.data_to_text_data(player_event))
+        data['player'] = self.player_name
+        await self._process_or_propagate_message(data)
 
     async def _process_or_propagate_message(self, validated_data):
         event_type = serializers.EventType(validated_data['type'])
-        if event_type is serializers.EventType.CHAT:
-            await self.channel_layer_sender.broadcast_to_group(self.room_name, validated_data)
-        elif event_type in (serializers.EventType.GAME_MOVE, serializers.EventType.GAME_CONTROL):
+        if event_type in (serializers.EventType.CHAT, serializers.EventType.GAME_MOVE, serializers.EventType.GAME_CONTROL):
+            # Chat goes through the room manager too, which handles it after the game events of the room
             validated_data['room'] = self.room_name
-            await self.channel_layer_sender.send_to_consumer('room-manager', validated_data)
+            try:
+                await self.channel_layer_sender.send_to_consumer(self.room_manager_channel, validated_data)
+            except ChannelFull:
+                # The room manager is overloaded, shed the message rather than wait
+                flow_control.counters['shed_room_manager_full'] += 1
+                await self.send(text_data=json.dumps({'errors': 'Server busy, try again'}))
         else:
             logging.error(f'Received unexpected event type {event_type} data {validated_data}')
     
@@ -94,18 +161,185 @@ class Control(enum.Enum):
 
 class RoomManagerConsumer(AsyncConsumer):
     """Room manager manages currently ongoing games, redirect incoming messages to current games by room name.
-    The indiividual game instance will broadcast update messages."""
+    The indiividual game instance will broadcast update messages.
+    Each room manager is one shard and only holds the rooms placed on it by game.sharding.
+    Events of a room are handled by the actor of the room, so rooms progress independently."""
+    # Priority class of the events handled by the actor of their room
+    ROOM_EVENTS = {
+        'game.move': PRIORITY_GAME,
+        'game.control': PRIORITY_GAME,
+        'default.move': PRIORITY_GAME,
+        'join.game': PRIORITY_MEMBERSHIP,
+        'disconnect.from.game': PRIORITY_MEMBERSHIP,
+        'chat': PRIORITY_CHAT,
+    }
+
+    # Events sent by clients, subject to the rate limit of their room and load shedding
+    CLIENT_EVENTS = frozenset(('game.move', 'game.control', 'chat'))
+
     def __init__(self, *args, **kwargs):
         super(RoomManagerConsumer,self).__init__(*args, **kwargs)
         self.games = dict()     # Current ongoing games by room id
-        self.move_timeout = dict()
+        self.move_timeout = dict()     # Move timer handle by room id
+        self.move_timer_wheel = TimerWheel(tick=settings.COUP_TIMER_TICK_SEC)
         self.channel_layer_sender= ChannelLayerMessageSender(get_channel_layer())
         self.coup_frontend = CoupGameFrontend()
-        self.db_interface = RoomManagerToDBInterface()
+        self.frontend_states = dict()   # Last frontend state sent by room id
+        self.frame_cache = FrameCache(self.coup_frontend)
+        self.player_channels = dict()   # (channel name, frame format) by player name by room id
+        # Lobby entries of the rooms of this shard
+        self.shard_channel = shard_channel = self.scope.get('channel', get_room_manager_channels()[0])
+        self.room_registry = RoomRegistry(shard_channel, publish_interval=settings.COUP_REGISTRY_PUBLISH_INTERVAL_SEC)
+        # Room table writes are queued and flushed in the background
+        self.room_store = WriteBehindRoomStore(flush_interval=settings.COUP_DB_FLUSH_INTERVAL_SEC,
+                                               batch_size=settings.COUP_DB_FLUSH_BATCH_SIZE,
+                                               on_created=self.room_registry.set_ids)
+        self.event_log_dir = settings.COUP_EVENT_LOG_DIR
+        # Games are checkpointed periodically and restored on restart
+        self.checkpoints = None
+        if settings.COUP_CHECKPOINT_DIR:
+            self.checkpoints = CheckpointStore(os.path.join(settings.COUP_CHECKPOINT_DIR, f'{shard_channel}.sqlite3'))
+        self.checkpoint_interval = settings.COUP_CHECKPOINT_INTERVAL_SEC
+        self.warm_started = False
+        # The consumer only dispatches room events, room actors handle them
+        self.room_actors = RoomActors(super().dispatch, inbox_size=settings.COUP_ROOM_INBOX_SIZE,
+                                      chat_inbox_size=settings.COUP_ROOM_CHAT_INBOX_SIZE,
+                                      chat_throttle=settings.COUP_CHAT_THROTTLE_PENDING)
+        self.room_rate_limits = dict()  # Token bucket by room id
+        self.shed_pending = settings.COUP_SHED_PENDING
+        self.stale_players = dict()     # Players whose frames were dropped by room id, sent a full update next
+        # Plays for players who run out of time
+        self.default_move_bot = ISMCTSBot(budget_ms=settings.COUP_BOT_BUDGET_MS)
+        self.default_move_executor = ThreadPoolExecutor(max_workers=settings.COUP_BOT_THREADS, thread_name_prefix='default-move')
+        if settings.COUP_LATENCY_HISTOGRAMS:
+            latency.enable()
         logging.info('Room manager initialized')
+
+    async def dispatch(self, message):
+        # Restore games before handling the first message after a (re)start
+        if not self.warm_started:
+            self.warm_started = True
+            await self.warm_start()
+        room = message.get('room')
+        priority = self.ROOM_EVENTS.get(message.get('type'))
+        if priority is not None and room is not None:
+            if message.get('type') in self.CLIENT_EVENTS:
+                refusal = self._admit(room, message.get('type'))
+                if refusal is not None:
+                    if priority == PRIORITY_GAME:
+                        await self._send_error(room, message.get('player'), refusal)
+                    return
+            if not self.room_actors.post(room, message, priority):
+                log = logging.warning if priority == PRIORITY_CHAT else logging.error
+                log(f"Inbox of room {room} is full, dropped {message.get('type')}")
+            return
+        await super().dispatch(message)
+
+    def _admit(self, room, event_type):
+        """Reason not to handle a client event of the room, None to handle it.
+        Events are shed while the shard has more than shed_pending game events and joins
+        waiting. Moves and controls are under the rate limit of the room; chat is not, it
+        is limited per client and by its own inbox, so chat can not use up the moves."""
+        pending = self.room_actors.num_pending
+        if self.shed_pending is not None and pending[PRIORITY_GAME] + pending[PRIORITY_MEMBERSHIP] > self.shed_pending:
+            flow_control.counters['shed_events'] += 1
+            return 'Server busy, try again'
+        if settings.COUP_ROOM_MESSAGES_PER_SEC and event_type != 'chat':
+            bucket = self.room_rate_limits.get(room)
+            if bucket is None:
+                bucket = self.room_rate_limits[room] = TokenBucket(settings.COUP_ROOM_MESSAGES_PER_SEC,
+                                                                   settings.COUP_ROOM_MESSAGE_BURST)
+            if not bucket.take():
+                flow_control.counters['room_rate_limited'] += 1
+                return 'Too many moves in this room, slow down'
+        return None
+
+    async def _send_error(self, room, player, errors):
+        """Tell a player of the room their event was not handled. Not sent if their channel is full."""
+        channel = self.player_channels.get(room, {}).get(player)
+        if channel is None:
+            return
+        try:
+            await self.channel_layer_sender.send_to_consumer(channel[0], {'type': 'player.error', 'errors': errors})
+        except ChannelFull:
+            flow_control.counters['player_channel_full'] += 1
+
+    async def warm_start(self):
+        """Restore the games of the last checkpoint, re-arm their move timers
+        and start checkpointing. Players get the restored game once they reconnect."""
+        if self.checkpoints is None:
+            return
+        start = time.perf_counter()
+        games = await sync_to_async(self.checkpoints.load_all)(self.default_move_bot)
+        spread = settings.COUP_WARM_START_TIMER_SPREAD_SEC
+        for index, (room, game) in enumerate(games.items()):
+            # Restored games have no event log, it would lack the start of the game
+            self.games[room] = game
+            self.room_store.add_room(room)
+            self.room_store.update_room(room, game.get_num_players(), game.started)
+            self.start_move_timer_if_exist(room, game, extra_delay=spread * index / len(games))
+        # Registered all at once, publishing the rooms of the shard once
+        self.room_registry.update_many((room, game.get_num_players(), game.started) for room, game in games.items())
+        logging.info(f"Restored {len(games)} rooms from checkpoint in {time.perf_counter() - start:.3f}s")
+        asyncio.get_event_loop().create_task(self._checkpoint_periodically())
+
+    async def _checkpoint_periodically(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            await self.checkpoint()
+
+    async def checkpoint(self):
+        """Write the games changed since the last checkpoint.
+        Games are dumped a chunk of rooms at a time, yielding to room events in between."""
+        rows = list()
+        for index, (room, game) in enumerate(list(self.games.items())):
+            if index and index % settings.COUP_CHECKPOINT_CHUNK_ROOMS == 0:
+                await asyncio.sleep(0)
+            row = self.checkpoints.collect_room(room, game)
+            if row is not None:
+                rows.append(row)
+        changes = (rows, self.checkpoints.collect_deleted(self.games))
+        try:
+            await sync_to_async(self.checkpoints.write)(changes)
+        except Exception as ex:
+            logging.error(f"Failed to checkpoint games, will retry: {ex}")
     
+    async def latency_control(self, event):
+        """Turn the latency histograms on or off, reset them, or send them to the reply channel"""
+        action = event.get('action')
+        if action == 'enable':
+            latency.enable()
+        elif action == 'disable':
+            latency.disable()
+        elif action == 'reset':
+            latency.reset()
+        elif action == 'report':
+            await self.channel_layer_sender.send_to_consumer(event.get('reply_channel'), {
+                'type': 'latency.report',
+                'shard': self.shard_channel,
+                'enabled': latency.is_enabled(),
+                'report': latency.report(),
+                'queues': self.room_actors.get_metrics(),
+                'flow_control': flow_control.get_metrics(),
+            })
+        else:
+            logging.error(f"Unknown latency control action {action}")
+
+    async def chat(self, event):
+        """Chat message of a player, broadcast to the room"""
+        await self.channel_layer_sender.broadcast_to_group(event.get('room'), {
+            'type': 'chat',
+            'player': event.get('player'),
+            'message': event.get('message'),
+        })
+
     async def game_move(self, event):
         def target_str_to_obj(target):
+            target_seat = event.get('target_seat')
+            if target_seat is not None:
+                # Binary clients target players by position in seating order
+                seated_players = game.get_players_in_seating_order()
+                return seated_players[target_seat] if target_seat < len(seated_players) else None
             if target:
                 target_player = game.get_player_by_name(event.get('target'))
                 target_card = str_to_inf(event.get('target'))
@@ -133,16 +367,18 @@ class RoomManagerConsumer(AsyncConsumer):
             logging.error(ex)
         except BadGameState as ex:
             logging.error(ex)
+        # The narration of the move goes in the same frame as the views after it
         if target:
-            await self._send_chat_to_players(room, f'{player} used {move} on {target}')
+            narration = [f'{player} used {move} on {target}']
         else:
-            await self._send_chat_to_players(room, f'{player} used {move}')
+            narration = [f'{player} used {move}']
 
         if game.finished:
             winner = game.get_winner()
             logging.info(f"Game finished. Winner: {winner.name}")
-            await self._send_chat_to_players(room, f'Game finished. Winner {winner.name} ')
-        await self._send_frontend_to_players(room, game)
+            narration.append(f'Game finished. Winner {winner.name} ')
+            self._close_event_log_if_finished(game)
+        await self._send_frontend_to_players(room, game, narration=tuple(narration))
         self.start_move_timer_if_exist(room, game)
 
     async def game_control(self, event):
@@ -151,11 +387,16 @@ class RoomManagerConsumer(AsyncConsumer):
         game = self.games[room]
         if event.get('control') == 'start-game':
             game.start()
-            await self.db_interface.update_room(room, game.get_num_players(), game.started)
+            game.event_log = self._open_event_log(room, game)
+            self._room_changed(room, game)
         elif event.get('control') == 'change-seat':
             player = game.get_player_by_name(event.get('player'))
             seat = event.get('value')
             game.player_change_seat(player, seat)
+        elif event.get('control') == 'resync':
+            # Client missed a patch
+            await self._send_frontend_to_players(room, game, full=True)
+            return
         self.start_move_timer_if_exist(room, game)
         await self._send_frontend_to_players(room, game)
     
@@ -164,73 +405,171 @@ class RoomManagerConsumer(AsyncConsumer):
         If no player left in the game, remove the game entirely."""
         room = event.get('room')
         game = self.games[room]
+        self.player_channels.get(room, {}).pop(event.get('player'), None)
+        self.stale_players.get(room, set()).discard(event.get('player'))
         if not game.started:
             game.remove_player(event.get('player'))
             if game.is_empty():
-                await self.db_interface.delete_room(room)
+                self.room_store.delete_room(room)
+                self.room_registry.remove(room)
+                self.clear_move_timer(room)
+                self.frontend_states.pop(room, None)
+                self.frame_cache.discard(room)
+                self.player_channels.pop(room, None)
+                self.room_rate_limits.pop(room, None)
+                self.stale_players.pop(room, None)
+                if game.event_log is not None:
+                    game.event_log.close()
                 del self.games[room]
             else:
-                await self._send_chat_to_players(room, f"{event.get('player')} has left the room")
-                await self._send_frontend_to_players(room, game)
-                await self.db_interface.update_room(room, game.get_num_players(), game.started)
+                await self._send_frontend_to_players(room, game, narration=(f"{event.get('player')} has left the room",))
+                self._room_changed(room, game)
             logging.info(f"Removed player {event.get('player')} from game {room}")
     
     async def join_game(self, event):
         player = event.get('player')
         room = event.get('room')
         if not room in self.games:
-            self.games[room] = CoupGame(room)
+            self.games[room] = CoupGame(room, default_move_policy=self.default_move_bot)
             # It's ok if an entry exist, we will update with latest state using update_room
-            await self.db_interface.add_room(room)
+            self.room_store.add_room(room)
         game = self.games[room]
+        self.player_channels.setdefault(room, dict())[player] = (event.get('channel'), event.get('frame_format', codec.JSON_FORMAT))
         game.add_player(player)
 
-        # Send chat message to clients to inform new player join
-        await self._send_chat_to_players(room, f'{player} has joined the room')
-        await self._send_frontend_to_players(room, game)
-        await self.db_interface.update_room(room, game.get_num_players(), game.started)
+        # Inform players of the new player along with the frontend
+        await self._send_frontend_to_players(room, game, full=True, narration=(f'{player} has joined the room',))
+        self._room_changed(room, game)
 
-    @async_to_sync
-    async def make_default_move_and_update(self, room, game):
+    def _open_event_log(self, room, game):
+        """Event log of the game just started in the room, one file per game.
+        The file is open until the game finishes. None if not logging or the file can not be opened."""
+        if not self.event_log_dir:
+            return None
+        path = os.path.join(self.event_log_dir, f'{room}-{time.time_ns()}.events')
+        try:
+            os.makedirs(self.event_log_dir, exist_ok=True)
+            event_log = GameEventLog(open(path, 'ab'), snapshot_interval=settings.COUP_REPLAY_SNAPSHOT_INTERVAL,
+                                     flush_every=settings.COUP_EVENT_LOG_FLUSH_RECORDS)
+        except OSError as ex:
+            logging.error(f"Unable to open event log {path}, game of room {room} is not logged: {ex}")
+            return None
+        event_log.record_start(game)
+        return event_log
+
+    def _close_event_log_if_finished(self, game):
+        """Close the event log of a finished game, the next start opens another"""
+        if game.finished and game.event_log is not None:
+            game.event_log.close()
+            game.event_log = None
+
+    def _room_changed(self, room, game):
+        """Record the lobby fields of the room in the database and the room registry"""
+        self.room_store.update_room(room, game.get_num_players(), game.started)
+        self.room_registry.update(room, game.get_num_players(), game.started)
+
+    async def default_move(self, event):
+        """Move timer of the room expired"""
+        await self.make_default_move_and_update(event.get('room'), event.get('game'), event.get('version'))
+
+    async def make_default_move_and_update(self, room, game, version=None):
+        """Play the default moves of the game, unless the room moved on
+        since the move timer was started at version"""
+        if self.games.get(room) is not game or (version is not None and game.version != version):
+            return
         logging.info("------ DEFAULT_MOVE")
-        game.make_default_moves()
+        self.move_timeout.pop(room, None)
+        await self._make_default_moves(game)
+        self._close_event_log_if_finished(game)
         await self._send_frontend_to_players(room, game)
-        self.clear_move_timer(room)
         self.start_move_timer_if_exist(room, game)
     
-    def start_move_timer_if_exist(self, room, game):
+    async def _make_default_moves(self, game):
+        """Make the default moves of the game as CoupGame.make_default_moves does, choosing
+        each move on a clone of the game in a worker thread so the search does not hold up
+        the event loop. The game does not change meanwhile, the actor of its room waits."""
+        loop = asyncio.get_event_loop()
+        for player in game.iter_default_movers():
+            sim = game.clone()
+            sim_player = sim.players[game.players.index(player)]
+            move_tuple = await loop.run_in_executor(self.default_move_executor, sim.choose_default_move_for_player, sim_player)
+            if move_tuple:
+                move, target = move_tuple
+                if target in sim.players:
+                    target = game.players[sim.players.index(target)]
+                move_tuple = (move, target)
+            if game.make_chosen_default_move(player, move_tuple):
+                return
+
+    def start_move_timer_if_exist(self, room, game, extra_delay=0):
+        self.clear_move_timer(room)
         dur = game.get_move_timeout()
         if dur:
-            self.move_timeout[room] = Timer(dur, self.make_default_move_and_update, [room, game])
-            self.move_timeout[room].start()
+            # Handled by the actor of the room, after the events already in its inbox
+            self.move_timeout[room] = self.move_timer_wheel.call_later(dur + extra_delay, self.room_actors.post, room, {
+                'type': 'default.move', 'room': room, 'game': game, 'version': game.version})
             logging.info('Timer started')
     
     def clear_move_timer(self, room):
-        if self.move_timeout[room]:
-            self.move_timeout[room].cancel()
-            self.move_timeout[room] = None
+        timer = self.move_timeout.pop(room, None)
+        if timer:
+            self.move_timer_wheel.cancel(timer)
             logging.info("Timer cleared")
 
-    async def _send_chat_to_players(self, room, message):
-        await self.channel_layer_sender.broadcast_to_group(room, {
-            'type': 'chat',
-            'player': 'Game Master',
-            'message': message
-        })
+    async def _send_frontend_to_players(self, room, game, full=False, narration=()):
+        """Send every player the changes to the frontend since the last update,
+        or the full frontend if full is set or the room has no frontend state yet.
+        Each player is sent only their own private state, on their own channel,
+        in one frame along with the narration of what happened, if any.
+        Views and encoded frames are cached by game version.
+        Players whose channel was full on a previous update get the full frontend."""
+        public, private = self.frame_cache.get_views(room, game)
+        state = self.frontend_states.get(room)
+        channels = self.player_channels.get(room, {})
+        version = game.version
 
-    async def _send_frontend_to_players(self, room, game):
-        await self.channel_layer_sender.broadcast_to_group(room, {
-            'type': 'frontend.update',
-            'game_view': self.coup_frontend.game_view(game)
-        })
+        def with_narration(frame):
+            if narration:
+                frame['narration'] = list(narration)
+            return frame
+
+        async def send_update(name, channel, frame_format):
+            frame = self.frame_cache.get_frame(room, game, ('update', name, narration),
+                lambda: with_narration(dict(public, type='frontend.update', version=version, **private.get(name, {}))),
+                frame_format)
+            await self._send_frame(room, name, channel, {'type': 'frontend.update', codec.FRAME_FIELDS[frame_format]: frame})
 
-        individual_update = {'type': 'individual.frontend.update'}
-        for player in game.players:
-            individual_update[player.name] = {
-                'interface': self.coup_frontend.player_interface(game, player),
-                'player_view': self.coup_frontend.player_view(game, player)
-            }
-        await self.channel_layer_sender.broadcast_to_group(room, individual_update)
+        if full or state is None:
+            state = self.frontend_states.setdefault(room, FrontendState())
+            state.snapshot(public, private, version)
+            for name, (channel, frame_format) in channels.items():
+                await send_update(name, channel, frame_format)
+            return
+
+        # Patches are sent even if nothing changed, clients restart the move timer on every update
+        base_version, public_ops, private_ops = state.update(public, private, version)
+        stale = self.stale_players.get(room, ())
+        for name, (channel, frame_format) in channels.items():
+            if name in stale:
+                await send_update(name, channel, frame_format)
+                continue
+            frame = self.frame_cache.get_frame(room, game, ('patch', base_version, name, narration),
+                lambda: with_narration({'type': 'frontend.patch', 'base': base_version, 'version': version,
+                                        'ops': public_ops + private_ops.get(name, [])}), frame_format)
+            await self._send_frame(room, name, channel, {'type': 'frontend.patch', codec.FRAME_FIELDS[frame_format]: frame})
+
+    async def _send_frame(self, room, player, channel, message):
+        """Send a frontend frame to the channel of a player. If the channel is full,
+        e.g. the player is too slow to keep up, the frame is dropped and the
+        player is sent the full frontend on the next update instead."""
+        try:
+            await self.channel_layer_sender.send_to_consumer(channel, message)
+        except ChannelFull:
+            flow_control.counters['player_channel_full'] += 1
+            self.stale_players.setdefault(room, set()).add(player)
+            return
+        if message['type'] == 'frontend.update' and player in self.stale_players.get(room, ()):
+            self.stale_players[room].discard(player)
 
             
 class ChannelLayerMessageSender(object):
@@ -309,3 +648,8 @@ class RoomManagerToDBInterface(object):
             return False
         room_queryset[0].delete()
         return True
+
+# Stages timed when latency histograms are on, along with those of the engine
+latency.register(RoomManagerConsumer, 'game_move', 'room_manager.game_move')
+latency.register(ChannelLayerMessageSender, 'broadcast_to_group', 'channel_layer.group_send')
+latency.register(ChannelLayerMessageSender, 'send_to_consumer', 'channel_layer.send')
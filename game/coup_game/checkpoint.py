@@ -0,0 +1,102 @@
+"""Checkpoints of games as plain values.
+dump_game captures the whole state of a game, players, seats, deck order
+and turn, as lists of ints, strings and bools that encode to compact JSON.
+load_game rebuilds an equivalent game from them, e.g. after a restart.
+Players are referred to by index in the players of the game, moves and
+influences by their codes in game.coup_game.codes.
+
+    data = json.dumps(dump_game(game))
+    game = load_game(json.loads(data))
+"""
+
+from game.coup_game.codes import MOVE_TO_CODE, INFLUENCE_TO_CODE, CODE_TO_MOVE, CODE_TO_INFLUENCE
+from game.coup_game.coup_game import CoupGame
+from game.coup_game.objects import CourtDeck
+from game.coup_game.player import CoupGamePlayer, PlayerStatus
+from game.coup_game.turn.turn import CoupGameTurn
+from game.coup_game.turn.state import TurnState
+
+# Bump when the layout of dumps changes. Dumps of other versions are not loaded.
+CHECKPOINT_FORMAT = 1
+
+_TURN_MOVE_VARIABLES = ('action_played', 'counter_played')
+_STR_TO_TURN_STATE = {state.value: state for state in TurnState}
+
+def _influence_codes(influences):
+    return [INFLUENCE_TO_CODE[influence] for influence in influences]
+
+def _influences(codes):
+    return [CODE_TO_INFLUENCE[code] for code in codes]
+
+def _dump_turn(turn, player_index):
+    values = list()
+    for name in CoupGameTurn._STATE_VARIABLES:
+        value = getattr(turn, name)
+        if name in CoupGameTurn._PLAYER_VARIABLES:
+            value = player_index[value]
+        elif name in _TURN_MOVE_VARIABLES:
+            value = MOVE_TO_CODE[value] if value is not None else 0
+        elif name == 'state':
+            value = value.value
+        values.append(value)
+    passed_players = turn.passed_players
+    values.append([player_index[player] for player in passed_players] if passed_players is not None else None)
+    return values
+
+def _load_turn(values, players, deck):
+    turn = CoupGameTurn.__new__(CoupGameTurn)
+    turn.players = players
+    turn.court_deck = deck
+    for name, value in zip(CoupGameTurn._STATE_VARIABLES, values):
+        if name in CoupGameTurn._PLAYER_VARIABLES:
+            value = players[value] if value is not None else None
+        elif name in _TURN_MOVE_VARIABLES:
+            value = CODE_TO_MOVE[value]
+        elif name == 'state':
+            value = _STR_TO_TURN_STATE[value]
+        setattr(turn, name, value)
+    passed_players = values[-1]
+    turn.passed_players = [players[index] for index in passed_players] if passed_players is not None else None
+    return turn
+
+def dump_game(game):
+    """State of the game as a list of plain values"""
+    player_index = {player: index for index, player in enumerate(game.players)}
+    player_index[None] = None
+    players = [[player.name, game.get_player_current_seat(player), player.coins, player.is_in_game(),
+                _influence_codes(player.owned_influence), _influence_codes(player.lost_influence)]
+               for player in game.players]
+    deck = [game.deck.seed, _influence_codes(game.deck.snapshot())] if game.deck is not None else None
+    turn = _dump_turn(game.turn, player_index) if game.turn is not None else None
+    return [CHECKPOINT_FORMAT, game.name, game.version, game.seed, game.started, game.finished,
+            game._turn_player_index, game._num_players_in_game, players, deck, turn]
+
+def load_game(data, default_move_policy=None):
+    """Game of a dump_game state. Raises ValueError for dumps of another format."""
+    if data[0] != CHECKPOINT_FORMAT:
+        raise ValueError(f"Unsupported checkpoint format {data[0]}")
+    (_, name, version, seed, started, finished, turn_player_index, num_players_in_game,
+        players, deck, turn) = data
+    game = CoupGame(name, default_move_policy=default_move_policy)
+    for player_name, seat, coins, in_game, owned_influence, lost_influence in players:
+        player = CoupGamePlayer(player_name)
+        player.coins = coins
+        player.status = PlayerStatus.IN_GAME if in_game else PlayerStatus.DEAD
+        player.owned_influence = _influences(owned_influence)
+        player.lost_influence = tuple(_influences(lost_influence))
+        game.players.append(player)
+        if seat is not None:
+            game.player_seats[seat] = player
+    if deck is not None:
+        deck_seed, cards = deck
+        game.deck = CourtDeck(deck_seed)
+        game.deck.restore(_influences(cards))
+    if turn is not None:
+        game.turn = _load_turn(turn, game.players, game.deck)
+    game.version = version
+    game.seed = seed
+    game.started = started
+    game.finished = finished
+    game._turn_player_index = turn_player_index
+    game._num_players_in_game = num_players_in_game
+    return game
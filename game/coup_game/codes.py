@@ -0,0 +1,47 @@
+"""Small integer codes of moves and influences.
+Used by compact encodings of moves, e.g. the binary websocket protocol.
+Codes are part of the wire format. Append new members, never renumber.
+Code 0 is reserved for none.
+"""
+
+from game.coup_game.move import Actions, Counteractions, GenericMove
+from game.coup_game.objects import Influence
+
+NO_CODE = 0
+
+CODE_TO_MOVE = (
+    None,
+    Actions.INCOME,
+    Actions.FOREIGN_AID,
+    Actions.COUP,
+    Actions.TAX,
+    Actions.ASSASSINATE,
+    Actions.STEAL,
+    Actions.EXCHANGE,
+    Counteractions.BLOCK_FOREIGN_AID,
+    Counteractions.BLOCK_ASSASSINATION,
+    Counteractions.BLOCK_STEAL,
+    GenericMove.PASS,
+    GenericMove.CHALLENGE,
+    GenericMove.LOSE_INFLUENCE,
+    GenericMove.DISCARD_INFLUENCE,
+)
+MOVE_TO_CODE = {move: code for code, move in enumerate(CODE_TO_MOVE) if move is not None}
+
+CODE_TO_INFLUENCE = (
+    None,
+    Influence.DUKE,
+    Influence.CAPTAIN,
+    Influence.CONTESSA,
+    Influence.ASSASSIN,
+    Influence.AMBASSADOR,
+)
+INFLUENCE_TO_CODE = {influence: code for code, influence in enumerate(CODE_TO_INFLUENCE) if influence is not None}
+
+def code_to_move(code):
+    """Move of the code, or None for unknown codes"""
+    return CODE_TO_MOVE[code] if 0 < code < len(CODE_TO_MOVE) else None
+
+def code_to_influence(code):
+    """Influence of the code, or None for unknown codes"""
+    return CODE_TO_INFLUENCE[code] if 0 < code < len(CODE_TO_INFLUENCE) else None
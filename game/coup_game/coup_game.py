@@ -11,6 +11,8 @@ import game.coup_game.turn.move_handler as move_handler
 import game.coup_game.turn.move_factory as move_factory
 from game.coup_game.exceptions import BadGameState, NotEnoughPlayer, SeatOccupied, GameIsFull, BadPlayerMove
 
+logger = logging.getLogger(__name__)
+
 """
 Call flow goes like this:
 game = CoupGame(room_name)
@@ -38,7 +40,7 @@ class CoupGameFrontend(object):
         # Get game state and send updates
         game_view = list()
         if not game.started:
-            for seat, player in game.player_seats.items():
+            for seat, player in enumerate(game.player_seats):
                 seated_player_name = None
                 if player:
                     seated_player_name = player.name
@@ -101,17 +103,32 @@ class CoupGameFrontend(object):
     
 class CoupGame(object):
     MAX_NUM_PLAYERS = 6
+    # A room manager keeps every room in memory. Slots keep the per room footprint small.
+    __slots__ = ('name', 'rng', 'default_move_policy', 'players', 'player_seats', 'deck', 'started', 'finished', 'turn',
+                 'version', 'seed', 'event_log', '_turn_player_index', '_num_players_in_game', '_undo_stack')
 
-    def __init__(self, name):
+    def __init__(self, name, rng=None, default_move_policy=None):
         self.name = name
+        self.rng = rng
+        # Callable (game, player, rng) returning the (move, target) tuple to play for
+        # a player who timed out. Falls back to move_factory defaults when None.
+        self.default_move_policy = default_move_policy
         self.players = list()
-        self.player_seats = {seat:None for seat in range(0, self.MAX_NUM_PLAYERS)}
-        self.name_to_player = dict()
+        self.player_seats = [None] * self.MAX_NUM_PLAYERS    # Player by seat number
+        self._undo_stack = None     # Only kept when undo tracking is on
+        # Bumped by every method changing what players see, so views of the game
+        # can be cached by version. Never goes back, not even on restore.
+        self.version = 0
+        self.seed = None            # Seed of the deck, chosen at start
+        self.event_log = None       # GameEventLog recording the game, if any
         self.reset()
     
     def reset(self):
         self.deck = None
         self._turn_player_index = None
+        self._num_players_in_game = 0
+        if self._undo_stack is not None:
+            self._undo_stack.clear()
 
         # State
         self.started = False
@@ -126,9 +143,7 @@ class CoupGame(object):
         return self.players[self._turn_player_index]
     
     def get_players_in_seating_order(self):
-        return [self.player_seats[seat] \
-            for seat in range(self.MAX_NUM_PLAYERS) \
-                if self.player_seats[seat]]
+        return [player for player in self.player_seats if player]
     
     def is_full(self):
         return self.get_num_players() == self.MAX_NUM_PLAYERS
@@ -137,12 +152,14 @@ class CoupGame(object):
         return self.get_num_players() == 0
     
     def get_winner(self):
-        players_in_game = [player for player in self.players if player.is_in_game()]
-        if not len(players_in_game) == 1:
+        # Number of players in game is maintained by player_make_move,
+        # so we only scan for the winner once there is one.
+        if self._num_players_in_game != 1:
             return None
-        elif len(players_in_game) == 0:
-            assert False
-        return players_in_game[0]
+        for player in self.players:
+            if player.is_in_game():
+                return player
+        assert False, "Expected one player in game"
     
     def next_turn(self):
         """Reset game state and update turn player to the next player in order"""
@@ -160,8 +177,9 @@ class CoupGame(object):
             self.started = False
             self.finished = True
 
-        logging.info([n.name for n in self.players])
-        logging.info(f'Turn {self._turn_player_index} : {self.turn_player.name}')
+        if logger.isEnabledFor(logging.INFO):
+            logger.info([n.name for n in self.players])
+        logger.info('Turn %s : %s', self._turn_player_index, self.turn_player.name)
     
     def get_num_players(self):
         return len(self.players)
@@ -173,18 +191,21 @@ class CoupGame(object):
         return [pl.name for pl in self.players]
     
     def get_player_by_name(self, name):
-        if name not in self.name_to_player:
-            return None
-        return self.name_to_player[name]
+        # At most MAX_NUM_PLAYERS players. A scan is as fast as a dict lookup
+        # and saves keeping a dict per room.
+        for player in self.players:
+            if player.name == name:
+                return player
+        return None
     
     def get_player_current_seat(self, player):
-        for seat, seated_player in self.player_seats.items():
+        for seat, seated_player in enumerate(self.player_seats):
             if player == seated_player:
                 return seat
         return None
     
     def add_player(self, player_name, seat=None):
-        if player_name in self.name_to_player:
+        if self.get_player_by_name(player_name):
             return None
         
         if self.is_full():
@@ -192,34 +213,37 @@ class CoupGame(object):
 
         new_player = CoupGamePlayer(player_name)
         self.players.append(new_player)
-        self.name_to_player[player_name] = new_player
+        self.version += 1
         if seat:
             self.player_seats[seat] = new_player
         else:
             # Find the next available seat to place the new player
-            for seat, player in self.player_seats.items():
+            for seat, player in enumerate(self.player_seats):
                 if not player:
                     self.player_seats[seat] = new_player
-                    return new_player
+                    break
+        if self.started and self.event_log is not None:
+            self.event_log.record_join(self, new_player)
+        return new_player
     
     def remove_player(self, player_name):
         # Remove the player from datastructures
-        if player_name not in self.name_to_player:
+        player = self.get_player_by_name(player_name)
+        if not player:
             return None
 
-        player = self.name_to_player[player_name]
-
+        if self.started and self.event_log is not None:
+            self.event_log.record_leave(self, player)
         # Remove the player from seat structure
-        for seat, seated_player in self.player_seats.items():
-            if seated_player == player:
-                self.player_seats[seat] = None
-                break
-
-        # Remove from name player lookup
-        del self.name_to_player[player_name]
+        seat = self.get_player_current_seat(player)
+        if seat is not None:
+            self.player_seats[seat] = None
 
         # Remove from player instance list
         self.players.remove(player)
+        self.version += 1
+        if self.started and player.is_in_game():
+            self._num_players_in_game -= 1
     
     def player_change_seat(self, player, new_seat):
         assert new_seat <= self.get_num_seats(), f"Seat {new_seat} out of bound"
@@ -230,45 +254,140 @@ class CoupGame(object):
         assert curr_seat is not None, "Error: Expected player to be in a game seat."
         self.player_seats[curr_seat] = None
         self.player_seats[new_seat] = player
+        self.version += 1
     
-    def start(self):
+    def start(self, seed=None):
+        """Deal and start the game. The deck is shuffled from seed, drawn from
+        the random generator of the game when not given."""
+        self.version += 1
         self.reset()
-        self.deck = CourtDeck()
+        self.seed = seed if seed is not None else (self.rng or random).getrandbits(64)
+        self.deck = CourtDeck(self.seed)
         self.deck.shuffle()
         for player in self.players:
             player.draw_influence_from_deck(self.deck)
             player.draw_influence_from_deck(self.deck)
 
         self._turn_player_index = 0
+        self._num_players_in_game = len(self.players)
         self.turn = CoupGameTurn(self.turn_player, self.players, self.deck)
 
         if self.get_num_players() < 2:
             raise NotEnoughPlayer(f"Unable to start game with {self.get_num_players()} players")
         self.started = True
+        if self.event_log is not None:
+            self.event_log.record_start(self)
+
+    def snapshot(self):
+        """Capture the mutable state of the game in a compact tuple of immutable
+        values, so it can later be put back with restore. Players, seats and the
+        deck and turn objects are kept; only their state is copied. Meant for
+        lookahead search, e.g. snapshot, play some moves, restore.
+        The random generator state is not captured."""
+        return (
+            self.started,
+            self.finished,
+            self._turn_player_index,
+            self._num_players_in_game,
+            self.deck.snapshot() if self.deck else None,
+            tuple(player.snapshot() for player in self.players),
+            self.turn.snapshot() if self.turn else None,
+        )
+
+    def restore(self, snapshot):
+        """Put the game back to the state captured by snapshot.
+        The game must have the same players as when the snapshot was taken."""
+        (self.started, self.finished, self._turn_player_index, self._num_players_in_game,
+            deck_snapshot, player_snapshots, turn_snapshot) = snapshot
+        self.version += 1
+        assert len(player_snapshots) == len(self.players), "Snapshot taken with different players"
+        for player, player_snapshot in zip(self.players, player_snapshots):
+            player.restore(player_snapshot)
+        if deck_snapshot is None:
+            self.deck = None
+            self.turn = None
+            return
+        if self.deck is None:
+            self.deck = CourtDeck(self.seed)
+            self.turn = CoupGameTurn(self.turn_player, self.players, self.deck)
+        self.deck.restore(deck_snapshot)
+        self.turn.restore(turn_snapshot)
+
+    def clone(self):
+        """Independent copy of the game, with its own players, deck and turn.
+        Cheaper than copy.deepcopy since immutable values are shared.
+        The clone shares the random generator of this game and records no events."""
+        game = CoupGame.__new__(CoupGame)
+        game.name = self.name
+        game.rng = self.rng
+        game.default_move_policy = self.default_move_policy
+        game.players = [player.clone() for player in self.players]
+        player_map = dict(zip(self.players, game.players))
+        player_map[None] = None
+        game.player_seats = [player_map[player] for player in self.player_seats]
+        game.deck = self.deck.clone() if self.deck else None
+        game.turn = self.turn.clone(game.players, game.deck, player_map) if self.turn else None
+        game.started = self.started
+        game.finished = self.finished
+        game._turn_player_index = self._turn_player_index
+        game._num_players_in_game = self._num_players_in_game
+        game.version = self.version
+        game.seed = self.seed
+        game.event_log = None
+        game._undo_stack = None
+        return game
+
+    def set_undo_tracking(self, enabled):
+        """When enabled, every move made with player_make_move pushes an undo
+        record, the snapshot of the game before the move, so it can be reverted
+        with undo_last_move. Off by default so live games don't grow a stack."""
+        self._undo_stack = list() if enabled else None
+
+    def undo_last_move(self):
+        """Revert the last move made with player_make_move, including any
+        turn change it caused. The random generator is not rewound, so
+        replaying a move that shuffles the deck may shuffle differently."""
+        if not self._undo_stack:
+            raise BadGameState(f"Game {self.name} has no move to undo")
+        self.restore(self._undo_stack.pop())
 
     def get_loser_from_challenge(self, player, challenger, challenged_move):
         for influence in player.owned_influence:
             if challenged_move in Influence.doable_action_and_counter(influence):
-                logging.info(f"player {player.name}, owned influence {player.owned_influence}, challenged move {challenged_move} won")
+                logger.info(f"player {player.name}, owned influence {player.owned_influence}, challenged move {challenged_move} won")
                 return challenger
-        logging.info(f"player {player.name}, owned influence {player.owned_influence}, challenged move {challenged_move} lost")
+        logger.info(f"player {player.name}, owned influence {player.owned_influence}, challenged move {challenged_move} lost")
         return player
     
     def make_default_moves(self):
         """Keep making default moves for players until the turn is reset"""
+        for player in self.iter_default_movers():
+            if self.make_default_move_for_player(player):
+                return
+
+    def iter_default_movers(self):
+        """Players to make default moves for, in order, until the turn is reset.
+        Lazy, each round of players is picked once the previous round moved."""
         MAX_ITER_FOR_INFINITE_LOOP = 3
         for iter in range(MAX_ITER_FOR_INFINITE_LOOP):
             players_to_make_move = [player for player in self.players if self.get_valid_moves_for_player(player)]
-            for player in players_to_make_move:
-                if self.make_default_move_for_player(player):
-                    return
+            yield from players_to_make_move
+
+    def choose_default_move_for_player(self, player):
+        """(move, target) tuple to play for player, or None. Does not change the game."""
+        if self.default_move_policy:
+            return self.default_move_policy(self, player, self.rng)
+        return move_factory.get_default_move_target_tuple_for_player(self.turn, player)
 
     def make_default_move_for_player(self, player):
-        move_tuple = move_factory.get_default_move_target_tuple_for_player(self.turn, player)
+        return self.make_chosen_default_move(player, self.choose_default_move_for_player(player))
+
+    def make_chosen_default_move(self, player, move_tuple):
+        """Make the move_tuple chosen by choose_default_move_for_player. Returns whether the turn is done."""
         if not move_tuple:
             return self.turn.is_done()
         default_move, default_target = move_tuple
-        logging.info(f"Player {player} {player.get_detail_in_str()}")
+        logger.info(f"Player {player} {player.get_detail_in_str()}")
         return self.player_make_move(player, default_move, default_target)
     
     def get_move_timeout(self):
@@ -285,12 +404,38 @@ class CoupGame(object):
             raise BadGameState(f"Game {self.name} has not started yet")
         if isinstance(target, CoupGamePlayer) and not target.is_in_game():
             raise BadPlayerMove(f"Player {target.name} selected as target but not in game")
-        move_handler.apply_move_handler(self.turn, self.deck, player, move, target)
-        logging.info(f"Current turn state: {self.turn.state}")
-        if self.turn.is_done():
+        was_in_game = player.is_in_game()
+        self.version += 1
+        if self._undo_stack is None:
+            try:
+                move_handler.apply_move_handler(self.turn, self.deck, player, move, target)
+            except Exception:
+                # Handlers may have partially updated the game, replay has to do the same
+                if self.event_log is not None:
+                    self.event_log.record_move(self, player, move, target, rejected=True)
+                    self.event_log.record_snapshot_if_due(self)
+                raise
+        else:
+            undo_record = self.snapshot()
+            try:
+                move_handler.apply_move_handler(self.turn, self.deck, player, move, target)
+            except Exception:
+                # Handlers may have partially updated the game before rejecting the move
+                self.restore(undo_record)
+                raise
+            self._undo_stack.append(undo_record)
+        if self.event_log is not None:
+            self.event_log.record_move(self, player, move, target)
+        # Only the player making the move can lose its last influence
+        if was_in_game and not player.is_in_game():
+            self._num_players_in_game -= 1
+        logger.info("Current turn state: %s", self.turn.state)
+        turn_done = self.turn.is_done()
+        if turn_done:
             self.next_turn()
-            return True
-        return False
+        if self.event_log is not None:
+            self.event_log.record_snapshot_if_due(self)
+        return turn_done
     
     def get_valid_moves_for_player(self, player):
         return move_factory.get_move_for_player(self.turn, player)
\ No newline at end of file
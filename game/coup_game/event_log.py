@@ -0,0 +1,315 @@
+"""Append-only binary log of the events of games, and their replay.
+A game with an event log records its start and every move made with
+player_make_move, enough to rebuild it move by move with replay. Records
+are appended to a binary stream, e.g. a file, and a stream may hold
+several games, each beginning with a start record.
+
+Every record is a 2 byte big endian length followed by that many bytes,
+the first being the record kind:
+
+    start   kind, seed (8), start time (8, float seconds since epoch),
+            number of players (1), then per player in join order:
+            seat (1), name length (2), UTF-8 name
+    move    kind, time (4, ms since start), player (1), move code (1),
+            target kind (1), target (1)
+    join    kind, time, seat (1, 255 when not seated), name length (2), name
+    leave   kind, time, player (1)
+    snapshot kind, time, number of moves since start (4), the game dumped
+            by game.coup_game.checkpoint as JSON
+
+A log given a snapshot interval K records a snapshot after every K moves,
+taken once the move is fully applied, including moving on to the next
+turn, so ReplayIndex can seek to any move replaying at most K moves.
+
+Players are referred to by their index in the players of the game, the
+order they joined in, which is also the turn order. Move and influence
+codes are those of game.coup_game.codes. Rejected moves that may have
+changed the game before being rejected are recorded as rejected and
+expected to fail again on replay.
+"""
+
+import bisect
+import json
+import struct
+import time
+from collections import namedtuple
+from game.coup_game.checkpoint import dump_game, load_game
+from game.coup_game.codes import MOVE_TO_CODE, INFLUENCE_TO_CODE, code_to_move, code_to_influence
+from game.coup_game.coup_game import CoupGame
+from game.coup_game.objects import Influence
+from game.coup_game.exceptions import BadGameState, BadPlayerMove, BadTurnState
+
+RECORD_START = 1
+RECORD_MOVE = 2
+RECORD_REJECTED_MOVE = 3
+RECORD_JOIN = 4
+RECORD_LEAVE = 5
+RECORD_SNAPSHOT = 6
+
+TARGET_NONE = 0
+TARGET_PLAYER = 1
+TARGET_INFLUENCE = 2
+
+NO_SEAT = 255
+
+_LENGTH = struct.Struct('!H')
+_START = struct.Struct('!BQdB')
+_START_PLAYER = struct.Struct('!BH')
+_MOVE = struct.Struct('!BIBBBB')
+_JOIN = struct.Struct('!BIBH')
+_LEAVE = struct.Struct('!BIB')
+_SNAPSHOT = struct.Struct('!BII')
+
+StartEvent = namedtuple('StartEvent', 'seed time players')    # players: (name, seat) in join order
+MoveEvent = namedtuple('MoveEvent', 'time player move target_kind target rejected')
+JoinEvent = namedtuple('JoinEvent', 'time name seat')
+LeaveEvent = namedtuple('LeaveEvent', 'time player')
+SnapshotEvent = namedtuple('SnapshotEvent', 'time num_moves data')     # data: dump_game state
+
+class GameEventLog(object):
+    """Records the events of a game to a binary stream, with a snapshot
+    of the game every snapshot_interval moves when given. Buffered streams
+    are flushed every flush_every records when given, so a crash loses at
+    most that many records."""
+    def __init__(self, stream, clock=time.time, snapshot_interval=None, flush_every=None):
+        self.stream = stream
+        self.clock = clock
+        self.snapshot_interval = snapshot_interval
+        self.flush_every = flush_every
+        self._unflushed = 0
+        self.start_time = None
+        self.num_moves = 0
+        self.last_snapshot_moves = 0
+
+    def _append(self, payload):
+        self.stream.write(_LENGTH.pack(len(payload)) + payload)
+        self._unflushed += 1
+        if self.flush_every and self._unflushed >= self.flush_every:
+            self.stream.flush()
+            self._unflushed = 0
+
+    def _elapsed_ms(self):
+        return int((self.clock() - self.start_time) * 1000)
+
+    def record_start(self, game):
+        self.start_time = self.clock()
+        self.num_moves = 0
+        self.last_snapshot_moves = 0
+        parts = [_START.pack(RECORD_START, game.seed, self.start_time, len(game.players))]
+        for player in game.players:
+            name = player.name.encode()
+            seat = game.get_player_current_seat(player)
+            parts.append(_START_PLAYER.pack(NO_SEAT if seat is None else seat, len(name)))
+            parts.append(name)
+        self._append(b''.join(parts))
+
+    def record_move(self, game, player, move, target, rejected=False):
+        if target is None:
+            target_kind, target_code = TARGET_NONE, 0
+        elif isinstance(target, Influence):
+            target_kind, target_code = TARGET_INFLUENCE, INFLUENCE_TO_CODE[target]
+        else:
+            target_kind, target_code = TARGET_PLAYER, game.players.index(target)
+        self._append(_MOVE.pack(RECORD_REJECTED_MOVE if rejected else RECORD_MOVE, self._elapsed_ms(),
+                                game.players.index(player), MOVE_TO_CODE[move], target_kind, target_code))
+        self.num_moves += 1
+
+    def record_snapshot_if_due(self, game):
+        """Record a snapshot every snapshot_interval moves. Called once the
+        move is fully applied, i.e. after the turn it ended moved on."""
+        if (self.snapshot_interval and self.num_moves % self.snapshot_interval == 0
+                and self.num_moves != self.last_snapshot_moves):
+            self.record_snapshot(game)
+
+    def record_snapshot(self, game):
+        self.last_snapshot_moves = self.num_moves
+        data = json.dumps(dump_game(game), separators=(',', ':')).encode()
+        self._append(_SNAPSHOT.pack(RECORD_SNAPSHOT, self._elapsed_ms(), self.num_moves) + data)
+
+    def record_join(self, game, player):
+        name = player.name.encode()
+        seat = game.get_player_current_seat(player)
+        self._append(_JOIN.pack(RECORD_JOIN, self._elapsed_ms(), NO_SEAT if seat is None else seat, len(name)) + name)
+
+    def record_leave(self, game, player):
+        self._append(_LEAVE.pack(RECORD_LEAVE, self._elapsed_ms(), game.players.index(player)))
+
+    def close(self):
+        self.stream.close()
+
+def read_events(data):
+    """Events of the records in data, the bytes of a log. A truncated last
+    record, e.g. from a crash while writing, is ignored."""
+    view = memoryview(data)
+    offset = 0
+    while offset + _LENGTH.size <= len(view):
+        length, = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + length > len(view):
+            return
+        record = view[offset:offset + length]
+        offset += length
+        kind = record[0]
+        if kind == RECORD_MOVE or kind == RECORD_REJECTED_MOVE:
+            _, elapsed_ms, player, move_code, target_kind, target = _MOVE.unpack(record)
+            move = code_to_move(move_code)
+            if move is None:
+                raise ValueError(f"Unknown move code {move_code}")
+            yield MoveEvent(elapsed_ms, player, move, target_kind, target, kind == RECORD_REJECTED_MOVE)
+        elif kind == RECORD_START:
+            _, seed, start_time, num_players = _START.unpack_from(record)
+            players = list()
+            position = _START.size
+            for _ in range(num_players):
+                seat, name_length = _START_PLAYER.unpack_from(record, position)
+                position += _START_PLAYER.size
+                players.append((bytes(record[position:position + name_length]).decode(), None if seat == NO_SEAT else seat))
+                position += name_length
+            yield StartEvent(seed, start_time, tuple(players))
+        elif kind == RECORD_JOIN:
+            _, elapsed_ms, seat, name_length = _JOIN.unpack_from(record)
+            name = bytes(record[_JOIN.size:_JOIN.size + name_length]).decode()
+            yield JoinEvent(elapsed_ms, name, None if seat == NO_SEAT else seat)
+        elif kind == RECORD_LEAVE:
+            _, elapsed_ms, player = _LEAVE.unpack(record)
+            yield LeaveEvent(elapsed_ms, player)
+        elif kind == RECORD_SNAPSHOT:
+            _, elapsed_ms, num_moves = _SNAPSHOT.unpack_from(record)
+            yield SnapshotEvent(elapsed_ms, num_moves, json.loads(bytes(record[_SNAPSHOT.size:])))
+        else:
+            raise ValueError(f"Unknown record kind {kind}")
+
+def split_games(events):
+    """Events grouped by game, each list beginning with its StartEvent"""
+    games = list()
+    for event in events:
+        if isinstance(event, StartEvent):
+            games.append([event])
+        elif games:
+            games[-1].append(event)
+        else:
+            raise ValueError("Log does not begin with a start record")
+    return games
+
+def _target(game, target_kind, target):
+    if target_kind == TARGET_NONE:
+        return None
+    if target_kind == TARGET_PLAYER:
+        return game.players[target]
+    if target_kind == TARGET_INFLUENCE:
+        influence = code_to_influence(target)
+        if influence is None:
+            raise ValueError(f"Unknown influence code {target}")
+        return influence
+    raise ValueError(f"Unknown target kind {target_kind}")
+
+def start_game(start_event, name='replay'):
+    """Game started as recorded by start_event"""
+    game = CoupGame(name)
+    for player_name, _ in start_event.players:
+        game.add_player(player_name)
+    game.player_seats[:] = [None] * game.get_num_seats()
+    for player, (_, seat) in zip(game.players, start_event.players):
+        if seat is not None:
+            game.player_seats[seat] = player
+    game.start(seed=start_event.seed)
+    return game
+
+def apply_event(game, event):
+    """Apply a move, join or leave event to the game. Snapshots are skipped."""
+    if isinstance(event, MoveEvent):
+        player = game.players[event.player]
+        target = _target(game, event.target_kind, event.target)
+        if not event.rejected:
+            game.player_make_move(player, event.move, target)
+            return
+        try:
+            game.player_make_move(player, event.move, target)
+        except Exception:
+            return
+        raise ValueError(f"Rejected move {event.move} of {player.name} succeeded on replay")
+    elif isinstance(event, JoinEvent):
+        game.add_player(event.name)
+        if event.seat is not None and game.player_seats[event.seat] is None:
+            player = game.players[-1]
+            game.player_seats[game.get_player_current_seat(player)] = None
+            game.player_seats[event.seat] = player
+    elif isinstance(event, LeaveEvent):
+        game.remove_player(game.players[event.player].name)
+    elif isinstance(event, SnapshotEvent):
+        return
+    else:
+        raise ValueError(f"Unexpected event {event}")
+
+def replay(events, name='replay', num_moves=None):
+    """Game rebuilt from the events of one game, as grouped by split_games.
+    Stops after num_moves moves when given."""
+    game = start_game(events[0], name)
+    moves = 0
+    for event in events[1:]:
+        if isinstance(event, MoveEvent):
+            if num_moves is not None and moves >= num_moves:
+                break
+            moves += 1
+        apply_event(game, event)
+    return game
+
+class ReplayIndex(object):
+    """Seeks to any move of one game, as grouped by split_games, from the
+    nearest snapshot at or before it. Snapshots are those recorded in the
+    log; build adds one every interval moves to logs recorded without."""
+    def __init__(self, events, name='replay'):
+        self.events = events
+        self.name = name
+        # Position in events of each move event, and of each snapshot with its number of moves
+        self.move_positions = list()
+        self.snapshot_moves = [0]
+        self.snapshot_positions = [0]
+        self.snapshots = [None]     # None for the start of the game
+        for position, event in enumerate(events):
+            if isinstance(event, MoveEvent):
+                self.move_positions.append(position)
+            elif isinstance(event, SnapshotEvent):
+                self.snapshot_moves.append(event.num_moves)
+                self.snapshot_positions.append(position)
+                self.snapshots.append(event.data)
+
+    @classmethod
+    def build(cls, events, interval, name='replay'):
+        """Index of a log without snapshots, snapshotting every interval moves while replaying it once"""
+        index = cls(events, name)
+        game = start_game(events[0], name)
+        num_moves = 0
+        for position, event in enumerate(events[1:], 1):
+            apply_event(game, event)
+            if isinstance(event, MoveEvent):
+                num_moves += 1
+                if num_moves % interval == 0 and num_moves > index.snapshot_moves[-1]:
+                    index.snapshot_moves.append(num_moves)
+                    index.snapshot_positions.append(position)
+                    index.snapshots.append(dump_game(game))
+        return index
+
+    @property
+    def num_moves(self):
+        return len(self.move_positions)
+
+    def seek(self, num_moves):
+        """Game after num_moves moves. Raises IndexError past the last move,
+        ValueError if the log does not replay to it."""
+        if not 0 <= num_moves <= self.num_moves:
+            raise IndexError(f"Move {num_moves} out of range, game has {self.num_moves} moves")
+        nearest = bisect.bisect_right(self.snapshot_moves, num_moves) - 1
+        if self.snapshots[nearest] is None:
+            game = start_game(self.events[0], self.name)
+        else:
+            game = load_game(self.snapshots[nearest])
+            game.name = self.name
+        # Events up to the move, and the joins and leaves right after the move before it
+        end = self.move_positions[num_moves] if num_moves < self.num_moves else len(self.events)
+        for event in self.events[self.snapshot_positions[nearest] + 1:end]:
+            try:
+                apply_event(game, event)
+            except (BadGameState, BadPlayerMove, BadTurnState, NotImplementedError) as ex:
+                raise ValueError(f"Log does not replay to move {num_moves}: {ex!r}") from ex
+        return game
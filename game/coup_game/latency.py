@@ -0,0 +1,154 @@
+"""Latency histograms of the stages of handling a move.
+Each instrumented function, a stage, records its run time into a
+histogram of fixed, logarithmic buckets, from which p50/p95/p99 are read.
+enable() swaps the instrumented functions for timing wrappers and
+disable() puts the originals back, so when off the hot path runs the
+original functions with no check at all.
+
+Stages of the engine are registered here: move generation, the move
+handler of each turn state and the frontend view builders. Other layers
+register theirs with register, e.g. channel layer sends.
+
+    latency.enable()
+    ...
+    print(latency.report())
+"""
+
+import bisect
+import functools
+import inspect
+import time
+from game.coup_game.coup_game import CoupGameFrontend
+from game.coup_game.turn.state import TurnState
+import game.coup_game.turn.move_handler as move_handler
+import game.coup_game.turn.move_factory as move_factory
+
+# Bucket upper bounds in ns, 4 buckets per doubling from 250ns to about a minute.
+# Percentiles are reported as the upper bound of their bucket, within 19%.
+BUCKET_BOUNDS_NS = tuple(int(250 * 2 ** (index / 4)) for index in range(112))
+
+class Histogram(object):
+    __slots__ = ('counts', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile(self, percent):
+        """Upper bound in ns of the bucket holding the percentile, None if empty"""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKET_BOUNDS_NS[index] if index < len(BUCKET_BOUNDS_NS) else self.max_ns
+        return self.max_ns
+
+    def summary(self):
+        """Count and latencies in microseconds"""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000,
+            'p50_us': self.percentile(50) / 1000,
+            'p95_us': self.percentile(95) / 1000,
+            'p99_us': self.percentile(99) / 1000,
+            'max_us': self.max_ns / 1000,
+        }
+
+histograms = dict()     # Histogram by stage name
+
+def record(stage, elapsed_ns):
+    histogram = histograms.get(stage)
+    if histogram is None:
+        histogram = histograms[stage] = Histogram()
+    histogram.record(elapsed_ns)
+
+def report():
+    """Summary of the histogram of every stage recorded so far"""
+    return {stage: histogram.summary() for stage, histogram in sorted(histograms.items())}
+
+def reset():
+    histograms.clear()
+
+# Instrumentation
+_points = list()        # (owner, name, stage). Owner is a module, class or dict.
+_originals = dict()     # Original function by (id(owner), name) while enabled
+
+def _get(owner, name):
+    return owner[name] if isinstance(owner, dict) else getattr(owner, name)
+
+def _set(owner, name, value):
+    if isinstance(owner, dict):
+        owner[name] = value
+    else:
+        setattr(owner, name, value)
+
+def _timed(func, stage):
+    perf_counter_ns = time.perf_counter_ns
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(stage, perf_counter_ns() - start)
+    else:
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, perf_counter_ns() - start)
+    return timed
+
+def register(owner, name, stage):
+    """Time owner.name, or owner[name] for dicts, as stage when enabled"""
+    _points.append((owner, name, stage))
+    if is_enabled():
+        _install(owner, name, stage)
+
+def _install(owner, name, stage):
+    key = (id(owner), name)
+    if key not in _originals:
+        _originals[key] = _get(owner, name)
+        _set(owner, name, _timed(_originals[key], stage))
+
+_enabled = False
+
+def is_enabled():
+    return _enabled
+
+def enable():
+    global _enabled
+    _enabled = True
+    for owner, name, stage in _points:
+        _install(owner, name, stage)
+
+def disable():
+    global _enabled
+    _enabled = False
+    for owner, name, _ in _points:
+        original = _originals.pop((id(owner), name), None)
+        if original is not None:
+            _set(owner, name, original)
+
+register(move_factory, 'get_move_for_player', 'move_factory.get_move_for_player')
+for state in TurnState:
+    register(move_handler._MOVE_HANDLER, state, f'move_handler.{state.value}')
+for view in ('game_view', 'player_view', 'player_interface'):
+    register(CoupGameFrontend, view, f'frontend.{view}')
@@ -0,0 +1,207 @@
+"""Information set Monte Carlo tree search bot.
+Plays for players who ran out of time, in place of the naive defaults of
+move_factory.get_default_move_target_tuple_for_player.
+
+Each iteration determinizes the hidden information from the deciding
+player's point of view (opponent cards and deck order are re-dealt at
+random from the cards it cannot see), then walks a single tree shared by
+all determinizations (SO-ISMCTS). Whenever several players may move, the
+mover is picked at random. Tree edges are (seat, move, target), so each
+player picks its own best moves during selection. Leaves are finished
+with random playouts and the winner is backed up the path.
+
+    bot = ISMCTSBot(budget_ms=100)
+    game = CoupGame(room, default_move_policy=bot)
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+import game.coup_game.turn.move_factory as move_factory
+
+logger = logging.getLogger(__name__)
+engine_logger = logging.getLogger('game.coup_game')
+
+class _QuietEngineLogging(object):
+    """Silence the info logs of the game engine, the game.coup_game loggers,
+    while searching. Search plays thousands of moves, each of which the engine
+    would log. Other loggers are left alone. Nested and concurrent searches
+    share one level change, restored when the last search leaves."""
+    _lock = threading.Lock()
+    _depth = 0
+    _previous_level = None
+
+    def __enter__(self):
+        with self._lock:
+            if _QuietEngineLogging._depth == 0:
+                _QuietEngineLogging._previous_level = engine_logger.level
+                engine_logger.setLevel(max(logging.WARNING, engine_logger.getEffectiveLevel()))
+            _QuietEngineLogging._depth += 1
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            _QuietEngineLogging._depth -= 1
+            if _QuietEngineLogging._depth == 0:
+                engine_logger.setLevel(_QuietEngineLogging._previous_level)
+
+class _Node(object):
+    __slots__ = ('parent', 'seat', 'visits', 'availability', 'wins', 'children')
+
+    def __init__(self, parent=None, seat=None):
+        self.parent = parent
+        self.seat = seat            # Seat of the player who made the move leading here
+        self.visits = 0
+        self.availability = 0       # Times the move was legal when its parent was visited
+        self.wins = 0
+        self.children = dict()      # Edge key to node
+
+    def ucb_score(self, exploration):
+        return self.wins / self.visits + exploration * math.sqrt(math.log(self.availability) / self.visits)
+
+class ISMCTSBot(object):
+    """Move policy running IS-MCTS within a time budget. Can be used as
+    CoupGame default_move_policy, and as a simulator policy."""
+    def __init__(self, budget_ms=100, exploration=0.7, max_iterations=None, max_playout_moves=200, rng=None):
+        self.budget_ms = budget_ms
+        self.exploration = exploration
+        self.max_iterations = max_iterations
+        self.max_playout_moves = max_playout_moves
+        self.rng = rng if rng is not None else random.Random()
+        # Totals over every decision, for monitoring. Searches may run in several threads.
+        self._metrics_lock = threading.Lock()
+        self.decisions = 0
+        self.iterations = 0
+        self.search_time = 0.0
+
+    @property
+    def iterations_per_sec(self):
+        return self.iterations / self.search_time if self.search_time else 0.0
+
+    def __call__(self, game, player, rng=None):
+        return self.choose_move(game, player)
+
+    def choose_move(self, game, player):
+        """Returns the (move, target) tuple to play for player, or None if it has no move."""
+        legal_moves = list(move_factory.iter_move_target_tuples_for_player(game.turn, player))
+        if len(legal_moves) <= 1:
+            return legal_moves[0] if legal_moves else None
+
+        seat = game.players.index(player)
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000
+        with _QuietEngineLogging():
+            root, iterations = self._search(game, seat, deadline)
+        elapsed = time.perf_counter() - start
+        with self._metrics_lock:
+            self.decisions += 1
+            self.iterations += iterations
+            self.search_time += elapsed
+        logger.info("ISMCTS for %s ran %s iterations in %.1fms (%.0f iterations/sec)",
+                     player, iterations, elapsed * 1000, iterations / elapsed if elapsed else 0.0)
+
+        best_key = max(root.children, key=lambda key: root.children[key].visits)
+        return self._key_to_move_target(game, best_key)
+
+    # Search
+    def _search(self, game, seat, deadline):
+        sim = game.clone()
+        initial_state = sim.snapshot()
+        root = _Node()
+        iterations = 0
+        perf_counter = time.perf_counter
+        while True:
+            if self.max_iterations is not None:
+                if iterations >= self.max_iterations:
+                    break
+            elif iterations and perf_counter() >= deadline:
+                break
+            sim.restore(initial_state)
+            self._determinize(sim, seat)
+            node = self._select_and_expand(sim, root, seat)
+            winner_seat = self._playout(sim)
+            while node is not None:
+                node.visits += 1
+                if node.seat is not None and node.seat == winner_seat:
+                    node.wins += 1
+                node = node.parent
+            iterations += 1
+        return root, iterations
+
+    def _determinize(self, sim, seat):
+        """Re-deal every card the deciding player cannot see"""
+        opponents = [player for index, player in enumerate(sim.players) if index != seat]
+        hidden = list(sim.deck.snapshot())
+        for opponent in opponents:
+            hidden.extend(opponent.owned_influence)
+        self.rng.shuffle(hidden)
+        dealt = 0
+        for opponent in opponents:
+            num_cards = len(opponent.owned_influence)
+            opponent.owned_influence[:] = hidden[dealt:dealt + num_cards]
+            dealt += num_cards
+        sim.deck.restore(hidden[dealt:])
+
+    def _select_and_expand(self, sim, root, seat):
+        rng = self.rng
+        node = root
+        while sim.started:
+            if node is root:
+                mover_seat = seat
+            else:
+                movers = [index for index, player in enumerate(sim.players) if sim.get_valid_moves_for_player(player)]
+                if not movers:
+                    return node
+                mover_seat = rng.choice(movers)
+            player = sim.players[mover_seat]
+            legal_moves = list(move_factory.iter_move_target_tuples_for_player(sim.turn, player))
+            keys = [self._move_target_to_key(sim, mover_seat, move, target) for move, target in legal_moves]
+
+            untried = list()
+            for key in keys:
+                child = node.children.get(key)
+                if child is None:
+                    untried.append(key)
+                else:
+                    child.availability += 1
+            if untried:
+                key = rng.choice(untried)
+                child = node.children[key] = _Node(node, mover_seat)
+                child.availability += 1
+                sim.player_make_move(player, *legal_moves[keys.index(key)])
+                return child
+
+            key = max(keys, key=lambda key: node.children[key].ucb_score(self.exploration))
+            sim.player_make_move(player, *legal_moves[keys.index(key)])
+            node = node.children[key]
+        return node
+
+    def _playout(self, sim):
+        """Random playout. Returns the winner seat, or None if the game did not finish."""
+        rng = self.rng
+        for _ in range(self.max_playout_moves):
+            if not sim.started:
+                break
+            movers = [player for player in sim.players if sim.get_valid_moves_for_player(player)]
+            if not movers:
+                break
+            player = movers[0] if len(movers) == 1 else rng.choice(movers)
+            move_targets = list(move_factory.iter_move_target_tuples_for_player(sim.turn, player))
+            sim.player_make_move(player, *rng.choice(move_targets))
+        winner = sim.get_winner() if sim.finished else None
+        return sim.players.index(winner) if winner else None
+
+    # Edge keys are independent of player objects so they hold across determinizations
+    @staticmethod
+    def _move_target_to_key(game, seat, move, target):
+        if target in game.players:
+            return (seat, move, 'seat', game.players.index(target))
+        return (seat, move, 'influence', target)
+
+    @staticmethod
+    def _key_to_move_target(game, key):
+        seat, move, target_kind, target = key
+        if target_kind == 'seat':
+            return (move, game.players[target])
+        return (move, target)
@@ -116,12 +116,8 @@ class GameMoveFactory(object):
         return doable_actions
 
 VALID_MOVES = (Actions, Counteractions, GenericMove)
+_STR_TO_MOVE = {move.value: move for moves in VALID_MOVES for move in moves}
 
 def str_to_move(move_str):
     """Convert move string to move object"""
-    for move in VALID_MOVES:
-        try:
-            return move(move_str)
-        except ValueError:
-            pass
-    return None 
\ No newline at end of file
+    return _STR_TO_MOVE.get(move_str)
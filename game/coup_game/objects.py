@@ -1,5 +1,5 @@
 import enum
-from random import shuffle
+import random
 from game.coup_game.move import Actions, Counteractions
 
 class Influence(enum.Enum):
@@ -24,8 +24,14 @@ class Influence(enum.Enum):
         raise ValueError(f"Unexpected influence {influence}")
 
 class CourtDeck(object):
-    """Entity class to maintain the current deck state in the game"""
-    def __init__(self):
+    """Entity class to maintain the current deck state in the game.
+    Shuffles are determined by the seed, so a deck given the same seed
+    shuffles the same. Each shuffle derives the seed of the next one; the
+    deck keeps an int rather than a random.Random, which is 2.5KB per room."""
+    __slots__ = ('_deck', '_seed')
+
+    def __init__(self, seed=None):
+        self._seed = seed if seed is not None else random.getrandbits(64)
         # Initialize all character cards. 3 cards per character.
         self._deck = list()
         self._deck.extend([Influence.DUKE]*3)
@@ -37,8 +43,15 @@ class CourtDeck(object):
     def __str__(self):
         return str([card.value for card in self._deck])
 
+    @property
+    def seed(self):
+        """Seed of the next shuffle"""
+        return self._seed
+
     def shuffle(self):
-        shuffle(self._deck)
+        rng = random.Random(self._seed)
+        rng.shuffle(self._deck)
+        self._seed = rng.getrandbits(64)
 
     def draw(self):
         '''Pop and return one card from the top of the _deck.
@@ -47,14 +60,25 @@ class CourtDeck(object):
             return self._deck.pop()
         return None
     
+    def snapshot(self):
+        return tuple(self._deck)
+
+    def restore(self, snapshot):
+        self._deck[:] = snapshot
+
+    def clone(self):
+        deck = CourtDeck.__new__(CourtDeck)
+        deck._deck = list(self._deck)
+        deck._seed = self._seed
+        return deck
+
     def put_back_and_reshuffle(self, card):
         assert isinstance(card, Influence), f'Bad value for card {card}'
         self._deck.append(card)
         self.shuffle()
 
+_STR_TO_INFLUENCE = {influence.value: influence for influence in Influence}
+
 def str_to_inf(inf_str):
     """Convert influence string to Influence enum"""
-    try:
-        return Influence(inf_str)
-    except ValueError:
-        return None
\ No newline at end of file
+    return _STR_TO_INFLUENCE.get(inf_str)
\ No newline at end of file
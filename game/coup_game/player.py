@@ -5,6 +5,8 @@ class PlayerStatus(enum.Enum):
 
 class CoupGamePlayer(object):
     """Entity to maintain player state in the game"""
+    __slots__ = ('name', 'coins', 'status', 'owned_influence', 'lost_influence')
+
     def __init__(self, name):
         self.name = name
         self.reset()
@@ -13,7 +15,7 @@ class CoupGamePlayer(object):
         self.coins = 0
         self.status = PlayerStatus.IN_GAME
         self.owned_influence = list()  # Cards faced down
-        self.lost_influence = list()   # Cards revealed
+        self.lost_influence = tuple()  # Cards revealed. Changes at most twice a game, so kept immutable
     
     def draw_influence_from_deck(self, deck):
         self.owned_influence.append(deck.draw())
@@ -32,13 +34,29 @@ class CoupGamePlayer(object):
     def lose_influence(self, influence):
         assert influence in self.owned_influence, f"Player does not own {influence}"
         self.owned_influence.remove(influence)
-        self.lost_influence.append(influence)
+        self.lost_influence += (influence,)
         if not self.owned_influence:
             self.status = PlayerStatus.DEAD
 
     def is_in_game(self):
         return self.status is PlayerStatus.IN_GAME
     
+    def snapshot(self):
+        return (self.coins, self.status, tuple(self.owned_influence), self.lost_influence)
+
+    def restore(self, snapshot):
+        self.coins, self.status, owned_influence, self.lost_influence = snapshot
+        self.owned_influence[:] = owned_influence
+
+    def clone(self):
+        player = CoupGamePlayer.__new__(CoupGamePlayer)
+        player.name = self.name
+        player.coins = self.coins
+        player.status = self.status
+        player.owned_influence = list(self.owned_influence)
+        player.lost_influence = self.lost_influence
+        return player
+
     def get_detail_in_str(self):
         return f"{self.name} coins={self.coins} status={self.status} owned_influence={self.owned_influence} lost_influence={self.lost_influence}"
 
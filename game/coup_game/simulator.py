@@ -0,0 +1,246 @@
+"""Headless self-play simulator for CoupGame.
+Drives complete games through the engine without Django or the channel
+layer, so the engine can be benchmarked and bots can be evaluated.
+
+A policy is a callable taking (game, player, rng) and returning a
+(move, target) tuple, or None if the player has nothing to play.
+
+Python API:
+    stats = simulate(num_games=10000, num_players=4, policies=['random'], seed=1)
+    print(stats.as_dict())
+
+Command line:
+    python -m game.coup_game.simulator --games 10000 --players 4 --policy random
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+from collections import Counter, namedtuple
+from game.coup_game.coup_game import CoupGame
+from game.coup_game.move import Actions, GenericMove
+from game.coup_game.exceptions import BadGameState, BadPlayerMove, BadTurnState
+from game.coup_game.mcts import ISMCTSBot
+import game.coup_game.turn.move_factory as move_factory
+
+MAX_MOVES_PER_GAME = 1000
+
+# Policies
+def default_policy(game, player, rng):
+    """Same move the game makes for a player who timed out."""
+    return move_factory.get_default_move_target_tuple_for_player(game.turn, player)
+
+def random_policy(game, player, rng):
+    """Uniformly random legal move and target."""
+    valid_moves = game.get_valid_moves_for_player(player)
+    if not valid_moves:
+        return None
+    move = rng.choice(valid_moves)
+    target = None
+    if isinstance(move, Actions) and Actions.is_targetable(move):
+        target = rng.choice([pl for pl in game.players if pl is not player and pl.is_in_game()])
+    elif move in (GenericMove.LOSE_INFLUENCE, GenericMove.DISCARD_INFLUENCE):
+        target = rng.choice(player.owned_influence)
+    return (move, target)
+
+POLICIES = {
+    'default': default_policy,
+    'random': random_policy,
+    'mcts': ISMCTSBot(budget_ms=20),
+}
+
+def get_policy(policy):
+    """Resolve a policy name to its callable. Callables are returned as is."""
+    if callable(policy):
+        return policy
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy}. Choose from {sorted(POLICIES)}")
+    return POLICIES[policy]
+
+def register_policy(name, policy):
+    POLICIES[name] = policy
+
+def get_policy_name(policy):
+    if isinstance(policy, str):
+        return policy
+    return getattr(policy, '__name__', type(policy).__name__)
+
+# Simulation
+GameResult = namedtuple('GameResult', 'winner_seat num_moves num_turns finished')
+
+class SimulationStats(object):
+    """Aggregate statistics over a number of simulated games"""
+    def __init__(self):
+        self.games = 0
+        self.finished = 0
+        self.stalled = 0
+        self.moves = 0
+        self.turns = 0
+        self.wins_by_seat = Counter()
+        self.wins_by_policy = Counter()
+        self.seats_by_policy = Counter()    # Number of (game, seat) pairs played by a policy
+        self.elapsed = 0.0          # Wall time of the whole simulation
+        self.move_time = 0.0        # Time spent inside player_make_move
+        self.max_move_latency = 0.0
+
+    def add_result(self, result, seat_policy_names):
+        self.games += 1
+        self.moves += result.num_moves
+        self.turns += result.num_turns
+        self.seats_by_policy.update(seat_policy_names)
+        if result.finished:
+            self.finished += 1
+            self.wins_by_seat[result.winner_seat] += 1
+            self.wins_by_policy[seat_policy_names[result.winner_seat]] += 1
+        else:
+            self.stalled += 1
+
+    def merge(self, other):
+        """Fold the stats of another simulation into this one.
+        Elapsed time is summed, so rates of merged stats are per core."""
+        self.games += other.games
+        self.finished += other.finished
+        self.stalled += other.stalled
+        self.moves += other.moves
+        self.turns += other.turns
+        self.wins_by_seat.update(other.wins_by_seat)
+        self.wins_by_policy.update(other.wins_by_policy)
+        self.seats_by_policy.update(other.seats_by_policy)
+        self.elapsed += other.elapsed
+        self.move_time += other.move_time
+        self.max_move_latency = max(self.max_move_latency, other.max_move_latency)
+        return self
+
+    @property
+    def games_per_sec(self):
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def moves_per_sec(self):
+        return self.moves / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mean_move_latency(self):
+        return self.move_time / self.moves if self.moves else 0.0
+
+    @property
+    def mean_turns_per_game(self):
+        return self.turns / self.games if self.games else 0.0
+
+    @property
+    def mean_moves_per_game(self):
+        return self.moves / self.games if self.games else 0.0
+
+    def win_rate_by_seat(self):
+        return {seat: self.wins_by_seat[seat] / self.games for seat in sorted(self.wins_by_seat)}
+
+    def win_rate_by_policy(self):
+        """Share of the seats taken by a policy that went on to win the game"""
+        return {name: self.wins_by_policy[name] / seats for name, seats in sorted(self.seats_by_policy.items())}
+
+    def as_dict(self):
+        return {
+            'games': self.games,
+            'finished': self.finished,
+            'stalled': self.stalled,
+            'moves': self.moves,
+            'turns': self.turns,
+            'mean_turns_per_game': self.mean_turns_per_game,
+            'mean_moves_per_game': self.mean_moves_per_game,
+            'wins_by_seat': {seat: self.wins_by_seat[seat] for seat in sorted(self.wins_by_seat)},
+            'win_rate_by_seat': self.win_rate_by_seat(),
+            'win_rate_by_policy': self.win_rate_by_policy(),
+            'elapsed_sec': self.elapsed,
+            'games_per_sec': self.games_per_sec,
+            'moves_per_sec': self.moves_per_sec,
+            'mean_move_latency_usec': self.mean_move_latency * 1e6,
+            'max_move_latency_usec': self.max_move_latency * 1e6,
+        }
+
+def play_game(num_players, policies, rng, stats=None, max_moves=MAX_MOVES_PER_GAME):
+    """Play one game to completion. policies holds one policy per seat.
+    Whenever several players may move (e.g. responses to an action),
+    the player to move is picked at random, as if their messages arrived
+    in random order."""
+    game = CoupGame('simulation', rng=rng)
+    for seat in range(num_players):
+        game.add_player(f'player{seat}')
+    game.start()
+    seat_of = {player: seat for seat, player in enumerate(game.players)}
+
+    num_moves = 0
+    num_turns = 0
+    perf_counter = time.perf_counter
+    while game.started and num_moves < max_moves:
+        movers = [player for player in game.players if game.get_valid_moves_for_player(player)]
+        if not movers:
+            logging.warning("No player can move in turn state %s", game.turn.state)
+            break
+        player = movers[0] if len(movers) == 1 else rng.choice(movers)
+        move_tuple = policies[seat_of[player]](game, player, rng)
+        if not move_tuple:
+            break
+        move, target = move_tuple
+
+        start = perf_counter()
+        try:
+            turn_done = game.player_make_move(player, move, target)
+        except (BadPlayerMove, BadTurnState, BadGameState) as ex:
+            logging.error("Policy for seat %s played an illegal move: %s", seat_of[player], ex)
+            break
+        latency = perf_counter() - start
+
+        num_moves += 1
+        num_turns += turn_done
+        if stats is not None:
+            stats.move_time += latency
+            if latency > stats.max_move_latency:
+                stats.max_move_latency = latency
+
+    winner = game.get_winner() if game.finished else None
+    return GameResult(
+        winner_seat=seat_of[winner] if winner else None,
+        num_moves=num_moves,
+        num_turns=num_turns,
+        finished=game.finished)
+
+def simulate(num_games, num_players=4, policies=('default',), seed=None, stats=None, seat_offset=0):
+    """Play num_games complete games and return aggregate SimulationStats.
+    policies is a sequence of policy names or callables, cycled over seats
+    starting from seat_offset."""
+    assert 2 <= num_players <= CoupGame.MAX_NUM_PLAYERS, f"Bad number of players {num_players}"
+    resolved = [get_policy(policy) for policy in policies]
+    names = [get_policy_name(policy) for policy in policies]
+    seat_policies = [resolved[(seat + seat_offset) % len(resolved)] for seat in range(num_players)]
+    seat_policy_names = [names[(seat + seat_offset) % len(names)] for seat in range(num_players)]
+    rng = random.Random(seed)
+    stats = stats if stats is not None else SimulationStats()
+
+    # Engine logs every move, which would dominate the run time.
+    previous_disable_level = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    start = time.perf_counter()
+    try:
+        for _ in range(num_games):
+            stats.add_result(play_game(num_players, seat_policies, rng, stats), seat_policy_names)
+    finally:
+        stats.elapsed += time.perf_counter() - start
+        logging.disable(previous_disable_level)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless Coup self-play simulator')
+    parser.add_argument('--games', type=int, default=10000, help='number of games to play')
+    parser.add_argument('--players', type=int, default=4, help='players per game')
+    parser.add_argument('--policy', default='default',
+                        help=f'comma separated policies cycled over seats. Available: {",".join(sorted(POLICIES))}')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    stats = simulate(args.games, args.players, args.policy.split(','), args.seed)
+    print(json.dumps(stats.as_dict(), indent=4))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Parallel tournament runner built on the self-play simulator.
+Games are split into chunks and sharded across a process pool. Each
+chunk is seeded from the tournament seed and its chunk index, so results
+are reproducible no matter which worker picks the chunk up or in which
+order chunks finish. Policy to seat assignment is rotated per chunk, so
+per-policy win rates are not skewed by seat advantage.
+
+Python API:
+    result = run_tournament(1000000, num_players=4, policies=['random', 'default'], seed=1)
+    print(result.as_dict())
+
+Command line:
+    python -m game.coup_game.tournament --games 1000000 --policy random,default --scaling
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game.coup_game.simulator import SimulationStats, simulate, get_policy
+
+DEFAULT_CHUNK_SIZE = 2000
+
+def _play_chunk(chunk):
+    """Process pool entry point. Plays one chunk and returns its stats."""
+    num_games, num_players, policies, seed, seat_offset = chunk
+    return simulate(num_games, num_players, policies, seed=seed, seat_offset=seat_offset)
+
+def make_chunks(num_games, num_players, policies, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    seed_rng = random.Random(seed)
+    chunks = list()
+    for index, start in enumerate(range(0, num_games, chunk_size)):
+        chunk_games = min(chunk_size, num_games - start)
+        chunks.append((chunk_games, num_players, policies, seed_rng.getrandbits(64), index % num_players))
+    return chunks
+
+class TournamentResult(object):
+    def __init__(self, stats, workers, wall_time):
+        self.stats = stats          # Merged stats of all chunks
+        self.workers = workers
+        self.wall_time = wall_time
+
+    @property
+    def games_per_sec(self):
+        return self.stats.games / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def moves_per_sec(self):
+        return self.stats.moves / self.wall_time if self.wall_time else 0.0
+
+    def as_dict(self):
+        summary = self.stats.as_dict()
+        # Merged stats rates are per core. Report wall clock throughput instead.
+        summary['cpu_sec'] = summary.pop('elapsed_sec')
+        summary['games_per_sec_per_core'] = summary.pop('games_per_sec')
+        summary['moves_per_sec_per_core'] = summary.pop('moves_per_sec')
+        summary.update({
+            'workers': self.workers,
+            'wall_sec': self.wall_time,
+            'games_per_sec': self.games_per_sec,
+            'moves_per_sec': self.moves_per_sec,
+        })
+        return summary
+
+def run_tournament(num_games, num_players=4, policies=('default',), seed=None,
+                   workers=None, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk_done=None):
+    """Play num_games across a pool of worker processes and return a TournamentResult.
+    Policies must be given by name, or be module level functions, so they can be
+    sent to the workers. on_chunk_done(chunk_stats, merged_stats) is called in the
+    parent as soon as each chunk result streams back."""
+    workers = workers or os.cpu_count()
+    for policy in policies:
+        get_policy(policy)     # Fail early on unknown policies
+    policies = tuple(policies)
+    chunks = make_chunks(num_games, num_players, policies, seed, chunk_size)
+
+    merged = SimulationStats()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_play_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_stats = future.result()
+            merged.merge(chunk_stats)
+            if on_chunk_done:
+                on_chunk_done(chunk_stats, merged)
+    wall_time = time.perf_counter() - start
+    logging.info("Tournament of %s games on %s workers took %.2fs", num_games, workers, wall_time)
+    return TournamentResult(merged, workers, wall_time)
+
+def measure_scaling(num_games, num_players=4, policies=('default',), seed=None,
+                    worker_counts=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run the same tournament with an increasing number of workers.
+    Returns one point per worker count with throughput, speedup and efficiency
+    relative to a single worker."""
+    if worker_counts is None:
+        max_workers = os.cpu_count()
+        worker_counts = sorted({1, max_workers} | {2 ** i for i in range(max_workers.bit_length()) if 2 ** i < max_workers})
+    curve = list()
+    baseline = None
+    for workers in worker_counts:
+        result = run_tournament(num_games, num_players, policies, seed, workers, chunk_size)
+        baseline = baseline or result.games_per_sec
+        speedup = result.games_per_sec / baseline if baseline else 0.0
+        curve.append({
+            'workers': workers,
+            'wall_sec': result.wall_time,
+            'games_per_sec': result.games_per_sec,
+            'speedup': speedup,
+            'efficiency': speedup / workers,
+        })
+    return curve
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parallel Coup self-play tournament')
+    parser.add_argument('--games', type=int, default=100000, help='number of games to play')
+    parser.add_argument('--players', type=int, default=4, help='players per game')
+    parser.add_argument('--policy', default='default', help='comma separated policies cycled over seats')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes. Defaults to all cores')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='games per chunk sent to a worker')
+    parser.add_argument('--scaling', action='store_true', help='also measure the scaling curve over worker counts')
+    args = parser.parse_args(argv)
+    policies = args.policy.split(',')
+
+    def print_progress(chunk_stats, merged):
+        print(f'{merged.games}/{args.games} games', end='\r', file=sys.stderr, flush=True)
+
+    result = run_tournament(args.games, args.players, policies, args.seed,
+                            args.workers, args.chunk_size, print_progress)
+    print(file=sys.stderr)
+    output = {'summary': result.as_dict()}
+    if args.scaling:
+        output['scaling'] = measure_scaling(args.games, args.players, policies, args.seed,
+                                            chunk_size=args.chunk_size)
+    print(json.dumps(output, indent=4))
+
+if __name__ == '__main__':
+    main()
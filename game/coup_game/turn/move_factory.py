@@ -4,13 +4,20 @@ turn state. Each generator should define possible moves for a
 player in a turn state.
 To define a turn state move generator, define function with
 name 'get_move_for_<state name>', and add register_move_getter 
-decorator to the function."""
+decorator to the function.
+Generators do not build moves themselves. Every legal move list is
+precomputed once into MOVE_TABLE from the GameMoveFactory rules and
+shared as an immutable tuple."""
 
+import enum
 import logging
 import re
+from types import MappingProxyType
 from game.coup_game.turn.state import TurnState
 from game.coup_game.move import Actions, Counteractions, GenericMove
 
+logger = logging.getLogger(__name__)
+
 def default_getter(turn, player):
     raise NotImplementedError
 _MOVE_GETTER = {state:default_getter for state in TurnState}
@@ -19,15 +26,15 @@ def register_move_getter(func):
     state_name = re.match(r'get_move_for_([a-z_]*)', func.__name__).group(1)
     state_to_handle = TurnState(state_name)
     _MOVE_GETTER[state_to_handle] = func
-    logging.info(f"Registered move generator {func.__name__} to for state {state_to_handle}")
+    logger.info(f"Registered move generator {func.__name__} to for state {state_to_handle}")
 
 def get_move_for_player(turn, player):
     if not player.is_in_game():
-        return []
+        return NO_MOVES
     try:
         return _MOVE_GETTER[turn.state](turn, player)
     except KeyError as ex:
-        logging.error(f"Error: Handler does not exist for state {turn.state}")
+        logger.error(f"Error: Handler does not exist for state {turn.state}")
 
 def get_default_move_target_tuple_for_player(turn, player):
     """Returns a tuple of default move and target for the given player"""
@@ -37,7 +44,7 @@ def get_default_move_target_tuple_for_player(turn, player):
     if Actions.INCOME in valid_moves:
         return (Actions.INCOME, None)
     if Actions.COUP in valid_moves:
-        opponents = [pl for pl in turn.players if pl != player]
+        opponents = [pl for pl in turn.players if pl != player and pl.is_in_game()]
         return (Actions.COUP, opponents[0])
     if GenericMove.LOSE_INFLUENCE in valid_moves:
         assert player.owned_influence, f"Attempt to lose influence but player {player} has no influence"
@@ -45,41 +52,56 @@ def get_default_move_target_tuple_for_player(turn, player):
     if GenericMove.DISCARD_INFLUENCE in valid_moves:
         assert player.owned_influence, f"Attempt to discard influence but player {player} has no influence"
         return (GenericMove.DISCARD_INFLUENCE, player.owned_influence[0])
-    logging.warning("Unexpected case while making default move")
+    logger.warning("Unexpected case while making default move")
     return (valid_moves[0], None)
 
+def iter_move_target_tuples_for_player(turn, player):
+    """Yield every legal (move, target) tuple for the given player.
+    Targeted actions are paired with each opponent still in game, and
+    lose/discard influence with each distinct influence the player owns."""
+    for move in get_move_for_player(turn, player):
+        if move in _PLAYER_TARGETED_MOVES:
+            for opponent in turn.players:
+                if opponent is not player and opponent.is_in_game():
+                    yield (move, opponent)
+        elif move in _INFLUENCE_TARGETED_MOVES:
+            for influence in dict.fromkeys(player.owned_influence):
+                yield (move, influence)
+        else:
+            yield (move, None)
+
 # Move factory definition
 @register_move_getter
 def get_move_for_wait_action(turn, player):
     if player == turn.action_player:
-        return GameMoveFactory.actions_from_coins(player.coins)
-    return []
+        return _ACTION_PLAYER_MOVES_BY_COIN_BUCKET[get_coin_bucket(player.coins)]
+    return NO_MOVES
 
 @register_move_getter
 def get_move_for_wait_action_response(turn, player):
     if player == turn.action_player:
-        return []
+        return NO_MOVES
     if player == turn.action_target or not turn.player_passed(player):
-        return GameMoveFactory.response_moves_from_action(turn.action_played)
-    return []
+        return _RESPONDER_MOVES_BY_ACTION[turn.action_played]
+    return NO_MOVES
 
 @register_move_getter
 def get_move_for_wait_counter_response(turn, player):
     if player == turn.action_player:
-        return GameMoveFactory.response_moves_from_counter(turn.counter_played)
-    return []
+        return _ACTION_PLAYER_MOVES_BY_COUNTER[turn.counter_played]
+    return NO_MOVES
 
 @register_move_getter
 def get_move_for_wait_lose_influence(turn, player):
     if player == turn.lose_influence_target:
-        return [GenericMove.LOSE_INFLUENCE,]
-    return []
+        return lookup_moves(TurnState.LOSE_INFLUENCE, TurnRole.LOSE_INFLUENCE_TARGET)
+    return NO_MOVES
 
 @register_move_getter
 def get_move_for_wait_exchange_influence(turn, player):
     if player == turn.action_player:
-        return [GenericMove.DISCARD_INFLUENCE,]
-    return []
+        return lookup_moves(TurnState.EXCHANGE_INFLUENCE, TurnRole.ACTION_PLAYER)
+    return NO_MOVES
 
 class GameMoveFactory(object):
     """This is a static class that describes the rules of action to counteractions"""
@@ -129,4 +151,56 @@ class GameMoveFactory(object):
             doable_actions.append(Actions.ASSASSINATE)
         if coins >= 7:
             doable_actions.append(Actions.COUP)
-        return doable_actions
\ No newline at end of file
+        return doable_actions
+
+# Precomputed move table
+class TurnRole(enum.Enum):
+    """Part a player takes in the current turn, as far as legal moves are concerned"""
+    ACTION_PLAYER = 'action_player'
+    RESPONDER = 'responder'     # Target of the action, or a player who has not passed yet
+    LOSE_INFLUENCE_TARGET = 'lose_influence_target'
+    OTHER = 'other'
+
+# Smallest number of coins of each coin bucket. Players in the same
+# bucket can play the same actions.
+COIN_BUCKET_MIN_COINS = (0, 3, 7, 10)
+
+def get_coin_bucket(coins):
+    if coins < 7:
+        return 0 if coins < 3 else 1
+    return 2 if coins < 10 else 3
+
+NO_MOVES = tuple()
+
+def _build_move_table():
+    """Evaluate the GameMoveFactory rules once for every
+    (turn state, role, coin bucket, action or counter played) key."""
+    table = dict()
+    for bucket, coins in enumerate(COIN_BUCKET_MIN_COINS):
+        table[(TurnState.ACTION, TurnRole.ACTION_PLAYER, bucket, None)] = \
+            tuple(GameMoveFactory.actions_from_coins(coins))
+    for action in Actions:
+        table[(TurnState.ACTION_RESPONSE, TurnRole.RESPONDER, None, action)] = \
+            tuple(GameMoveFactory.response_moves_from_action(action))
+    for counter in Counteractions:
+        table[(TurnState.COUNTER_RESPONSE, TurnRole.ACTION_PLAYER, None, counter)] = \
+            tuple(GameMoveFactory.response_moves_from_counter(counter))
+    table[(TurnState.LOSE_INFLUENCE, TurnRole.LOSE_INFLUENCE_TARGET, None, None)] = (GenericMove.LOSE_INFLUENCE,)
+    table[(TurnState.EXCHANGE_INFLUENCE, TurnRole.ACTION_PLAYER, None, None)] = (GenericMove.DISCARD_INFLUENCE,)
+    return MappingProxyType(table)
+
+MOVE_TABLE = _build_move_table()
+
+def lookup_moves(state, role, coin_bucket=None, played=None):
+    """Legal moves for a role in a turn state. Keys that are not in the table have no moves."""
+    return MOVE_TABLE.get((state, role, coin_bucket, played), NO_MOVES)
+
+# Rows of the table resolved ahead of time for the move getters
+_ACTION_PLAYER_MOVES_BY_COIN_BUCKET = tuple(
+    lookup_moves(TurnState.ACTION, TurnRole.ACTION_PLAYER, bucket) for bucket in range(len(COIN_BUCKET_MIN_COINS)))
+_RESPONDER_MOVES_BY_ACTION = {
+    action: lookup_moves(TurnState.ACTION_RESPONSE, TurnRole.RESPONDER, played=action) for action in Actions}
+_ACTION_PLAYER_MOVES_BY_COUNTER = {
+    counter: lookup_moves(TurnState.COUNTER_RESPONSE, TurnRole.ACTION_PLAYER, played=counter) for counter in Counteractions}
+_PLAYER_TARGETED_MOVES = tuple(action for action in Actions if Actions.is_targetable(action))
+_INFLUENCE_TARGETED_MOVES = (GenericMove.LOSE_INFLUENCE, GenericMove.DISCARD_INFLUENCE)
@@ -11,6 +11,8 @@ from game.coup_game.move import Actions, Counteractions, GenericMove
 from game.coup_game.objects import Influence
 from game.coup_game.exceptions import BadPlayerMove, BadTurnState
 
+logger = logging.getLogger(__name__)
+
 def default_handler(turn, deck, player, move, target):
     raise NotImplementedError
 _MOVE_HANDLER = {state:default_handler for state in TurnState}
@@ -19,26 +21,26 @@ def register_move_handler(func):
     state_name = re.match(r'handle_move_for_([a-z_]*)', func.__name__).group(1)
     state_to_handle = TurnState(state_name)
     _MOVE_HANDLER[state_to_handle] = func
-    logging.info(f"Registered move handler {func.__name__} to handle state {state_to_handle}")
+    logger.info(f"Registered move handler {func.__name__} to handle state {state_to_handle}")
 
 def apply_move_handler(turn, deck, player, move, target):
     try:
         if target:
-            logging.info(f"{player} used {move} on {target}")
+            logger.info("%s used %s on %s", player, move, target)
         else:
-            logging.info(f"{player} used {move}")
+            logger.info("%s used %s", player, move)
         _MOVE_HANDLER[turn.state](turn, deck, player, move, target)
     except KeyError as ex:
-        logging.error(f"Error: Handler does not exist for state {turn.state}")
+        logger.error(f"Error: Handler does not exist for state {turn.state}")
 
 # Helper functions
 ChallengeResult = namedtuple('ChallengeResult', 'winner loser exchange_card')
 def get_challenge_result(player, challenger, challenged_move):
     for influence in player.owned_influence:
         if challenged_move in Influence.doable_action_and_counter(influence):
-            logging.info(f"{player.name} owned influence {player.owned_influence}, challenged move {challenged_move} won")
+            logger.info("%s owned influence %s, challenged move %s won", player.name, player.owned_influence, challenged_move)
             return ChallengeResult(winner=player, loser=challenger, exchange_card=influence)
-    logging.info(f"{player.name} owned influence {player.owned_influence}, challenged move {challenged_move} lost")
+    logger.info("%s owned influence %s, challenged move %s lost", player.name, player.owned_influence, challenged_move)
     return ChallengeResult(winner=challenger, loser=player, exchange_card=None)
 
 def resolve_challenge(turn, player, challenger, challenged_move):
@@ -1,3 +1,4 @@
+from operator import attrgetter
 from game.coup_game.turn.state import TurnState
 from game.coup_game.move import Actions, Counteractions, GenericMove
 from game.coup_game.exceptions import BadPlayerMove, BadTurnState
@@ -5,6 +6,18 @@ from game.coup_game.exceptions import BadPlayerMove, BadTurnState
 class CoupGameTurn(object):
     """Class to represent state variables of the current turn"""
     SAME_STATE_CHANGE_LIMIT = 3
+    __slots__ = ('players', 'court_deck', 'state', 'change_same_state_cnt',
+                 'action_player', 'action_played', 'action_target', 'action_applied', 'lose_influence_target',
+                 'counter_played', 'counter_player',
+                 'challenged', 'challenge_loser', 'challenge_winner',
+                 'exchange_player', 'num_cards_to_exchange',
+                 'pass_player_wait_cnt', 'passed_players')
+    # State variables copied by snapshot. passed_players is copied separately
+    # since it is the only mutable one.
+    _STATE_VARIABLES = tuple(name for name in __slots__ if name not in ('players', 'court_deck', 'passed_players'))
+    _PLAYER_VARIABLES = ('action_player', 'action_target', 'lose_influence_target', 'counter_player',
+                         'challenge_loser', 'challenge_winner', 'exchange_player')
+
     def __init__(self, turn_player, players, court_deck):
         self.players = players
         self.court_deck = court_deck
@@ -89,14 +102,15 @@ class CoupGameTurn(object):
             target.coins -= steal_amount
             player.coins += steal_amount
             self.change_state(TurnState.DONE)
-        elif action is Actions.ASSASSINATE:
-            assert target, f"Expected target for action {action}"
-            self.add_lose_influence_player(target)
-            self.change_state(TurnState.LOSE_INFLUENCE)
-        elif action is Actions.COUP:
+        elif action in (Actions.ASSASSINATE, Actions.COUP):
             assert target, f"Expected target for action {action}"
-            self.add_lose_influence_player(target)
-            self.change_state(TurnState.LOSE_INFLUENCE)
+            if target.is_in_game():
+                self.add_lose_influence_player(target)
+                self.change_state(TurnState.LOSE_INFLUENCE)
+            else:
+                # Target already lost its last influence to a challenge
+                # earlier in this turn. Nothing left to take.
+                self.change_state(TurnState.DONE)
         self.action_applied = True
     
     def add_pass_option(self):
@@ -108,6 +122,33 @@ class CoupGameTurn(object):
         else:
             self.pass_player_wait_cnt = len([pl for pl in self.players if pl.is_in_game()]) - 1
 
+    def snapshot(self):
+        """Copy of the state variables. Players are referenced, not copied."""
+        passed_players = self.passed_players
+        return (_get_turn_state(self), tuple(passed_players) if passed_players is not None else None)
+
+    def restore(self, snapshot):
+        state, passed_players = snapshot
+        for name, value in zip(self._STATE_VARIABLES, state):
+            setattr(self, name, value)
+        self.passed_players = list(passed_players) if passed_players is not None else None
+
+    def clone(self, players, court_deck, player_map):
+        """Copy of the turn for a cloned game. player_map maps
+        players of this turn to their clones."""
+        turn = CoupGameTurn.__new__(CoupGameTurn)
+        turn.players = players
+        turn.court_deck = court_deck
+        for name, value in zip(self._STATE_VARIABLES, _get_turn_state(self)):
+            setattr(turn, name, value)
+        for name in self._PLAYER_VARIABLES:
+            setattr(turn, name, player_map[getattr(self, name)])
+        if self.passed_players is not None:
+            turn.passed_players = [player_map[player] for player in self.passed_players]
+        else:
+            turn.passed_players = None
+        return turn
+
     def __str__(self):
         return pprint.pformat({
                 'action_player': self.action_player,
@@ -118,4 +159,6 @@ class CoupGameTurn(object):
                 'lose_influence_target': self.lose_influence_target,
                 'pass_player_wait_cnt': self.pass_player_wait_cnt,
                 'state': self.state
-            }, indent=4)
\ No newline at end of file
+            }, indent=4)
+
+_get_turn_state = attrgetter(*CoupGameTurn._STATE_VARIABLES)
@@ -0,0 +1,102 @@
+"""Rate limits and backpressure between clients and room managers.
+TokenBucket limits the messages of a connection (PlayerConsumer) and of
+a room (RoomManagerConsumer) to a rate with bursts. FrameBuffer is the
+bounded buffer of frames waiting to be sent to a client: a full frontend
+update makes the frontend frames queued before it stale, so they are
+dropped, and when the buffer is full the oldest frame is dropped. Clients
+that miss a patch ask for a resync, so dropped frames only cost a full
+update later.
+
+Everything dropped, limited or shed is counted in counters, per process.
+
+    bucket = TokenBucket(rate=10, burst=20)
+    if not bucket.take():
+        counters['client_rate_limited'] += 1
+"""
+
+import asyncio
+import collections
+import logging
+import time
+
+counters = collections.Counter()
+
+def get_metrics():
+    return dict(counters)
+
+class TokenBucket(object):
+    """Allows rate messages per second on average and bursts of up to burst"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'clock')
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.updated = clock()
+
+    def take(self, tokens=1):
+        """Take tokens if there are enough. Returns False if not."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+FRAME_CHAT = 0
+FRAME_FULL = 1      # Full frontend update
+FRAME_PATCH = 2     # Frontend patch
+
+class FrameBuffer(object):
+    """Frames waiting to be sent with the coroutine function send(text_data, bytes_data).
+    Frames are sent in order by one task, started when frames are put."""
+    def __init__(self, send, max_frames=32):
+        self.send = send
+        self.max_frames = max_frames
+        self.frames = collections.deque()
+        self.task = None
+        # Metrics
+        self.num_sent = 0
+        self.num_coalesced = 0
+        self.num_dropped = 0
+
+    def put(self, kind, text_data=None, bytes_data=None):
+        if kind == FRAME_FULL and self.frames:
+            kept = [frame for frame in self.frames if frame[0] == FRAME_CHAT]
+            coalesced = len(self.frames) - len(kept)
+            if coalesced:
+                self.frames = collections.deque(kept)
+                self.num_coalesced += coalesced
+                counters['frames_coalesced'] += coalesced
+        if len(self.frames) >= self.max_frames:
+            self.frames.popleft()
+            self.num_dropped += 1
+            counters['frames_dropped'] += 1
+        self.frames.append((kind, text_data, bytes_data))
+        if self.task is None:
+            self.task = asyncio.get_event_loop().create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self.frames:
+                _, text_data, bytes_data = self.frames.popleft()
+                await self.send(text_data=text_data, bytes_data=bytes_data)
+                self.num_sent += 1
+        except Exception:
+            logging.exception("Failed to send frame")
+            self.frames.clear()
+        finally:
+            self.task = None
+
+    async def flush(self):
+        """Wait until every frame is sent"""
+        while self.task is not None:
+            await asyncio.shield(self.task)
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.frames.clear()
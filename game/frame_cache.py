@@ -0,0 +1,67 @@
+"""Cache of frontend views and encoded frames by game version.
+Building the views of a game and encoding them is done at most once per
+game version and frame format. Resyncs, reconnects and repeated sends of the
+same version reuse the frames already encoded for each viewer. Only the
+current version of a room is kept. A new version replaces the room
+entry, so the cache holds one entry per room.
+
+    cache = FrameCache(CoupGameFrontend())
+    public, private = cache.get_views(room, game)
+    text = cache.get_frame(room, game, ('update', viewer), build_update)
+"""
+
+from game.codec import FRAME_ENCODERS, JSON_FORMAT
+
+class _RoomFrames(object):
+    __slots__ = ('game', 'version', 'views', 'frames')
+
+    def __init__(self, game):
+        self.game = game
+        self.version = game.version
+        self.views = None       # (public, private) views
+        self.frames = dict()    # Encoded frame by key
+
+class FrameCache(object):
+    def __init__(self, frontend):
+        self.frontend = frontend
+        self._rooms = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_room_frames(self, room, game):
+        room_frames = self._rooms.get(room)
+        # Games replaced under the same room name restart their version
+        if room_frames is None or room_frames.game is not game or room_frames.version != game.version:
+            room_frames = self._rooms[room] = _RoomFrames(game)
+        return room_frames
+
+    def get_views(self, room, game):
+        """Public view shared by every viewer and private views by player name"""
+        room_frames = self._get_room_frames(room, game)
+        if room_frames.views is None:
+            frontend = self.frontend
+            public = {'game_view': frontend.game_view(game)}
+            private = dict()
+            for player in game.players:
+                private[player.name] = {
+                    'interface': frontend.player_interface(game, player),
+                    'player_view': frontend.player_view(game, player)
+                }
+            room_frames.views = (public, private)
+        return room_frames.views
+
+    def get_frame(self, room, game, key, build, frame_format=JSON_FORMAT):
+        """Encoded frame identified by key at the current game version. JSON text,
+        or bytes for binary formats. build() returns the frame data and is only
+        called on a cache miss."""
+        frames = self._get_room_frames(room, game).frames
+        frame = frames.get((frame_format, key))
+        if frame is None:
+            self.misses += 1
+            frame = frames[(frame_format, key)] = FRAME_ENCODERS[frame_format](build())
+        else:
+            self.hits += 1
+        return frame
+
+    def discard(self, room):
+        self._rooms.pop(room, None)
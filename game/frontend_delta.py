@@ -0,0 +1,104 @@
+"""Versioned frontend state and JSON patch style deltas.
+Instead of sending the complete game view and every player's view after
+each move, the room manager keeps the last state sent to a room and
+sends only the operations turning it into the new state:
+
+    {'op': 'replace', 'path': '/game_view/2/coins', 'value': 5}
+
+Ops follow RFC 6902 (add, remove, replace) on the document each client
+holds, {'game_view': ..., 'player_view': ..., 'interface': ...}. Updates
+carry the game version they show and patches the version they apply
+to. Clients apply patches based on their own version and ask for a full
+snapshot otherwise. Full snapshots are sent when a player joins.
+"""
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+def _unescape(key):
+    return key.replace('~1', '/').replace('~0', '~')
+
+def diff(old, new, path=''):
+    """List of patch operations turning old into new. Dicts are diffed key by key
+    and lists of the same length item by item. Anything else that changed,
+    including lists changing length, is replaced whole. Like Python equality,
+    1 and True are treated as the same value."""
+    ops = list()
+    _diff(old, new, path, ops)
+    return ops
+
+def _diff(old, new, path, ops):
+    if type(old) is type(new) and old == new:
+        # Equality runs in C and most of the state is unchanged between moves
+        return
+    if type(old) is dict and type(new) is dict:
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            key_path = f'{path}/{_escape(key)}'
+            if key in old:
+                _diff(old[key], value, key_path, ops)
+            else:
+                ops.append({'op': 'add', 'path': key_path, 'value': value})
+    elif type(old) is list and type(new) is list and len(old) == len(new):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            _diff(old_item, new_item, f'{path}/{index}', ops)
+    else:
+        ops.append({'op': 'replace', 'path': path, 'value': new})
+
+def apply_patch(document, ops):
+    """Apply patch operations in place. Returns the patched document,
+    which is a new object if the root itself was replaced."""
+    for op in ops:
+        if not op['path']:
+            document = op.get('value')
+            continue
+        keys = [_unescape(key) for key in op['path'].split('/')[1:]]
+        parent = document
+        for key in keys[:-1]:
+            parent = parent[int(key)] if type(parent) is list else parent[key]
+        last = int(keys[-1]) if type(parent) is list else keys[-1]
+        if op['op'] == 'remove':
+            del parent[last]
+        elif op['op'] == 'add' and type(parent) is list:
+            parent.insert(last, op['value'])
+        else:
+            parent[last] = op['value']
+    return document
+
+class FrontendState(object):
+    """Last frontend state sent to the players of a room, and the game version it shows.
+    public is the part every player sees, private the part of each player by name."""
+    __slots__ = ('version', 'public', 'private')
+
+    def __init__(self):
+        self.version = None
+        self.public = None
+        self.private = dict()
+
+    def snapshot(self, public, private, version):
+        """Record a full state sent to the players"""
+        self.version = version
+        self.public = public
+        self.private = private
+
+    def update(self, public, private, version):
+        """Record the new state at version and return (previous version, public ops,
+        private ops by player name). Players without a previous private state get
+        their full private state as add ops."""
+        base_version = self.version
+        if version == base_version:
+            # Same game version, nothing changed
+            return base_version, [], dict()
+        public_ops = diff(self.public, public)
+        private_ops = dict()
+        for name, player_state in private.items():
+            previous = self.private.get(name)
+            if previous is None:
+                private_ops[name] = [{'op': 'add', 'path': f'/{_escape(key)}', 'value': value}
+                                     for key, value in player_state.items()]
+            else:
+                private_ops[name] = diff(previous, player_state)
+        self.snapshot(public, private, version)
+        return base_version, public_ops, private_ops
@@ -0,0 +1,38 @@
+import asyncio
+import json
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+from game.sharding import get_room_manager_channels
+
+class Command(BaseCommand):
+    help = 'Turn the latency histograms of the room managers on or off, reset them, or print them with queue and flow control metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['enable', 'disable', 'reset', 'report'])
+        parser.add_argument('--timeout', type=float, default=5.0, help='seconds to wait for each report')
+
+    def handle(self, *args, **options):
+        reports = async_to_sync(self.control)(options['action'], options['timeout'])
+        if reports is not None:
+            self.stdout.write(json.dumps(reports, indent=4))
+
+    async def control(self, action, timeout):
+        """Send the action to every room manager shard. Returns the reports by shard for report."""
+        channel_layer = get_channel_layer()
+        event = {'type': 'latency.control', 'action': action}
+        if action == 'report':
+            event['reply_channel'] = await channel_layer.new_channel()
+        channels = get_room_manager_channels()
+        for channel in channels:
+            await channel_layer.send(channel, event)
+        if action != 'report':
+            return None
+        reports = dict()
+        for _ in channels:
+            try:
+                message = await asyncio.wait_for(channel_layer.receive(event['reply_channel']), timeout)
+            except asyncio.TimeoutError:
+                raise CommandError(f"Got {len(reports)} of {len(channels)} reports before timing out")
+            reports[message['shard']] = {key: value for key, value in message.items() if key not in ('type', 'shard')}
+        return reports
@@ -0,0 +1,20 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from game.replays import load_replay_index, replay_view
+
+class Command(BaseCommand):
+    help = 'Print the game view of a logged game at a move'
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help='path of the game log')
+        parser.add_argument('--game', type=int, default=0, help='game of the log, in order of start')
+        parser.add_argument('--move', type=int, default=None, help='number of moves played, the last move by default')
+
+    def handle(self, *args, **options):
+        try:
+            index = load_replay_index(options['log'], options['game'])
+            move = index.num_moves if options['move'] is None else options['move']
+            view = replay_view(index, move)
+        except (OSError, IndexError, ValueError) as ex:
+            raise CommandError(ex)
+        self.stdout.write(json.dumps(view, indent=4))
@@ -0,0 +1,43 @@
+"""Replays of the games logged by the room managers.
+Game logs are the files of COUP_EVENT_LOG_DIR, named by their room and
+creation time. A log holds one game per start of its room. Logs recorded
+with snapshots are indexed as they are, others get a snapshot every
+COUP_REPLAY_SNAPSHOT_INTERVAL moves by replaying them once.
+"""
+
+import functools
+import os
+from django.conf import settings
+from game.coup_game.coup_game import CoupGameFrontend
+from game.coup_game.event_log import ReplayIndex, read_events, split_games, SnapshotEvent
+
+def get_log_path(log_name):
+    """Path of the log of the given name, None if there is no such log"""
+    if not settings.COUP_EVENT_LOG_DIR or os.path.basename(log_name) != log_name:
+        return None
+    path = os.path.join(settings.COUP_EVENT_LOG_DIR, f'{log_name}.events')
+    return path if os.path.isfile(path) else None
+
+def load_replay_index(path, game_number=0):
+    """Index of a game of a log. Cached until the log grows."""
+    return _load_replay_index(path, os.path.getsize(path), game_number)
+
+@functools.lru_cache(maxsize=32)
+def _load_replay_index(path, size, game_number):
+    with open(path, 'rb') as log:
+        data = log.read(size)
+    games = split_games(read_events(data))
+    if not 0 <= game_number < len(games):
+        raise IndexError(f"Game {game_number} out of range, log has {len(games)} games")
+    events = games[game_number]
+    if any(isinstance(event, SnapshotEvent) for event in events):
+        return ReplayIndex(events)
+    return ReplayIndex.build(events, settings.COUP_REPLAY_SNAPSHOT_INTERVAL)
+
+def replay_view(index, move):
+    """game_view of the game at the move"""
+    return {
+        'move': move,
+        'num_moves': index.num_moves,
+        'game_view': CoupGameFrontend().game_view(index.seek(move)),
+    }
@@ -0,0 +1,125 @@
+"""Per-room actors of the room manager.
+Every room has its own bounded inbox and an asyncio task handling the
+events of the room one at a time. The room manager consumer only posts
+events to the actor of their room, so a room waiting on I/O, e.g. sends
+to the channel layer, does not hold up moves of the other rooms, while
+the events of one room never interleave.
+
+Inboxes have a queue per priority class: game events (moves, controls,
+move timeouts) are handled first, then joins and leaves, then chat.
+Events of the same class are handled in the order they were posted.
+Chat has its own small bound and is dropped altogether while the shard
+has more game events waiting than chat_throttle, so chat spam can not
+delay moves close to their timeout.
+
+An actor only exists while its room has events to handle: its task exits
+and the actor is dropped once its inbox is drained, so idle rooms cost
+nothing.
+
+    actors = RoomActors(handle, inbox_size=64)
+    actors.post('room0', event, PRIORITY_GAME)     # Never blocks, False if dropped
+"""
+
+import asyncio
+import collections
+import logging
+
+PRIORITY_GAME = 0
+PRIORITY_MEMBERSHIP = 1
+PRIORITY_CHAT = 2
+PRIORITY_NAMES = ('game', 'membership', 'chat')
+
+class RoomActor(object):
+    __slots__ = ('room', 'inboxes', 'task')
+
+    def __init__(self, room):
+        self.room = room
+        self.inboxes = tuple(collections.deque() for _ in PRIORITY_NAMES)
+        self.task = None
+
+    def pop(self):
+        """Next event by priority then order, with its priority. None if empty."""
+        for priority, inbox in enumerate(self.inboxes):
+            if inbox:
+                return priority, inbox.popleft()
+        return None
+
+class RoomActors(object):
+    """Actors by room name, handling events with the coroutine function handle(event)"""
+    def __init__(self, handle, inbox_size=64, chat_inbox_size=16, chat_throttle=None):
+        self.handle = handle
+        self.inbox_sizes = (inbox_size, inbox_size, chat_inbox_size)
+        self.chat_throttle = chat_throttle      # Game events waiting beyond which chat is dropped
+        self.actors = dict()
+        # Metrics, by priority class
+        self.num_pending = [0] * len(PRIORITY_NAMES)
+        self.max_pending = [0] * len(PRIORITY_NAMES)
+        self.num_posted = [0] * len(PRIORITY_NAMES)
+        self.num_dropped = [0] * len(PRIORITY_NAMES)
+        self.num_failed = 0
+        self.num_tasks_started = 0
+
+    def post(self, room, event, priority=PRIORITY_GAME):
+        """Queue event for the actor of room, starting its task if idle.
+        Returns False and drops the event if the inbox of its class is full,
+        or if it is chat and the shard is throttling chat."""
+        if (priority == PRIORITY_CHAT and self.chat_throttle is not None
+                and self.num_pending[PRIORITY_GAME] > self.chat_throttle):
+            self.num_dropped[priority] += 1
+            return False
+        actor = self.actors.get(room)
+        if actor is None:
+            actor = self.actors[room] = RoomActor(room)
+        inbox = actor.inboxes[priority]
+        if len(inbox) >= self.inbox_sizes[priority]:
+            self.num_dropped[priority] += 1
+            return False
+        inbox.append(event)
+        self.num_posted[priority] += 1
+        self.num_pending[priority] += 1
+        if self.num_pending[priority] > self.max_pending[priority]:
+            self.max_pending[priority] = self.num_pending[priority]
+        if actor.task is None:
+            actor.task = asyncio.get_event_loop().create_task(self._run(actor))
+            self.num_tasks_started += 1
+        return True
+
+    async def _run(self, actor):
+        while True:
+            item = actor.pop()
+            if item is None:
+                break
+            priority, event = item
+            self.num_pending[priority] -= 1
+            try:
+                await self.handle(event)
+            except Exception:
+                self.num_failed += 1
+                logging.exception(f"Room {actor.room} failed to handle {event.get('type')}")
+        # Nothing is posted between the empty check and here, there is no await in between
+        actor.task = None
+        del self.actors[actor.room]
+
+    async def join(self):
+        """Wait until every inbox is drained"""
+        while self.actors:
+            await asyncio.gather(*[actor.task for actor in list(self.actors.values()) if actor.task])
+
+    def get_metrics(self):
+        """Queue depths and counters by priority class"""
+        metrics = {name: {
+            'pending': self.num_pending[priority],
+            'max_pending': self.max_pending[priority],
+            'posted': self.num_posted[priority],
+            'dropped': self.num_dropped[priority],
+        } for priority, name in enumerate(PRIORITY_NAMES)}
+        metrics['rooms'] = len(self.actors)
+        metrics['failed'] = self.num_failed
+        return metrics
+
+    def cancel(self):
+        for actor in self.actors.values():
+            if actor.task:
+                actor.task.cancel()
+        self.actors.clear()
+        self.num_pending = [0] * len(PRIORITY_NAMES)
@@ -0,0 +1,127 @@
+"""Registry of the rooms hosted by the room managers, served to the lobby.
+Each room manager keeps the lobby entries of its rooms in memory and
+publishes them to the Django cache, under the key of its shard. Changes
+are published at most once per publish interval, all rooms of the shard
+in one cache write, so a busy shard does not write the cache on every
+join. The lobby views read the published entries of every shard at most
+once per COUP_LOBBY_TTL_SEC and keep them encoded with their ETag, so
+lobby polls read neither the Room table nor the cache.
+
+Room managers run by runworker are in another process than the web
+server, so the cache must be shared between processes: the settings use
+a file based cache. A local memory cache only does with the in-process
+channel layer, see game.channel_layer.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from game.sharding import get_room_manager_channels
+
+REGISTRY_CACHE_KEY_PREFIX = 'coup:room-registry:'
+
+def registry_cache_key(shard_channel):
+    return f'{REGISTRY_CACHE_KEY_PREFIX}{shard_channel}'
+
+class RoomRegistry(object):
+    """Lobby entries of the rooms of one room manager.
+    With a publish interval, changes are published by a timer of the running event loop."""
+    def __init__(self, shard_channel, publish_interval=0):
+        self.key = registry_cache_key(shard_channel)
+        self.publish_interval = publish_interval
+        self.rooms = dict()     # Entry by room name
+        self._publish_handle = None
+        # Metrics
+        self.num_publishes = 0
+
+    def update(self, room, num_players, game_started):
+        if self._set(room, num_players, game_started):
+            self._changed()
+
+    def update_many(self, rooms):
+        """Update the (room, num_players, game_started) of many rooms, published once"""
+        changed = False
+        for room, num_players, game_started in rooms:
+            changed = self._set(room, num_players, game_started) or changed
+        if changed:
+            self._changed()
+
+    def set_ids(self, ids):
+        """Set the database id by room name of rooms, once written"""
+        changed = False
+        for room, room_id in ids.items():
+            entry = self.rooms.get(room)
+            if entry is not None and entry['id'] != room_id:
+                self.rooms[room] = dict(entry, id=room_id)
+                changed = True
+        if changed:
+            self._changed()
+
+    def _set(self, room, num_players, game_started):
+        """Set the entry of room. Returns whether it changed."""
+        previous = self.rooms.get(room)
+        entry = {'id': previous['id'] if previous else None, 'name': room,
+                 'num_players': num_players, 'game_started': game_started}
+        if previous == entry:
+            return False
+        self.rooms[room] = entry
+        return True
+
+    def remove(self, room):
+        if self.rooms.pop(room, None) is not None:
+            self._changed()
+
+    def _changed(self):
+        if not self.publish_interval:
+            self.publish()
+        elif self._publish_handle is None:
+            self._publish_handle = asyncio.get_event_loop().call_later(self.publish_interval, self.publish)
+
+    def publish(self):
+        if self._publish_handle is not None:
+            self._publish_handle.cancel()
+            self._publish_handle = None
+        cache.set(self.key, list(self.rooms.values()), timeout=None)
+        self.num_publishes += 1
+
+def _etag(body):
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+class LobbySnapshot(object):
+    """Rooms of every shard encoded as JSON bodies with their ETag"""
+    __slots__ = ('expires', 'body', 'etag', 'rooms')
+
+    def __init__(self, entries, expires):
+        self.expires = expires
+        entries = sorted(entries, key=lambda entry: entry['name'])
+        self.body = json.dumps(entries).encode()
+        self.etag = _etag(self.body)
+        self.rooms = dict()     # (body, etag) by room name
+        for entry in entries:
+            body = json.dumps(entry).encode()
+            self.rooms[entry['name']] = (body, _etag(body))
+
+_snapshot = None
+
+def read_lobby_snapshot():
+    """Snapshot of the published rooms, read from the cache once per TTL.
+    Blocking when the cache backend is, run with sync_to_async from async code."""
+    global _snapshot
+    entries = list()
+    for shard_entries in cache.get_many([registry_cache_key(channel) for channel in get_room_manager_channels()]).values():
+        entries.extend(shard_entries)
+    _snapshot = LobbySnapshot(entries, time.monotonic() + settings.COUP_LOBBY_TTL_SEC)
+    return _snapshot
+
+def get_cached_lobby_snapshot():
+    """Last snapshot read if still fresh, None otherwise"""
+    if _snapshot is not None and _snapshot.expires > time.monotonic():
+        return _snapshot
+    return None
+
+def expire_lobby_snapshot():
+    global _snapshot
+    _snapshot = None
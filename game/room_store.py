@@ -0,0 +1,176 @@
+"""Write-behind persistence of rooms.
+The room manager records room changes with add_room, update_room and
+delete_room, which only queue the change and return at once. Changes to
+the same room are coalesced, so a room written many times between two
+flushes costs a single UPDATE. A background task flushes the queue in
+one transaction every flush interval, or as soon as batch size rooms
+are waiting.
+
+Durability: a change is acknowledged before it is written. On a crash,
+changes queued since the last flush, at most one flush interval of
+them, are lost. The Room table is the lobby listing of rooms, not game
+state, which lives in the room manager memory and is lost with it
+anyway. A failed flush puts its changes back in the queue, unless newer
+changes for the same room were queued meanwhile, and retries on the
+next flush. close() flushes whatever is still queued.
+
+Once a flush wrote them, the database ids of the rooms it created are
+passed to on_created, e.g. to list them in the lobby.
+"""
+
+import asyncio
+import logging
+from channels.db import database_sync_to_async
+from django.db import transaction
+from game.models import Room
+
+class _RoomWrite(object):
+    """Pending changes of one room, applied in order delete, create, update"""
+    __slots__ = ('delete', 'create', 'fields')
+
+    def __init__(self):
+        self.delete = False
+        self.create = False
+        self.fields = None
+
+class WriteBehindRoomStore(object):
+    def __init__(self, flush_interval=1.0, batch_size=100, on_created=None):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.on_created = on_created    # Called with the id by room name of the rooms created by a flush
+        self._pending = dict()      # _RoomWrite by room name
+        self._wakeup = None
+        self._task = None
+        # Metrics
+        self.num_queued = 0
+        self.num_flushes = 0
+        self.num_written = 0        # Rooms written, after coalescing
+        self.num_failed_flushes = 0
+
+    @property
+    def num_pending(self):
+        return len(self._pending)
+
+    # Queueing. Never blocks.
+    def add_room(self, room_name):
+        """Create the room if it does not exist"""
+        pending = self._queue(room_name)
+        pending.create = True
+
+    def update_room(self, room_name, num_players, game_started):
+        """Update the fields of an existing room"""
+        pending = self._queue(room_name)
+        pending.fields = {'num_players': num_players, 'game_started': game_started}
+
+    def delete_room(self, room_name):
+        pending = self._queue(room_name)
+        pending.delete = True
+        pending.create = False
+        pending.fields = None
+
+    def _queue(self, room_name):
+        self.num_queued += 1
+        pending = self._pending.get(room_name)
+        if pending is None:
+            pending = self._pending[room_name] = _RoomWrite()
+        self._ensure_flusher()
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return pending
+
+    # Flushing
+    @staticmethod
+    def write(writes):
+        """Apply the writes by room name to the database in one transaction.
+        Returns the id by room name of the rooms created."""
+        ids = dict()
+        with transaction.atomic():
+            for room_name, pending in writes.items():
+                if pending.delete:
+                    Room.objects.filter(name=room_name).delete()
+                if pending.create:
+                    room, _ = Room.objects.get_or_create(name=room_name, defaults={
+                        'password': '', 'num_players': 1, 'game_started': False})
+                    ids[room_name] = room.id
+                if pending.fields:
+                    if not Room.objects.filter(name=room_name).update(**pending.fields):
+                        logging.error(f"Room {room_name} not found while attempting to update database")
+        return ids
+
+    def _take_pending(self):
+        writes = self._pending
+        self._pending = dict()
+        return writes
+
+    def _requeue(self, writes):
+        """Put back writes of a failed flush. Rooms changed since are kept as queued,
+        so a newer delete is not undone, and newer fields win."""
+        for room_name, pending in writes.items():
+            newer = self._pending.get(room_name)
+            if newer is None:
+                self._pending[room_name] = pending
+            elif not newer.delete:
+                newer.delete = pending.delete
+                newer.create = newer.create or pending.create
+                newer.fields = newer.fields or pending.fields
+
+    def flush_sync(self):
+        """Write everything queued. For use outside the event loop."""
+        writes = self._take_pending()
+        if not writes:
+            return
+        try:
+            ids = self.write(writes)
+        except Exception as ex:
+            self._flush_failed(writes, ex)
+        else:
+            self._flush_done(writes, ids)
+
+    async def flush(self):
+        """Write everything queued without blocking the event loop"""
+        writes = self._take_pending()
+        if not writes:
+            return
+        try:
+            ids = await database_sync_to_async(self.write)(writes)
+        except Exception as ex:
+            self._flush_failed(writes, ex)
+        else:
+            self._flush_done(writes, ids)
+
+    def _flush_done(self, writes, ids):
+        self.num_flushes += 1
+        self.num_written += len(writes)
+        if ids and self.on_created is not None:
+            self.on_created(ids)
+
+    def _flush_failed(self, writes, ex):
+        self.num_failed_flushes += 1
+        self._requeue(writes)
+        logging.error(f"Failed to write {len(writes)} rooms to database, will retry: {ex}")
+
+    def _ensure_flusher(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop, e.g. management commands. Flushed with flush_sync.
+            return
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        """Stop the background flush and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
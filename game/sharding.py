@@ -0,0 +1,72 @@
+"""Placement of rooms on room manager shards.
+Rooms are spread over COUP_ROOM_MANAGER_SHARDS room manager channels
+(room-manager-0, room-manager-1, ...) with a consistent hash ring of the
+room name. Every room maps to exactly one shard, so each shard keeps its
+own games and no state is shared between shards. Adding a shard moves
+only about 1/N of the rooms.
+
+Each shard channel is consumed by its own worker process:
+    python manage.py runworker room-manager-0
+    python manage.py runworker room-manager-1
+"""
+
+import hashlib
+from bisect import bisect
+from django.conf import settings
+
+ROOM_MANAGER_CHANNEL_PREFIX = 'room-manager'
+DEFAULT_VIRTUAL_NODES = 128
+
+def _hash(key):
+    # Python's hash() is salted per process. Every process must agree on placement.
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+class HashRing(object):
+    """Consistent hash ring. Every node is placed on the ring at a number of
+    virtual points to even out the share of keys each node gets."""
+    def __init__(self, nodes=(), virtual_nodes=DEFAULT_VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self._points = list()       # Sorted hashes of virtual nodes
+        self._point_nodes = list()  # Node of each point
+        self.nodes = list()
+        for node in nodes:
+            self.add_node(node)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def add_node(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.virtual_nodes):
+            point = _hash(f'{node}#{i}')
+            index = bisect(self._points, point)
+            self._points.insert(index, point)
+            self._point_nodes.insert(index, node)
+
+    def remove_node(self, node):
+        self.nodes.remove(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._point_nodes) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._point_nodes = [owner for _, owner in kept]
+
+    def get_node(self, key):
+        if not self._points:
+            raise ValueError("Hash ring has no nodes")
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._point_nodes[index]
+
+def get_room_manager_channels(num_shards=None):
+    num_shards = num_shards or settings.COUP_ROOM_MANAGER_SHARDS
+    return [f'{ROOM_MANAGER_CHANNEL_PREFIX}-{index}' for index in range(num_shards)]
+
+_ring = None
+
+def get_room_manager_channel(room_name):
+    """Channel name of the room manager shard owning the room"""
+    global _ring
+    num_shards = settings.COUP_ROOM_MANAGER_SHARDS
+    if _ring is None or len(_ring) != num_shards:
+        _ring = HashRing(get_room_manager_channels(num_shards))
+    return _ring.get_node(room_name)
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from channels.exceptions import ChannelFull
+from django.test import override_settings
+from game.channel_layer import LocalChannelLayer, InProcessWorkers
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.mark.asyncio
+async def test_messages_passed_without_copy():
+    layer = LocalChannelLayer()
+    message = {'type': 'frontend.patch', 'ops': [{'op': 'replace', 'path': '/version', 'value': 2}]}
+    await layer.send('room-manager-0', message)
+    assert await layer.receive('room-manager-0') is message
+    # A waiting receiver gets the message straight away
+    receiver = asyncio.ensure_future(layer.receive('room-manager-0'))
+    await asyncio.sleep(0)
+    await layer.send('room-manager-0', message)
+    assert await receiver is message
+    assert layer.num_handed_over == 1
+    assert layer.channels == dict()
+
+@pytest.mark.asyncio
+async def test_channels_bounded():
+    layer = LocalChannelLayer(capacity=2, channel_capacity={'room-manager-*': 3})
+    for index in range(2):
+        await layer.send('player', {'type': 'chat', 'index': index})
+    with pytest.raises(ChannelFull):
+        await layer.send('player', {'type': 'chat'})
+    for index in range(3):
+        await layer.send('room-manager-0', {'type': 'game.move'})
+    with pytest.raises(ChannelFull):
+        await layer.send('room-manager-0', {'type': 'game.move'})
+    assert [(await layer.receive('player'))['index'] for _ in range(2)] == [0, 1]
+
+@pytest.mark.asyncio
+async def test_group_send_skips_full_members():
+    layer = LocalChannelLayer(capacity=1)
+    bob, tom = await layer.new_channel(), await layer.new_channel()
+    assert bob != tom
+    for channel in (bob, tom):
+        await layer.group_add('room', channel)
+    await layer.send(tom, {'type': 'chat'})
+    message = {'type': 'frontend.update'}
+    await layer.group_send('room', message)
+    assert await layer.receive(bob) is message
+    assert (await layer.receive(tom))['type'] == 'chat'
+    await layer.group_discard('room', bob)
+    await layer.group_send('room', message)
+    assert await layer.receive(tom) is message
+    assert list(layer.groups) == ['room'] and list(layer.groups['room']) == [tom]
+    assert layer.channel_groups == {tom: {'room'}}
+
+@pytest.mark.asyncio
+async def test_expired_messages_dropped_with_memberships():
+    clock = FakeClock()
+    layer = LocalChannelLayer(expiry=10, group_expiry=100, clock=clock)
+    await layer.group_add('room', 'gone')
+    await layer.group_add('room', 'alive')
+    await layer.group_add('lobby', 'alive')
+    await layer.group_send('room', {'type': 'chat'})
+    await layer.receive('alive')
+    clock.now = 11
+    await layer.send('alive', {'type': 'chat'})
+    # Nobody received on gone within expiry, it left its groups
+    assert 'gone' not in layer.channels and layer.num_expired == 1
+    assert list(layer.groups['room']) == ['alive'] and 'gone' not in layer.channel_groups
+    clock.now = 200
+    await layer.group_send('room', {'type': 'chat'})
+    assert layer.groups == dict() and layer.channel_groups == dict()
+
+@pytest.mark.asyncio
+async def test_cancelled_receive_keeps_message():
+    layer = LocalChannelLayer()
+    receiver = asyncio.ensure_future(layer.receive('room-manager-0'))
+    await asyncio.sleep(0)
+    await layer.send('room-manager-0', {'type': 'game.move'})
+    receiver.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await receiver
+    assert (await layer.receive('room-manager-0'))['type'] == 'game.move'
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'game.channel_layer.LocalChannelLayer'}})
+@pytest.mark.asyncio
+async def test_in_process_workers_run_channel_consumers():
+    from channels.layers import get_channel_layer
+    received = asyncio.Queue()
+    def application(scope):
+        async def instance(receive, send):
+            if scope['type'] == 'channel':
+                while True:
+                    await received.put(await receive())
+        return instance
+    workers = InProcessWorkers(application, ['room-manager-0'])
+    workers({'type': 'websocket'})
+    await get_channel_layer().send('room-manager-0', {'type': 'join.game'})
+    assert (await asyncio.wait_for(received.get(), 1))['type'] == 'join.game'
+    workers.stop()
@@ -0,0 +1,126 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+from django.test import TestCase
+from game.checkpoint_store import CheckpointStore
+from game.coup_game.checkpoint import dump_game, load_game
+from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.coup_game.simulator import random_policy
+
+class CheckpointTestCase(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.fe = CoupGameFrontend()
+
+    def new_game(self, name='test', num_players=4):
+        game = CoupGame(name, rng=self.rng)
+        for i in range(num_players):
+            game.add_player(f'player{i}')
+        return game
+
+    def play_random_move(self, game):
+        movers = [pl for pl in game.players if game.get_valid_moves_for_player(pl)]
+        player = self.rng.choice(movers)
+        move, target = random_policy(game, player, self.rng)
+        game.player_make_move(player, move, target)
+        return game.players.index(player), move, game.players.index(target) if target in game.players else target
+
+    def views(self, game):
+        return (self.fe.game_view(game),
+                [self.fe.player_view(game, pl) for pl in game.players],
+                [self.fe.player_interface(game, pl) for pl in game.players])
+
+    def test_loaded_game_plays_on_identically(self):
+        for num_players in range(2, 7):
+            game = self.new_game(num_players=num_players)
+            game.start()
+            while game.started:
+                loaded = load_game(json.loads(json.dumps(dump_game(game))))
+                self.assertEqual(self.views(loaded), self.views(game))
+                self.assertEqual(loaded.version, game.version)
+                player, move, target = self.play_random_move(game)
+                if isinstance(target, int):
+                    target = loaded.players[target]
+                loaded.player_make_move(loaded.players[player], move, target)
+                self.assertEqual(self.views(loaded), self.views(game))
+                self.assertEqual(loaded.deck.snapshot(), game.deck.snapshot())
+
+    def test_game_not_started(self):
+        game = self.new_game()
+        game.player_change_seat(game.players[0], 5)
+        loaded = load_game(dump_game(game))
+        self.assertEqual(self.views(loaded), self.views(game))
+        self.assertEqual(loaded.get_players_in_seating_order()[-1].name, 'player0')
+
+    def test_unknown_format(self):
+        data = dump_game(self.new_game())
+        data[0] += 1
+        with self.assertRaises(ValueError):
+            load_game(data)
+
+class CheckpointStoreTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'shard', 'room-manager-0.sqlite3')
+        self.store = CheckpointStore(self.path)
+        self.games = dict()
+        for name in ('room0', 'room1'):
+            game = self.games[name] = CoupGame(name, rng=random.Random(0))
+            game.add_player('bob')
+            game.add_player('tom')
+            game.start()
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def rows(self):
+        with sqlite3.connect(self.path) as connection:
+            return dict(connection.execute('SELECT room, version FROM checkpoint'))
+
+    def test_incremental(self):
+        self.store.write(self.store.collect(self.games))
+        self.assertEqual(self.rows(), {'room0': self.games['room0'].version, 'room1': self.games['room1'].version})
+
+        self.assertEqual(self.store.collect(self.games), ([], []))
+        game = self.games['room1']
+        game.player_make_move(game.turn_player, game.get_valid_moves_for_player(game.turn_player)[0])
+        del self.games['room0']
+        rows, deleted = self.store.collect(self.games)
+        self.assertEqual([room for room, _, _ in rows], ['room1'])
+        self.assertEqual(deleted, ['room0'])
+        self.store.write((rows, deleted))
+        self.assertEqual(self.rows(), {'room1': self.games['room1'].version})
+
+    def test_replaced_game_written(self):
+        self.store.write(self.store.collect(self.games))
+        game = self.games['room0'] = CoupGame('room0')
+        game.version = self.games['room1'].version
+        self.assertEqual([room for room, _, _ in self.store.collect(self.games)[0]], ['room0'])
+
+    def test_load_all(self):
+        self.store.write(self.store.collect(self.games))
+        store = CheckpointStore(self.path)
+        games = store.load_all()
+        store.close()
+        self.assertEqual(set(games), {'room0', 'room1'})
+        fe = CoupGameFrontend()
+        for room, game in games.items():
+            self.assertEqual(fe.game_view(game), fe.game_view(self.games[room]))
+        # Loaded games are not written again until they change
+        self.assertEqual(store.collect(games), ([], []))
+
+    def test_failed_write_collected_again(self):
+        changes = self.store.collect(self.games)
+        self.store.write(changes)
+        del self.games['room0']
+        self.games['room1'].version += 1
+        changes = self.store.collect(self.games)
+        # A directory can not be opened as database
+        self.store.close()
+        self.store.path = self.directory.name
+        with self.assertRaises(sqlite3.Error):
+            self.store.write(changes)
+        self.assertEqual(self.store.collect(self.games), changes)
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from game.codec import encode_move, decode_move, TARGET_NONE, TARGET_SEAT, TARGET_INFLUENCE, MOVE_FRAME, msgpack, MSGPACK_FORMAT
+from game.coup_game.codes import CODE_TO_MOVE, MOVE_TO_CODE, INFLUENCE_TO_CODE, code_to_move, code_to_influence
+from game.coup_game.move import Actions, Counteractions, GenericMove, VALID_MOVES, str_to_move
+from game.coup_game.objects import Influence, str_to_inf
+from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.frame_cache import FrameCache
+
+class CodesTestCase(TestCase):
+    def test_every_move_has_a_code(self):
+        self.assertCountEqual(MOVE_TO_CODE, [move for moves in VALID_MOVES for move in moves])
+        for move, code in MOVE_TO_CODE.items():
+            self.assertIs(code_to_move(code), move)
+            self.assertLess(code, 256)
+
+    def test_every_influence_has_a_code(self):
+        self.assertCountEqual(INFLUENCE_TO_CODE, list(Influence))
+        for influence, code in INFLUENCE_TO_CODE.items():
+            self.assertIs(code_to_influence(code), influence)
+
+    def test_unknown_codes(self):
+        self.assertIsNone(code_to_move(0))
+        self.assertIsNone(code_to_move(len(CODE_TO_MOVE)))
+        self.assertIsNone(code_to_influence(200))
+
+    def test_str_to_move(self):
+        self.assertIs(str_to_move('income'), Actions.INCOME)
+        self.assertIs(str_to_move('block-steal'), Counteractions.BLOCK_STEAL)
+        self.assertIs(str_to_move('lose-influence'), GenericMove.LOSE_INFLUENCE)
+        self.assertIsNone(str_to_move('no-such-move'))
+        self.assertIsNone(str_to_move(None))
+        self.assertIs(str_to_inf('duke'), Influence.DUKE)
+        self.assertIsNone(str_to_inf('bob'))
+
+class BinaryMoveTestCase(TestCase):
+    def test_move_without_target(self):
+        frame = encode_move(Actions.INCOME)
+        self.assertEqual(len(frame), MOVE_FRAME.size)
+        self.assertEqual(decode_move(frame), {'type': 'game.move', 'move': 'income', 'target': None, 'target_seat': None})
+
+    def test_seat_target(self):
+        event = decode_move(encode_move(Actions.COUP, TARGET_SEAT, 3))
+        self.assertEqual((event['move'], event['target'], event['target_seat']), ('coup', None, 3))
+
+    def test_influence_target(self):
+        event = decode_move(encode_move(GenericMove.LOSE_INFLUENCE, TARGET_INFLUENCE, Influence.CONTESSA))
+        self.assertEqual((event['move'], event['target'], event['target_seat']), ('lose-influence', 'contessa', None))
+
+    def test_malformed_frames(self):
+        for frame in (b'', b'\x01\x01\x00', b'\x02\x01\x00\x00', b'\x01\x00\x00\x00', b'\x01\x01\x07\x00', b'\x01\x0d\x02\x09'):
+            with self.assertRaises(ValueError):
+                decode_move(frame)
+
+class FrameFormatTestCase(TestCase):
+    def test_msgpack_frames_cached_apart_from_json(self):
+        if msgpack is None:
+            self.skipTest('msgpack not installed')
+        cache = FrameCache(CoupGameFrontend())
+        game = CoupGame('room')
+        game.add_player('bob')
+        frame_data = {'type': 'frontend.update', 'version': game.version}
+        text = cache.get_frame('room', game, ('update', 'bob'), lambda: frame_data)
+        packed = cache.get_frame('room', game, ('update', 'bob'), lambda: frame_data, MSGPACK_FORMAT)
+        self.assertIsInstance(text, str)
+        self.assertEqual(msgpack.unpackb(packed), frame_data)
+        self.assertEqual(cache.misses, 2)
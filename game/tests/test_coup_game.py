@@ -1,9 +1,12 @@
 from django.test import TestCase
 from game.coup_game.coup_game import CoupGame, CoupGameFrontend
 from game.coup_game.turn.state import TurnState
-from game.coup_game.exceptions import NotEnoughPlayer, BadPlayerMove
+from game.coup_game.exceptions import NotEnoughPlayer, BadPlayerMove, BadGameState
 from game.coup_game.move import Actions, Counteractions, GenericMove
 from game.coup_game.objects import Influence
+from game.coup_game.simulator import random_policy
+import game.coup_game.turn.move_factory as move_factory
+import random
 
 class CoupGameTestCase(TestCase):
     def setUp(self):
@@ -257,6 +260,31 @@ class CoupGameTestCase(TestCase):
         self.assertEqual(self.game.turn.state, TurnState.ACTION)    # Turn should reset
         self.assertNotEqual(self.game.turn_player, turn_player)     # Turn should advance to next round
     
+    def test_block_assassination_challenge_last_influence(self):
+        """Target with a single influence blocks an assassination without contessa
+        and loses the challenge. The assassination has nothing left to take and
+        the turn should end instead of waiting on a dead player."""
+        turn_player = self.game.turn_player
+        turn_player.coins = 3
+        turn_player.owned_influence.pop()
+        turn_player.owned_influence.append(Influence.ASSASSIN)
+
+        opponents = [pl for pl in self.game.players if not pl == turn_player]
+        target = opponents[0]
+        target.owned_influence.pop()
+        target.owned_influence.pop()
+        target.owned_influence.append(Influence.CAPTAIN)
+        target.lost_influence = (Influence.DUKE,)
+
+        self.game.player_make_move(player=turn_player, move=Actions.ASSASSINATE, target=target)
+        self.game.player_make_move(player=target, move=Counteractions.BLOCK_ASSASSINATION, target=None)
+        self.game.player_make_move(player=turn_player, move=GenericMove.CHALLENGE, target=None)
+        self.game.player_make_move(player=target, move=GenericMove.LOSE_INFLUENCE, target=Influence.CAPTAIN)
+
+        self.assertFalse(target.is_in_game())
+        self.assertEqual(self.game.turn.state, TurnState.ACTION)    # Turn should reset
+        self.assertNotEqual(self.game.turn_player, turn_player)     # Turn should advance to next round
+
     def test_action_challenge(self):
         turn_player = self.game.turn_player
         turn_player.owned_influence.pop()
@@ -386,6 +414,40 @@ class CoupGameTestCase(TestCase):
         moves = self.game.get_valid_moves_for_player(player=turn_player)
         self.assertCountEqual(moves, [])    # No action available once two cards have been exchanged
 
+    def test_move_table_matches_rules(self):
+        for coins in range(0, 13):
+            bucket = move_factory.get_coin_bucket(coins)
+            moves = move_factory.lookup_moves(TurnState.ACTION, move_factory.TurnRole.ACTION_PLAYER, bucket)
+            self.assertIsInstance(moves, tuple)
+            self.assertCountEqual(moves, move_factory.GameMoveFactory.actions_from_coins(coins))
+        for action in Actions:
+            moves = move_factory.lookup_moves(TurnState.ACTION_RESPONSE, move_factory.TurnRole.RESPONDER, played=action)
+            self.assertCountEqual(moves, move_factory.GameMoveFactory.response_moves_from_action(action))
+
+    def test_valid_moves_are_shared(self):
+        turn_player = self.game.turn_player
+        moves0 = self.game.get_valid_moves_for_player(player=turn_player)
+        moves1 = self.game.get_valid_moves_for_player(player=turn_player)
+        self.assertIs(moves0, moves1)
+
+    def test_iter_move_target_tuples(self):
+        turn_player = self.game.turn_player
+        turn_player.coins = 7
+        opponents = [pl for pl in self.game.players if not pl == turn_player]
+        move_targets = list(move_factory.iter_move_target_tuples_for_player(self.game.turn, turn_player))
+        for opp in opponents:
+            self.assertIn((Actions.COUP, opp), move_targets)
+            self.assertIn((Actions.ASSASSINATE, opp), move_targets)
+            self.assertIn((Actions.STEAL, opp), move_targets)
+        self.assertIn((Actions.INCOME, None), move_targets)
+        self.assertNotIn((Actions.COUP, turn_player), move_targets)
+
+        target = opponents[0]
+        target.owned_influence[:] = [Influence.DUKE, Influence.DUKE]
+        self.game.player_make_move(player=turn_player, move=Actions.COUP, target=target)
+        move_targets = list(move_factory.iter_move_target_tuples_for_player(self.game.turn, target))
+        self.assertEqual(move_targets, [(GenericMove.LOSE_INFLUENCE, Influence.DUKE)])
+
 class FrontendTestCase(TestCase):
     def setUp(self):
         self.game = CoupGame('test')
@@ -457,4 +519,150 @@ class FrontendTestCase(TestCase):
             if player == game.turn_player:
                 self.assertEqual(interface, ['income', 'foreign-aid', 'exchange', 'steal', 'tax'])
             else:
-                self.assertEqual(interface, [])
\ No newline at end of file
+                self.assertEqual(interface, [])
+class SnapshotTestCase(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.game = CoupGame('test', rng=self.rng)
+        self.fe = CoupGameFrontend()
+        for i in range(4):
+            self.game.add_player(f'player{i}')
+        self.game.start()
+
+    def play_random_moves(self, game, num_moves):
+        for _ in range(num_moves):
+            if not game.started:
+                return
+            movers = [pl for pl in game.players if game.get_valid_moves_for_player(pl)]
+            player = self.rng.choice(movers)
+            game.player_make_move(player, *random_policy(game, player, self.rng))
+
+    def views(self, game):
+        return (self.fe.game_view(game),
+                [self.fe.player_view(game, pl) for pl in game.players],
+                [self.fe.player_interface(game, pl) for pl in game.players])
+
+    def test_snapshot_restore(self):
+        for _ in range(20):
+            self.play_random_moves(self.game, 3)
+            snapshot = self.game.snapshot()
+            views = self.views(self.game)
+            self.play_random_moves(self.game, 10)
+            self.game.restore(snapshot)
+            self.assertEqual(self.game.snapshot(), snapshot)
+            self.assertEqual(self.views(self.game), views)
+
+    def test_restore_keeps_objects(self):
+        turn, deck, players = self.game.turn, self.game.deck, list(self.game.players)
+        snapshot = self.game.snapshot()
+        self.play_random_moves(self.game, 10)
+        self.game.restore(snapshot)
+        self.assertIs(self.game.turn, turn)
+        self.assertIs(self.game.deck, deck)
+        self.assertEqual(self.game.players, players)
+
+    def test_clone_is_independent(self):
+        self.play_random_moves(self.game, 5)
+        views = self.views(self.game)
+        clone = self.game.clone()
+        self.assertEqual(self.views(clone), views)
+        for player in clone.players:
+            self.assertNotIn(player, self.game.players)
+        self.assertIn(clone.turn.action_player, clone.players)
+        self.assertIs(clone.turn.court_deck, clone.deck)
+
+        self.play_random_moves(clone, 20)
+        self.assertEqual(self.views(self.game), views)
+
+    def test_clone_of_finished_game(self):
+        self.play_random_moves(self.game, 1000)
+        self.assertTrue(self.game.finished)
+        clone = self.game.clone()
+        self.assertEqual(clone.get_winner().name, self.game.get_winner().name)
+
+class UndoTestCase(SnapshotTestCase):
+    def setUp(self):
+        super().setUp()
+        self.game.set_undo_tracking(True)
+
+    def test_random_make_unmake(self):
+        for _ in range(10):
+            snapshots = list()
+            for _ in range(30):
+                if not self.game.started:
+                    break
+                snapshots.append(self.game.snapshot())
+                self.play_random_moves(self.game, 1)
+            for snapshot in reversed(snapshots):
+                self.game.undo_last_move()
+                self.assertEqual(self.game.snapshot(), snapshot)
+            self.play_random_moves(self.game, 5)
+
+    def test_depth_first_search_restores_state(self):
+        def search(depth):
+            if depth == 0 or not self.game.started:
+                return 1
+            num_leaves = 0
+            snapshot = self.game.snapshot()
+            for player in list(self.game.players):
+                for move, target in list(move_factory.iter_move_target_tuples_for_player(self.game.turn, player)):
+                    self.game.player_make_move(player, move, target)
+                    num_leaves += search(depth - 1)
+                    self.game.undo_last_move()
+                    self.assertEqual(self.game.snapshot(), snapshot)
+            return num_leaves
+
+        self.assertGreater(search(3), 1)
+
+    def test_illegal_move_leaves_state_unchanged(self):
+        turn_player = self.game.turn_player
+        turn_player.coins = 3
+        snapshot = self.game.snapshot()
+        with self.assertRaises(BadPlayerMove):
+            self.game.player_make_move(turn_player, Actions.ASSASSINATE, None)    # Missing target
+        self.assertEqual(self.game.snapshot(), snapshot)
+        self.assertEqual(turn_player.coins, 3)
+
+    def test_undo_without_moves(self):
+        with self.assertRaises(BadGameState):
+            self.game.undo_last_move()
+        self.game.set_undo_tracking(False)
+        self.play_random_moves(self.game, 1)
+        with self.assertRaises(BadGameState):
+            self.game.undo_last_move()
+
+class VersionTestCase(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.game = CoupGame('test', rng=self.rng)
+
+    def assertVersionBumped(self, mutate):
+        version = self.game.version
+        mutate()
+        self.assertGreater(self.game.version, version)
+
+    def test_mutations_bump_version(self):
+        self.assertVersionBumped(lambda: self.game.add_player('bob'))
+        self.assertVersionBumped(lambda: self.game.add_player('tom'))
+        self.assertVersionBumped(lambda: self.game.add_player('ann'))
+        self.assertVersionBumped(lambda: self.game.remove_player('ann'))
+        bob = self.game.get_player_by_name('bob')
+        self.assertVersionBumped(lambda: self.game.player_change_seat(bob, 5))
+        self.assertVersionBumped(self.game.start)
+        snapshot = self.game.snapshot()
+        self.assertVersionBumped(lambda: self.game.player_make_move(self.game.turn_player, Actions.INCOME))
+        self.assertVersionBumped(lambda: self.game.restore(snapshot))
+
+    def test_reads_keep_version(self):
+        for name in ('bob', 'tom'):
+            self.game.add_player(name)
+        self.game.start()
+        version = self.game.version
+        fe = CoupGameFrontend()
+        fe.game_view(self.game)
+        for player in self.game.players:
+            fe.player_view(self.game, player)
+            fe.player_interface(self.game, player)
+        self.game.snapshot()
+        self.assertEqual(self.game.clone().version, version)
+        self.assertEqual(self.game.version, version)
@@ -0,0 +1,169 @@
+import io
+import random
+from django.test import TestCase
+from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.coup_game.event_log import GameEventLog, ReplayIndex, read_events, split_games, replay, StartEvent, MoveEvent, SnapshotEvent
+from game.coup_game.move import Actions
+from game.coup_game.simulator import random_policy
+
+class EventLogTestCase(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.fe = CoupGameFrontend()
+
+    def new_game(self, num_players=4):
+        game = CoupGame('test', rng=self.rng)
+        game.event_log = GameEventLog(io.BytesIO())
+        for i in range(num_players):
+            game.add_player(f'player{i}')
+        return game
+
+    def play_random_moves(self, game, num_moves):
+        for _ in range(num_moves):
+            if not game.started:
+                return
+            movers = [pl for pl in game.players if game.get_valid_moves_for_player(pl)]
+            player = self.rng.choice(movers)
+            game.player_make_move(player, *random_policy(game, player, self.rng))
+
+    def views(self, game):
+        return (self.fe.game_view(game),
+                [self.fe.player_view(game, pl) for pl in game.players],
+                [self.fe.player_interface(game, pl) for pl in game.players])
+
+    def test_replay_whole_games(self):
+        for num_players in range(2, 7):
+            game = self.new_game(num_players)
+            if num_players < game.MAX_NUM_PLAYERS:
+                game.player_change_seat(game.players[0], 5)
+            game.start()
+            self.play_random_moves(game, 1000)
+            self.assertTrue(game.finished)
+            events, = split_games(read_events(game.event_log.stream.getvalue()))
+            replayed = replay(events)
+            self.assertEqual(self.views(replayed), self.views(game))
+            self.assertEqual(replayed.deck.snapshot(), game.deck.snapshot())
+
+    def test_replay_to_move(self):
+        game = self.new_game()
+        game.start()
+        views = [self.views(game)]
+        for _ in range(30):
+            self.play_random_moves(game, 1)
+            views.append(self.views(game))
+        events, = split_games(read_events(game.event_log.stream.getvalue()))
+        for num_moves in (0, 1, 17, 30):
+            self.assertEqual(self.views(replay(events, num_moves=num_moves)), views[num_moves])
+
+    def test_records(self):
+        game = self.new_game(2)
+        game.start(seed=42)
+        game.player_make_move(game.turn_player, Actions.INCOME)
+        start, move = read_events(game.event_log.stream.getvalue())
+        self.assertEqual(start, StartEvent(42, start.time, (('player0', 0), ('player1', 1))))
+        self.assertEqual(move, MoveEvent(move.time, 0, Actions.INCOME, 0, 0, False))
+        # 2 byte length, then kind, time, player, move, target kind and target
+        self.assertEqual(len(game.event_log.stream.getvalue()) - start_record_length(2, 14), 11)
+
+    def test_rejected_move_replayed(self):
+        game = self.new_game(3)
+        game.start()
+        other = [pl for pl in game.players if pl is not game.turn_player][0]
+        with self.assertRaises(Exception):
+            game.player_make_move(other, Actions.INCOME)
+        game.player_make_move(game.turn_player, Actions.INCOME)
+        events, = split_games(read_events(game.event_log.stream.getvalue()))
+        self.assertEqual([event.rejected for event in events[1:]], [True, False])
+        self.assertEqual(self.views(replay(events)), self.views(game))
+
+    def test_flushed_every_n_records(self):
+        class Stream(io.BytesIO):
+            num_flushes = 0
+            def flush(self):
+                self.num_flushes += 1
+        game = self.new_game(2)
+        game.event_log = GameEventLog(Stream(), flush_every=3)
+        game.start()
+        self.play_random_moves(game, 7)
+        self.assertEqual(game.event_log.stream.num_flushes, (1 + 7) // 3)
+
+    def test_truncated_record_ignored(self):
+        game = self.new_game(2)
+        game.start()
+        game.player_make_move(game.turn_player, Actions.INCOME)
+        data = game.event_log.stream.getvalue()
+        self.assertEqual(len(list(read_events(data[:-1]))), 1)
+
+    def test_games_split_on_start(self):
+        game = self.new_game(3)
+        game.start()
+        self.play_random_moves(game, 1000)
+        game.start()
+        self.play_random_moves(game, 5)
+        first, second = split_games(read_events(game.event_log.stream.getvalue()))
+        self.assertTrue(replay(first).finished)
+        self.assertEqual(self.views(replay(second)), self.views(game))
+
+    def test_clone_does_not_record_or_change_shuffles(self):
+        game = self.new_game(3)
+        game.start(seed=7)
+        same = CoupGame('same')
+        for i in range(3):
+            same.add_player(f'player{i}')
+        same.start(seed=7)
+        length = len(game.event_log.stream.getvalue())
+        clone = game.clone()
+        clone.deck.shuffle()
+        clone.player_make_move(clone.turn_player, Actions.INCOME)
+        self.assertEqual(len(game.event_log.stream.getvalue()), length)
+        game.deck.shuffle()
+        same.deck.shuffle()
+        self.assertEqual(game.deck.snapshot(), same.deck.snapshot())
+
+    def test_seek(self):
+        for snapshot_interval in (None, 7):
+            game = self.new_game()
+            game.event_log.snapshot_interval = snapshot_interval
+            game.start()
+            views = [self.views(game)]
+            while game.started:
+                self.play_random_moves(game, 1)
+                views.append(self.views(game))
+            events, = split_games(read_events(game.event_log.stream.getvalue()))
+            index = ReplayIndex(events) if snapshot_interval else ReplayIndex.build(events, 5)
+            interval = snapshot_interval or 5
+            self.assertEqual(index.num_moves, len(views) - 1)
+            self.assertEqual(index.snapshot_moves, list(range(0, index.num_moves + 1, interval)))
+            for num_moves, move_views in enumerate(views):
+                self.assertEqual(self.views(index.seek(num_moves)), move_views)
+            with self.assertRaises(IndexError):
+                index.seek(index.num_moves + 1)
+
+    def test_seek_live_snapshots_over_many_games(self):
+        # Snapshots often land on moves ending a turn, which must be snapshotted after the next turn started
+        for seed in range(30):
+            self.rng = random.Random(seed)
+            game = self.new_game(self.rng.randint(2, 6))
+            game.event_log.snapshot_interval = 3
+            game.start()
+            views = [self.views(game)]
+            while game.started:
+                self.play_random_moves(game, 1)
+                views.append(self.views(game))
+            events, = split_games(read_events(game.event_log.stream.getvalue()))
+            index = ReplayIndex(events)
+            self.assertEqual(index.snapshot_moves, list(range(0, index.num_moves + 1, 3)))
+            for num_moves, move_views in enumerate(views):
+                self.assertEqual(self.views(index.seek(num_moves)), move_views, f'seed {seed} move {num_moves}')
+
+    def test_snapshots_skipped_by_replay(self):
+        game = self.new_game()
+        game.event_log.snapshot_interval = 2
+        game.start()
+        self.play_random_moves(game, 10)
+        events, = split_games(read_events(game.event_log.stream.getvalue()))
+        self.assertEqual(len([event for event in events if isinstance(event, SnapshotEvent)]), 5)
+        self.assertEqual(self.views(replay(events)), self.views(game))
+
+def start_record_length(num_players, names_length):
+    return 2 + 1 + 8 + 8 + 1 + num_players * 3 + names_length
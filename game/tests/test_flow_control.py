@@ -0,0 +1,91 @@
+import asyncio
+import json
+import pytest
+from game.flow_control import TokenBucket, FrameBuffer, FRAME_CHAT, FRAME_FULL, FRAME_PATCH
+import game.flow_control as flow_control
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_allows_burst_then_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.take() and not bucket.take()
+    # Tokens do not accumulate beyond the burst
+    clock.now += 100
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+
+class SlowClient(object):
+    def __init__(self):
+        self.sent = list()
+        self.release = asyncio.Event()
+
+    async def send(self, text_data=None, bytes_data=None):
+        await self.release.wait()
+        self.sent.append(text_data)
+
+@pytest.mark.asyncio
+async def test_full_update_coalesces_stale_frames():
+    client = SlowClient()
+    buffer = FrameBuffer(client.send)
+    buffer.put(FRAME_PATCH, 'patch1')
+    await asyncio.sleep(0)
+    # patch1 is being sent, the rest wait
+    buffer.put(FRAME_PATCH, 'patch2')
+    buffer.put(FRAME_CHAT, 'chat')
+    buffer.put(FRAME_PATCH, 'patch3')
+    buffer.put(FRAME_FULL, 'update')
+    client.release.set()
+    await buffer.flush()
+    assert client.sent == ['patch1', 'chat', 'update']
+    assert buffer.num_coalesced == 2
+
+@pytest.mark.asyncio
+async def test_full_buffer_drops_oldest():
+    client = SlowClient()
+    buffer = FrameBuffer(client.send, max_frames=2)
+    dropped = flow_control.counters['frames_dropped']
+    for index in range(4):
+        buffer.put(FRAME_PATCH, f'patch{index}')
+    client.release.set()
+    await buffer.flush()
+    assert client.sent == ['patch2', 'patch3']
+    assert buffer.num_dropped == 2
+    assert flow_control.counters['frames_dropped'] == dropped + 2
+
+@pytest.mark.asyncio
+async def test_player_consumer_rate_limited():
+    from game.consumers import PlayerConsumer
+    clock = FakeClock()
+    consumer = PlayerConsumer({'type': 'websocket'})
+    consumer.room_name = 'room'
+    consumer.player_name = 'bob'
+    consumer.room_manager_channel = 'room-manager-0'
+    consumer.rate_limit = TokenBucket(rate=1, burst=2, clock=clock)
+    consumer.rate_limited = False
+    consumer.num_rate_limited = 0
+    forwarded = list()
+    replies = list()
+    class Sender(object):
+        async def send_to_consumer(self, channel, data):
+            forwarded.append(data)
+    async def send(text_data=None, bytes_data=None):
+        replies.append(json.loads(text_data))
+    consumer.channel_layer_sender = Sender()
+    consumer.send = send
+    message = json.dumps({'type': 'chat', 'player': 'bob', 'message': 'hi'})
+    for _ in range(5):
+        await consumer.receive(message)
+    assert len(forwarded) == 2
+    assert consumer.num_rate_limited == 3
+    # The client is told once
+    assert len(replies) == 1 and 'errors' in replies[0]
+    clock.now += 1
+    await consumer.receive(message)
+    assert len(forwarded) == 3
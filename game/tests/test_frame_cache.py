@@ -0,0 +1,52 @@
+from django.test import TestCase
+from game.frame_cache import FrameCache
+from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.coup_game.move import Actions
+import json
+
+class FrameCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = FrameCache(CoupGameFrontend())
+        self.game = CoupGame('room')
+        for name in ('bob', 'tom'):
+            self.game.add_player(name)
+        self.game.start()
+        self.num_builds = 0
+
+    def build(self):
+        self.num_builds += 1
+        return {'version': self.game.version}
+
+    def test_views_cached_by_version(self):
+        views = self.cache.get_views('room', self.game)
+        self.assertIs(self.cache.get_views('room', self.game), views)
+        public, private = views
+        self.assertEqual(public['game_view'], CoupGameFrontend().game_view(self.game))
+        self.assertEqual(set(private), {'bob', 'tom'})
+
+        self.game.player_make_move(self.game.turn_player, Actions.INCOME)
+        self.assertIsNot(self.cache.get_views('room', self.game), views)
+
+    def test_frames_encoded_once_per_version(self):
+        text = self.cache.get_frame('room', self.game, ('update', 'bob'), self.build)
+        self.assertEqual(self.cache.get_frame('room', self.game, ('update', 'bob'), self.build), text)
+        self.assertEqual(json.loads(text), {'version': self.game.version})
+        self.assertEqual((self.num_builds, self.cache.hits, self.cache.misses), (1, 1, 1))
+
+        self.cache.get_frame('room', self.game, ('update', 'tom'), self.build)
+        self.game.player_make_move(self.game.turn_player, Actions.INCOME)
+        self.cache.get_frame('room', self.game, ('update', 'bob'), self.build)
+        self.assertEqual(self.num_builds, 3)
+
+    def test_new_game_in_same_room(self):
+        self.cache.get_frame('room', self.game, ('update', 'bob'), self.build)
+        game = CoupGame('room')
+        game.version = self.game.version
+        self.cache.get_frame('room', game, ('update', 'bob'), self.build)
+        self.assertEqual(self.num_builds, 2)
+
+    def test_discard(self):
+        self.cache.get_frame('room', self.game, ('update', 'bob'), self.build)
+        self.cache.discard('room')
+        self.cache.get_frame('room', self.game, ('update', 'bob'), self.build)
+        self.assertEqual(self.num_builds, 2)
@@ -0,0 +1,106 @@
+from django.test import TestCase
+from game.frontend_delta import diff, apply_patch, FrontendState
+from game.benchmarks.frontend import frontend_state, measure_payloads
+from game.benchmarks.memory import make_idle_room, make_active_room
+from game.coup_game.coup_game import CoupGameFrontend
+from game.coup_game.simulator import random_policy
+import copy
+import random
+
+class DiffTestCase(TestCase):
+    def test_no_change(self):
+        view = {'game_view': [{'player': 'bob', 'coins': 2, 'cards': ['folded', 'folded']}]}
+        self.assertEqual(diff(view, copy.deepcopy(view)), [])
+
+    def test_changed_fields_only(self):
+        old = {'game_view': [{'player': 'bob', 'coins': 2, 'turn': True}, {'player': 'tom', 'coins': 2, 'turn': False}]}
+        new = {'game_view': [{'player': 'bob', 'coins': 3, 'turn': False}, {'player': 'tom', 'coins': 2, 'turn': True}]}
+        self.assertEqual(diff(old, new), [
+            {'op': 'replace', 'path': '/game_view/0/coins', 'value': 3},
+            {'op': 'replace', 'path': '/game_view/0/turn', 'value': False},
+            {'op': 'replace', 'path': '/game_view/1/turn', 'value': True},
+        ])
+
+    def test_list_length_change_replaces_list(self):
+        ops = diff({'cards': ['folded', 'folded']}, {'cards': ['duke', 'folded', 'folded']})
+        self.assertEqual(ops, [{'op': 'replace', 'path': '/cards', 'value': ['duke', 'folded', 'folded']}])
+
+    def test_type_change_is_replaced(self):
+        self.assertEqual(diff({'a': None}, {'a': []}), [{'op': 'replace', 'path': '/a', 'value': []}])
+        self.assertEqual(diff({'a': [1]}, {'a': {'0': 1}}), [{'op': 'replace', 'path': '/a', 'value': {'0': 1}}])
+
+    def test_add_remove_and_escaping(self):
+        old = {'a/b': 1, 'gone': 2}
+        new = {'a/b': 1, 'x~y': 3}
+        ops = diff(old, new)
+        self.assertEqual(ops, [{'op': 'remove', 'path': '/gone'}, {'op': 'add', 'path': '/x~0y', 'value': 3}])
+        self.assertEqual(apply_patch(copy.deepcopy(old), ops), new)
+
+    def test_patch_round_trip_over_games(self):
+        rng = random.Random(0)
+        frontend = CoupGameFrontend()
+        for index in range(20):
+            game = make_idle_room(index, 4, rng)
+            old = {'game_view': frontend.game_view(game)}
+            game.start()
+            while game.started:
+                new = {'game_view': frontend.game_view(game)}
+                for player in game.players:
+                    new[player.name] = frontend.player_view(game, player)
+                self.assertEqual(apply_patch(copy.deepcopy(old), diff(old, new)), new)
+                old = new
+                player = rng.choice([pl for pl in game.players if game.get_valid_moves_for_player(pl)])
+                game.player_make_move(player, *random_policy(game, player, rng))
+
+class FrontendStateTestCase(TestCase):
+    def setUp(self):
+        self.rng = random.Random(1)
+        self.frontend = CoupGameFrontend()
+        self.game = make_active_room(0, 3, self.rng, num_moves=3)
+
+    def test_update_returns_base_version(self):
+        state = FrontendState()
+        state.snapshot(*frontend_state(self.frontend, self.game), self.game.version)
+        base_version = self.game.version
+        mover = self.rng.choice([pl for pl in self.game.players if self.game.get_valid_moves_for_player(pl)])
+        self.game.player_make_move(mover, *random_policy(self.game, mover, self.rng))
+        self.assertGreater(self.game.version, base_version)
+        version, public_ops, private_ops = state.update(*frontend_state(self.frontend, self.game), self.game.version)
+        self.assertEqual(version, base_version)
+        self.assertEqual(state.version, self.game.version)
+        self.assertEqual(set(private_ops), {player.name for player in self.game.players})
+
+    def test_same_version_has_no_ops(self):
+        state = FrontendState()
+        state.snapshot(*frontend_state(self.frontend, self.game), self.game.version)
+        self.assertEqual(state.update(*frontend_state(self.frontend, self.game), self.game.version),
+                         (self.game.version, [], {}))
+
+    def test_client_view_follows_patches(self):
+        state = FrontendState()
+        public, private = frontend_state(self.frontend, self.game)
+        state.snapshot(public, private, self.game.version)
+        player = self.game.players[0]
+        client = dict(copy.deepcopy(public), **copy.deepcopy(private[player.name]))
+        for _ in range(10):
+            if not self.game.started:
+                break
+            mover = self.rng.choice([pl for pl in self.game.players if self.game.get_valid_moves_for_player(pl)])
+            self.game.player_make_move(mover, *random_policy(self.game, mover, self.rng))
+            public, private = frontend_state(self.frontend, self.game)
+            _, public_ops, private_ops = state.update(public, private, self.game.version)
+            client = apply_patch(client, public_ops + private_ops[player.name])
+            self.assertEqual(client, dict(public, **private[player.name]))
+
+    def test_new_player_gets_full_private_state(self):
+        state = FrontendState()
+        public, private = frontend_state(self.frontend, self.game)
+        name = self.game.players[0].name
+        state.snapshot(public, {key: value for key, value in private.items() if key != name}, self.game.version - 1)
+        _, _, private_ops = state.update(public, private, self.game.version)
+        self.assertEqual(apply_patch(dict(), private_ops[name]), private[name])
+
+    def test_deltas_are_smaller(self):
+        result = measure_payloads(10, 4)
+        self.assertLess(result['delta_bytes_per_move'], result['full_bytes_per_move'])
+        self.assertLess(result['targeted_layer_bytes_per_move'], result['broadcast_layer_bytes_per_move'])
@@ -0,0 +1,70 @@
+import random
+from django.test import TestCase
+import game.coup_game.latency as latency
+import game.coup_game.turn.move_handler as move_handler
+import game.coup_game.turn.move_factory as move_factory
+from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.coup_game.simulator import random_policy
+
+class HistogramTestCase(TestCase):
+    def test_percentiles(self):
+        histogram = latency.Histogram()
+        self.assertIsNone(histogram.percentile(50))
+        for elapsed_ns in range(1000, 101000, 1000):
+            histogram.record(elapsed_ns)
+        for percent, expected_ns in ((50, 50000), (95, 95000), (99, 99000)):
+            self.assertGreaterEqual(histogram.percentile(percent), expected_ns)
+            self.assertLessEqual(histogram.percentile(percent), expected_ns * 1.2)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max_us'], 100)
+        self.assertAlmostEqual(summary['mean_us'], 50.5)
+
+    def test_beyond_last_bucket(self):
+        histogram = latency.Histogram()
+        histogram.record(latency.BUCKET_BOUNDS_NS[-1] * 2)
+        self.assertEqual(histogram.percentile(99), latency.BUCKET_BOUNDS_NS[-1] * 2)
+
+class LatencyTestCase(TestCase):
+    def setUp(self):
+        latency.reset()
+
+    def tearDown(self):
+        latency.disable()
+        latency.reset()
+
+    def test_disable_restores_originals(self):
+        get_move_for_player = move_factory.get_move_for_player
+        handlers = dict(move_handler._MOVE_HANDLER)
+        game_view = CoupGameFrontend.game_view
+        latency.enable()
+        self.assertIsNot(move_factory.get_move_for_player, get_move_for_player)
+        latency.enable()
+        latency.disable()
+        self.assertIs(move_factory.get_move_for_player, get_move_for_player)
+        self.assertEqual(move_handler._MOVE_HANDLER, handlers)
+        self.assertIs(CoupGameFrontend.game_view, game_view)
+        self.assertFalse(latency.is_enabled())
+
+    def test_stages_recorded_while_playing(self):
+        rng = random.Random(0)
+        game = CoupGame('test', rng=rng)
+        for i in range(3):
+            game.add_player(f'player{i}')
+        game.start()
+        fe = CoupGameFrontend()
+        latency.enable()
+        num_moves = 0
+        while game.started and num_moves < 20:
+            movers = [pl for pl in game.players if game.get_valid_moves_for_player(pl)]
+            player = rng.choice(movers)
+            game.player_make_move(player, *random_policy(game, player, rng))
+            fe.game_view(game)
+            num_moves += 1
+        report = latency.report()
+        self.assertEqual(report['frontend.game_view']['count'], num_moves)
+        self.assertGreaterEqual(report['move_factory.get_move_for_player']['count'], num_moves)
+        self.assertGreater(sum(summary['count'] for stage, summary in report.items() if stage.startswith('move_handler.')), 0)
+        latency.disable()
+        fe.game_view(game)
+        self.assertEqual(latency.report()['frontend.game_view']['count'], num_moves)
@@ -0,0 +1,56 @@
+import io
+import json
+import os
+import random
+import tempfile
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from game.coup_game.coup_game import CoupGame, CoupGameFrontend
+from game.coup_game.event_log import GameEventLog
+from game.coup_game.simulator import random_policy
+
+class ReplayTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = override_settings(COUP_EVENT_LOG_DIR=self.directory.name, COUP_REPLAY_SNAPSHOT_INTERVAL=4)
+        self.settings.enable()
+        self.path = os.path.join(self.directory.name, 'room-1.events')
+        rng = random.Random(0)
+        self.game = CoupGame('room', rng=rng)
+        self.game.event_log = GameEventLog(open(self.path, 'ab'))
+        for i in range(3):
+            self.game.add_player(f'player{i}')
+        self.game.start()
+        self.game_views = [CoupGameFrontend().game_view(self.game)]
+        for _ in range(10):
+            movers = [pl for pl in self.game.players if self.game.get_valid_moves_for_player(pl)]
+            player = rng.choice(movers)
+            self.game.player_make_move(player, *random_policy(self.game, player, rng))
+            self.game_views.append(CoupGameFrontend().game_view(self.game))
+        self.game.event_log.close()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.directory.cleanup()
+
+    def test_endpoint(self):
+        admin = User.objects.create_user('admin', password='admin', is_staff=True)
+        self.client.force_login(admin)
+        for move in (0, 5, 10):
+            response = self.client.get(f'/api/replays/room-1/{move}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), {'move': move, 'num_moves': 10, 'game_view': self.game_views[move]})
+        self.assertEqual(self.client.get('/api/replays/room-1/11').status_code, 404)
+        self.assertEqual(self.client.get('/api/replays/room-1/1?game=1').status_code, 404)
+        self.assertEqual(self.client.get('/api/replays/other/1').status_code, 404)
+
+    def test_endpoint_for_staff_only(self):
+        user = User.objects.create_user('bob', password='bob')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/api/replays/room-1/0').status_code, 403)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('replay_game', self.path, '--move', '3', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['game_view'], self.game_views[3])
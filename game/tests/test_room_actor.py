@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from game.room_actor import RoomActors, PRIORITY_GAME, PRIORITY_MEMBERSHIP, PRIORITY_CHAT
+
+@pytest.mark.asyncio
+async def test_events_of_a_room_handled_in_order():
+    handled = list()
+    async def handle(event):
+        await asyncio.sleep(0.001 * (3 - event['index']))
+        handled.append((event['room'], event['index']))
+    actors = RoomActors(handle)
+    for index in range(3):
+        for room in ('room0', 'room1'):
+            assert actors.post(room, {'room': room, 'index': index})
+    await actors.join()
+    for room in ('room0', 'room1'):
+        assert [index for name, index in handled if name == room] == [0, 1, 2]
+    assert actors.actors == dict()
+    assert actors.num_tasks_started == 2
+
+@pytest.mark.asyncio
+async def test_slow_room_does_not_hold_up_others():
+    release = asyncio.Event()
+    handled = list()
+    async def handle(event):
+        if event['room'] == 'slow':
+            await release.wait()
+        handled.append(event['room'])
+    actors = RoomActors(handle)
+    actors.post('slow', {'room': 'slow'})
+    actors.post('fast', {'room': 'fast'})
+    await asyncio.sleep(0.01)
+    assert handled == ['fast']
+    release.set()
+    await actors.join()
+    assert handled == ['fast', 'slow']
+
+@pytest.mark.asyncio
+async def test_full_inbox_drops_events():
+    handled = list()
+    async def handle(event):
+        handled.append(event['index'])
+    actors = RoomActors(handle, inbox_size=2)
+    assert [actors.post('room', {'index': index}) for index in range(3)] == [True, True, False]
+    assert actors.num_pending[PRIORITY_GAME] == 2
+    await actors.join()
+    assert handled == [0, 1]
+    assert actors.num_dropped[PRIORITY_GAME] == 1
+
+@pytest.mark.asyncio
+async def test_failed_event_does_not_stop_the_room():
+    handled = list()
+    async def handle(event):
+        if event['index'] == 0:
+            raise KeyError('room')
+        handled.append(event['index'])
+    actors = RoomActors(handle)
+    actors.post('room', {'type': 'game.move', 'index': 0})
+    actors.post('room', {'type': 'game.move', 'index': 1})
+    await actors.join()
+    assert handled == [1]
+    assert actors.num_failed == 1
+
+@pytest.mark.asyncio
+async def test_game_events_handled_before_chat():
+    handled = list()
+    async def handle(event):
+        handled.append(event['type'])
+    actors = RoomActors(handle)
+    actors.post('room', {'type': 'chat'}, PRIORITY_CHAT)
+    actors.post('room', {'type': 'join.game'}, PRIORITY_MEMBERSHIP)
+    actors.post('room', {'type': 'game.move'}, PRIORITY_GAME)
+    actors.post('room', {'type': 'chat'}, PRIORITY_CHAT)
+    actors.post('room', {'type': 'game.control'}, PRIORITY_GAME)
+    metrics = actors.get_metrics()
+    assert (metrics['game']['pending'], metrics['membership']['pending'], metrics['chat']['pending']) == (2, 1, 2)
+    await actors.join()
+    assert handled == ['game.move', 'game.control', 'join.game', 'chat', 'chat']
+    metrics = actors.get_metrics()
+    assert metrics['chat'] == {'pending': 0, 'max_pending': 2, 'posted': 2, 'dropped': 0}
+
+@pytest.mark.asyncio
+async def test_chat_throttled_under_load():
+    async def handle(event):
+        pass
+    actors = RoomActors(handle, chat_inbox_size=1, chat_throttle=2)
+    assert actors.post('room0', {'type': 'chat'}, PRIORITY_CHAT)
+    assert not actors.post('room0', {'type': 'chat'}, PRIORITY_CHAT)
+    for room in ('room1', 'room2', 'room3'):
+        actors.post(room, {'type': 'game.move'}, PRIORITY_GAME)
+    # Game events are still queued, chat is not
+    assert not actors.post('room4', {'type': 'chat'}, PRIORITY_CHAT)
+    assert actors.post('room4', {'type': 'game.move'}, PRIORITY_GAME)
+    await actors.join()
+    assert actors.post('room4', {'type': 'chat'}, PRIORITY_CHAT)
+    await actors.join()
+    assert actors.num_dropped == [0, 0, 2]
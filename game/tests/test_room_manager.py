@@ -0,0 +1,446 @@
+import asyncio
+import json
+import random
+import time
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from channels.layers import get_channel_layer
+from game.consumers import RoomManagerConsumer
+from game.coup_game.move import Actions
+import game.codec as codec
+from game.coup_game.event_log import read_events, split_games, replay
+from game.checkpoint_store import CheckpointStore
+from game.coup_game.simulator import random_policy
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+class NoDatabase(object):
+    """Room manager room store that stores nothing"""
+    def add_room(self, room_name):
+        pass
+
+    def update_room(self, room_name, num_players, game_started):
+        pass
+
+    def delete_room(self, room_name):
+        pass
+
+async def make_room_manager(room, player_names):
+    """Room manager with the given players joined to room. Returns it with the channel of each player."""
+    room_manager = RoomManagerConsumer({'type': 'channel'})
+    room_manager.room_store = NoDatabase()
+    room_manager.event_log_dir = None
+    room_manager.checkpoints = None
+    channel_layer = get_channel_layer()
+    channels = dict()
+    for name in player_names:
+        channels[name] = await channel_layer.new_channel()
+        await channel_layer.group_add(room, channels[name])
+        await room_manager.join_game({'type': 'join.game', 'player': name, 'room': room, 'channel': channels[name]})
+    return room_manager, channels
+
+async def drain(channel):
+    """All messages waiting on a channel. Encoded frontend frames are decoded."""
+    channel_layer = get_channel_layer()
+    messages = list()
+    while True:
+        try:
+            message = await asyncio.wait_for(channel_layer.receive(channel), 0.01)
+        except asyncio.TimeoutError:
+            return messages
+        messages.append(json.loads(message['text']) if 'text' in message else message)
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_players_only_get_their_own_view():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom', 'ann'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    for name, channel in channels.items():
+        updates = [message for message in await drain(channel) if message['type'].startswith('frontend')]
+        assert updates
+        assert all(message['type'] != 'individual.frontend.update' for message in updates)
+        # Private views in patches are addressed to the owner only
+        for message in updates:
+            for op in message.get('ops', []):
+                if op['path'] == '/player_view':
+                    assert op['value']['player'] == name
+        assert updates[-1]['type'] == 'frontend.patch'
+
+    # Resync sends each player the full frontend holding their own cards only
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'resync'})
+    for name, channel in channels.items():
+        update, = [message for message in await drain(channel) if message['type'] == 'frontend.update']
+        assert update['player_view']['player'] == name
+        owned = [card['name'] for card in update['player_view']['cards'] if card['status'] == 'owned']
+        assert owned == [influence.value for influence in game.get_player_by_name(name).owned_influence]
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_disconnected_player_gets_no_updates():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    await drain(channels['bob'])
+    await room_manager.disconnect_from_game({'type': 'disconnect.from.game', 'room': 'room', 'player': 'tom'})
+    await drain(channels['tom'])
+    await room_manager.join_game({'type': 'join.game', 'player': 'ann', 'room': 'room', 'channel': await get_channel_layer().new_channel()})
+    assert [message for message in await drain(channels['tom']) if message['type'].startswith('frontend')] == []
+    assert [message for message in await drain(channels['bob']) if message['type'] == 'frontend.update']
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_resync_reuses_encoded_frames():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    # Frames of joins carry their narration, a resync does not
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'resync'})
+    for channel in channels.values():
+        await drain(channel)
+    hits = room_manager.frame_cache.hits
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'resync'})
+    assert room_manager.frame_cache.hits == hits + len(channels)
+    for name, channel in channels.items():
+        update, = await drain(channel)
+        assert update['version'] == room_manager.games['room'].version
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_binary_move_targets_seat():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom', 'ann'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    turn_player = game.turn_player
+    turn_player.coins = 7
+    target = [pl for pl in game.get_players_in_seating_order() if pl is not turn_player][0]
+    event = codec.decode_move(codec.encode_move(Actions.COUP, codec.TARGET_SEAT, game.get_players_in_seating_order().index(target)))
+    event.update({'player': turn_player.name, 'room': 'room'})
+    await room_manager.game_move(event)
+    assert game.turn.action_target is target
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_room_registry_follows_games():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    assert room_manager.room_registry.rooms['room'] == {'id': None, 'name': 'room', 'num_players': 2, 'game_started': False}
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    assert room_manager.room_registry.rooms['room']['game_started']
+    room_manager.clear_move_timer('room')
+
+    room_manager, channels = await make_room_manager('other', ['ann'])
+    await room_manager.disconnect_from_game({'type': 'disconnect.from.game', 'room': 'other', 'player': 'ann'})
+    assert 'other' not in room_manager.room_registry.rooms
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_games_logged_to_event_log_dir(tmp_path):
+    room_manager = RoomManagerConsumer({'type': 'channel'})
+    room_manager.room_store = NoDatabase()
+    room_manager.event_log_dir = str(tmp_path)
+    for name in ('bob', 'tom'):
+        await room_manager.join_game({'type': 'join.game', 'player': name, 'room': 'room', 'channel': await get_channel_layer().new_channel()})
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    mover = game.turn_player.name
+    await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': mover, 'move': 'income', 'target': None})
+    room_manager.clear_move_timer('room')
+    game.event_log.stream.flush()
+    path, = tmp_path.iterdir()
+    events, = split_games(read_events(path.read_bytes()))
+    replayed = replay(events)
+    assert replayed.get_player_by_name(mover).coins == game.get_player_by_name(mover).coins == 1
+    assert replayed.turn_player.name == game.turn_player.name
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_event_log_closed_when_game_finishes(tmp_path):
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    room_manager.event_log_dir = str(tmp_path)
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    stream = game.event_log.stream
+    rng = random.Random(0)
+    while game.started:
+        player = rng.choice([pl for pl in game.players if game.get_valid_moves_for_player(pl)])
+        move, target = random_policy(game, player, rng)
+        await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': player.name, 'move': move.value,
+                                      'target': target.name if hasattr(target, 'name') else getattr(target, 'value', None)})
+    room_manager.clear_move_timer('room')
+    assert game.event_log is None and stream.closed
+    path, = tmp_path.iterdir()
+    events, = split_games(read_events(path.read_bytes()))
+    assert replay(events).finished
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_game_played_without_log_when_log_can_not_open(tmp_path):
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    (tmp_path / 'file').write_bytes(b'')
+    room_manager.event_log_dir = str(tmp_path / 'file' / 'logs')
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    assert game.started and game.event_log is None
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_warm_start_restores_checkpointed_games(tmp_path):
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    room_manager.checkpoints = CheckpointStore(str(tmp_path / 'room-manager-0.sqlite3'))
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    await room_manager.checkpoint()
+    game = room_manager.games['room']
+    room_manager.clear_move_timer('room')
+    room_manager.checkpoints.close()
+    await drain(channels['bob'])
+
+    restarted = RoomManagerConsumer({'type': 'channel'})
+    restarted.room_store = NoDatabase()
+    restarted.checkpoints = CheckpointStore(str(tmp_path / 'room-manager-0.sqlite3'))
+    restarted.checkpoint_interval = 3600
+    await restarted.dispatch({'type': 'join.game', 'player': 'bob', 'room': 'room', 'channel': channels['bob']})
+    restored = restarted.games['room']
+    assert restored.started and restored.turn_player.name == game.turn_player.name
+    assert 'room' in restarted.move_timeout
+    assert restarted.room_registry.rooms['room']['game_started']
+    # The reconnected player gets the restored game
+    update, = [message for message in await drain(channels['bob']) if message['type'] == 'frontend.update']
+    assert update['version'] == restored.version
+    restarted.clear_move_timer('room')
+    restarted.checkpoints.close()
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, COUP_WARM_START_TIMER_SPREAD_SEC=10.0,
+                   COUP_REGISTRY_PUBLISH_INTERVAL_SEC=0)
+@pytest.mark.asyncio
+async def test_warm_start_publishes_once_and_staggers_timers(tmp_path):
+    room_manager = RoomManagerConsumer({'type': 'channel'})
+    room_manager.room_store = NoDatabase()
+    room_manager.event_log_dir = None
+    room_manager.checkpoints = CheckpointStore(str(tmp_path / 'room-manager-0.sqlite3'))
+    for index in range(5):
+        room = f'room{index}'
+        for name in ('bob', 'tom'):
+            await room_manager.join_game({'type': 'join.game', 'player': name, 'room': room, 'channel': f'{room}-{name}'})
+        await room_manager.game_control({'type': 'game.control', 'room': room, 'player': 'bob', 'control': 'start-game'})
+        room_manager.clear_move_timer(room)
+    await room_manager.checkpoint()
+    room_manager.checkpoints.close()
+
+    restarted = RoomManagerConsumer({'type': 'channel'})
+    restarted.room_store = NoDatabase()
+    restarted.checkpoints = CheckpointStore(str(tmp_path / 'room-manager-0.sqlite3'))
+    restarted.checkpoint_interval = 3600
+    publishes = list()
+    restarted.room_registry.publish = lambda: publishes.append(dict(restarted.room_registry.rooms))
+    await restarted.warm_start()
+    assert len(publishes) == 1 and len(publishes[0]) == 5
+    expiries = sorted(timer.expiry_tick for timer in restarted.move_timeout.values())
+    assert len(set(expiries)) == 5
+    assert expiries[-1] - expiries[0] >= 8 / settings.COUP_TIMER_TICK_SEC
+    for room in list(restarted.move_timeout):
+        restarted.clear_move_timer(room)
+    restarted.checkpoints.close()
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, COUP_CHECKPOINT_CHUNK_ROOMS=2)
+@pytest.mark.asyncio
+async def test_checkpoint_yields_between_chunks(tmp_path):
+    room_manager, _ = await make_room_manager('room0', ['bob'])
+    for index in range(1, 5):
+        await room_manager.join_game({'type': 'join.game', 'player': 'bob', 'room': f'room{index}', 'channel': 'bob'})
+    room_manager.checkpoints = CheckpointStore(str(tmp_path / 'room-manager-0.sqlite3'))
+    ticks = 0
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    ticks = 0
+    await room_manager.checkpoint()
+    task.cancel()
+    assert ticks >= 2
+    assert set(room_manager.checkpoints.load_all()) == {f'room{index}' for index in range(5)}
+    room_manager.checkpoints.close()
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_latency_control_reports_stages():
+    import game.coup_game.latency as latency
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    reply_channel = await get_channel_layer().new_channel()
+    try:
+        await room_manager.latency_control({'type': 'latency.control', 'action': 'reset'})
+        await room_manager.latency_control({'type': 'latency.control', 'action': 'enable'})
+        mover = room_manager.games['room'].turn_player.name
+        await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': mover, 'move': 'income', 'target': None})
+        await room_manager.latency_control({'type': 'latency.control', 'action': 'report', 'reply_channel': reply_channel})
+    finally:
+        latency.disable()
+        latency.reset()
+    message, = await drain(reply_channel)
+    assert message['type'] == 'latency.report' and message['enabled']
+    assert message['report']['room_manager.game_move']['count'] == 1
+    assert message['report']['channel_layer.send']['count'] >= 2
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_room_events_dispatched_to_room_actors():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    room_manager.warm_started = True
+    await room_manager.dispatch({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    assert not game.started and 'room' in room_manager.room_actors.actors
+    await room_manager.room_actors.join()
+    assert game.started and not room_manager.room_actors.actors
+    mover = game.turn_player
+    await room_manager.dispatch({'type': 'game.move', 'room': 'room', 'player': mover.name, 'move': 'income', 'target': None})
+    assert mover.coins == 0
+    await room_manager.room_actors.join()
+    assert mover.coins == 1
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_stale_default_move_skipped():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    # The timer fired while a move was waiting in the inbox of the room
+    stale = {'type': 'default.move', 'room': 'room', 'game': game, 'version': game.version}
+    await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': game.turn_player.name, 'move': 'income', 'target': None})
+    version = game.version
+    await room_manager.default_move(stale)
+    assert game.version == version
+    assert 'room' in room_manager.move_timeout
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_default_move_searched_off_event_loop():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    game = room_manager.games['room']
+    turn_player = game.turn_player
+    searched = list()
+    def slow_policy(sim, player, rng):
+        searched.append(sim is not game and player not in game.players)
+        time.sleep(0.2)
+        return (Actions.INCOME, None) if player.name == turn_player.name else None
+    game.default_move_policy = slow_policy
+    ticks = 0
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+    task = asyncio.ensure_future(ticker())
+    await room_manager.make_default_move_and_update('room', game, game.version)
+    task.cancel()
+    assert searched and all(searched)
+    assert ticks >= 10
+    assert turn_player.coins == 1
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_chat_handled_after_game_events():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    room_manager.warm_started = True
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    await drain(channels['bob'])
+    game = room_manager.games['room']
+    await room_manager.dispatch({'type': 'chat', 'room': 'room', 'player': 'tom', 'message': 'hello'})
+    await room_manager.dispatch({'type': 'game.move', 'room': 'room', 'player': game.turn_player.name, 'move': 'income', 'target': None})
+    assert room_manager.room_actors.get_metrics()['chat']['pending'] == 1
+    await room_manager.room_actors.join()
+    messages = await drain(channels['bob'])
+    chats = [message for message in messages if message['type'] == 'chat']
+    # The move was sent, along with its narration, before the chat
+    assert chats == [{'type': 'chat', 'player': 'tom', 'message': 'hello'}]
+    assert messages[-1] == chats[-1] and messages[0]['type'] == 'frontend.patch' and 'INCOME' in messages[0]['narration'][0]
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, COUP_ROOM_MESSAGES_PER_SEC=1, COUP_ROOM_MESSAGE_BURST=2)
+@pytest.mark.asyncio
+async def test_client_events_rate_limited_per_room():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    room_manager.warm_started = True
+    await drain(channels['bob'])
+    for _ in range(3):
+        await room_manager.dispatch({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'ready'})
+    # Joins and leaves are never limited, nor is chat
+    await room_manager.dispatch({'type': 'join.game', 'player': 'ann', 'room': 'room', 'channel': await get_channel_layer().new_channel()})
+    await room_manager.dispatch({'type': 'chat', 'room': 'room', 'player': 'tom', 'message': 'hi'})
+    await room_manager.dispatch({'type': 'game.control', 'room': 'other', 'player': 'joe', 'control': 'ready'})
+    metrics = room_manager.room_actors.get_metrics()
+    assert metrics['game']['posted'] == 3 and metrics['membership']['posted'] == 1 and metrics['chat']['posted'] == 1
+    # The player is told the control was refused
+    assert {'type': 'player.error', 'errors': 'Too many moves in this room, slow down'} in await drain(channels['bob'])
+    await room_manager.room_actors.join()
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_client_events_shed_under_load():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    room_manager.warm_started = True
+    room_manager.shed_pending = 1
+    for name in ('ann', 'joe'):
+        await room_manager.dispatch({'type': 'join.game', 'player': name, 'room': 'room', 'channel': await get_channel_layer().new_channel()})
+    await room_manager.dispatch({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    metrics = room_manager.room_actors.get_metrics()
+    assert metrics['membership']['posted'] == 2 and metrics['game']['posted'] == 0
+    assert {'type': 'player.error', 'errors': 'Server busy, try again'} in await drain(channels['bob'])
+    await room_manager.room_actors.join()
+    assert not room_manager.games['room'].started
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_player_with_full_channel_gets_full_update_next():
+    from channels.exceptions import ChannelFull
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    for channel in channels.values():
+        await drain(channel)
+    sender = room_manager.channel_layer_sender
+    class FullChannelSender(object):
+        async def broadcast_to_group(self, group_name, data):
+            await sender.broadcast_to_group(group_name, data)
+
+        async def send_to_consumer(self, channel, data):
+            if channel == channels['tom']:
+                raise ChannelFull()
+            await sender.send_to_consumer(channel, data)
+    room_manager.channel_layer_sender = FullChannelSender()
+    game = room_manager.games['room']
+    await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': game.turn_player.name, 'move': 'income', 'target': None})
+    assert room_manager.stale_players['room'] == {'tom'}
+
+    room_manager.channel_layer_sender = sender
+    await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': game.turn_player.name, 'move': 'income', 'target': None})
+    tom = [message['type'] for message in await drain(channels['tom']) if message['type'].startswith('frontend')]
+    bob = [message['type'] for message in await drain(channels['bob']) if message['type'].startswith('frontend')]
+    assert tom == ['frontend.update'] and bob == ['frontend.patch', 'frontend.patch']
+    assert room_manager.stale_players['room'] == set()
+    room_manager.clear_move_timer('room')
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+@pytest.mark.asyncio
+async def test_move_sent_in_one_frame_per_player():
+    room_manager, channels = await make_room_manager('room', ['bob', 'tom'])
+    await room_manager.game_control({'type': 'game.control', 'room': 'room', 'player': 'bob', 'control': 'start-game'})
+    for channel in channels.values():
+        await drain(channel)
+    game = room_manager.games['room']
+    mover = game.turn_player.name
+    await room_manager.game_move({'type': 'game.move', 'room': 'room', 'player': mover, 'move': 'income', 'target': None})
+    for name, channel in channels.items():
+        frame, = await drain(channel)
+        assert frame['type'] == 'frontend.patch' and frame['version'] == game.version
+        assert frame['narration'] == [f'{mover} used {Actions.INCOME}']
+        # The private view of the mover in the same frame as the narration
+        if name == mover:
+            assert any(op['path'].startswith('/player_view') for op in frame['ops'])
+    room_manager.clear_move_timer('room')
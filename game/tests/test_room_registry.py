@@ -0,0 +1,97 @@
+import asyncio
+import json
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from game.room_registry import RoomRegistry, expire_lobby_snapshot, get_cached_lobby_snapshot
+from game.sharding import get_room_manager_channels
+
+@override_settings(COUP_ROOM_MANAGER_SHARDS=2)
+class RoomRegistryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        expire_lobby_snapshot()
+        self.registries = [RoomRegistry(channel) for channel in get_room_manager_channels()]
+        self.client.force_login(User.objects.create_user('bob'))
+
+    def tearDown(self):
+        expire_lobby_snapshot()
+
+    def get_rooms(self, **headers):
+        return self.client.get('/api/rooms/', **headers)
+
+    def test_lists_rooms_of_every_shard(self):
+        self.registries[0].update('room1', 2, False)
+        self.registries[1].update('room0', 3, True)
+        response = self.get_rooms()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), [
+            {'id': None, 'name': 'room0', 'num_players': 3, 'game_started': True},
+            {'id': None, 'name': 'room1', 'num_players': 2, 'game_started': False},
+        ])
+
+    def test_polls_never_read_rooms_table(self):
+        self.registries[0].update('room', 2, False)
+        with CaptureQueriesContext(connection) as queries:
+            self.get_rooms()
+            self.client.get('/api/rooms-detail/room')
+        self.assertFalse([query for query in queries.captured_queries if 'game_room' in query['sql']])
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.get_rooms().status_code, 403)
+        self.assertEqual(self.client.get('/api/rooms-detail/room').status_code, 403)
+
+    def test_ids_listed_once_written(self):
+        self.registries[0].update('room', 2, False)
+        self.registries[0].set_ids({'room': 7, 'gone': 8})
+        self.assertEqual(json.loads(self.get_rooms().content), [
+            {'id': 7, 'name': 'room', 'num_players': 2, 'game_started': False},
+        ])
+
+    def test_not_modified_for_current_etag(self):
+        self.registries[0].update('room', 2, False)
+        etag = self.get_rooms()['ETag']
+        response = self.get_rooms(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.registries[0].update('room', 3, False)
+        expire_lobby_snapshot()
+        response = self.get_rooms(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_snapshot_reused_until_expired(self):
+        self.get_rooms()
+        snapshot = get_cached_lobby_snapshot()
+        self.registries[0].update('room', 2, False)
+        self.assertEqual(json.loads(self.get_rooms().content), [])
+        self.assertIs(get_cached_lobby_snapshot(), snapshot)
+
+    def test_detail(self):
+        self.registries[0].update('room', 2, False)
+        response = self.client.get('/api/rooms-detail/room')
+        self.assertEqual(json.loads(response.content), {'id': None, 'name': 'room', 'num_players': 2, 'game_started': False})
+        self.assertEqual(self.client.get('/api/rooms-detail/other').status_code, 404)
+
+    def test_removed_room_not_listed(self):
+        self.registries[0].update('room', 2, False)
+        self.registries[0].remove('room')
+        self.assertEqual(json.loads(self.get_rooms().content), [])
+
+@pytest.mark.asyncio
+async def test_changes_published_once_per_interval():
+    registry = RoomRegistry('room-manager-0', publish_interval=0.05)
+    cache.delete(registry.key)
+    for num_players in range(1, 5):
+        registry.update('room', num_players, False)
+    registry.update('other', 1, False)
+    assert cache.get(registry.key) is None
+    await asyncio.sleep(0.1)
+    assert registry.num_publishes == 1
+    assert [entry['num_players'] for entry in cache.get(registry.key)] == [4, 1]
+    cache.delete(registry.key)
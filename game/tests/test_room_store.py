@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from channels.db import database_sync_to_async
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from game.models import Room
+from game.room_store import WriteBehindRoomStore
+
+class WriteBehindRoomStoreTestCase(TestCase):
+    def setUp(self):
+        self.store = WriteBehindRoomStore()
+
+    def get_room(self, name):
+        return Room.objects.get(name=name)
+
+    def test_nothing_written_before_flush(self):
+        self.store.add_room('room')
+        self.store.update_room('room', 2, False)
+        self.assertFalse(Room.objects.filter(name='room').exists())
+        self.store.flush_sync()
+        room = self.get_room('room')
+        self.assertEqual((room.num_players, room.game_started), (2, False))
+        self.assertEqual(self.store.num_pending, 0)
+
+    def test_updates_coalesced_into_single_update(self):
+        Room.objects.create(name='room', password='', num_players=1, game_started=False)
+        for num_players in range(2, 7):
+            self.store.update_room('room', num_players, False)
+        self.store.update_room('room', 6, True)
+        with CaptureQueriesContext(connection) as queries:
+            self.store.flush_sync()
+        statements = [q['sql'].split()[0] for q in queries.captured_queries]
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertEqual(statements.count('SELECT'), 0)
+        room = self.get_room('room')
+        self.assertEqual((room.num_players, room.game_started), (6, True))
+        self.assertEqual((self.store.num_queued, self.store.num_written), (6, 1))
+
+    def test_add_keeps_existing_room(self):
+        Room.objects.create(name='room', password='', num_players=3, game_started=True)
+        self.store.add_room('room')
+        self.store.flush_sync()
+        room = self.get_room('room')
+        self.assertEqual((room.num_players, room.game_started), (3, True))
+
+    def test_delete_supersedes_queued_changes(self):
+        self.store.add_room('room')
+        self.store.update_room('room', 2, False)
+        self.store.delete_room('room')
+        self.store.flush_sync()
+        self.assertFalse(Room.objects.filter(name='room').exists())
+
+    def test_ids_of_created_rooms_reported(self):
+        created = list()
+        self.store.on_created = created.append
+        self.store.add_room('room')
+        self.store.flush_sync()
+        self.assertEqual(created, [{'room': self.get_room('room').id}])
+
+    def test_room_recreated_after_delete(self):
+        Room.objects.create(name='room', password='', num_players=3, game_started=True)
+        self.store.delete_room('room')
+        self.store.add_room('room')
+        self.store.flush_sync()
+        room = self.get_room('room')
+        self.assertEqual((room.num_players, room.game_started), (1, False))
+
+    def test_update_of_missing_room_ignored(self):
+        self.store.update_room('room', 2, False)
+        self.store.flush_sync()
+        self.assertFalse(Room.objects.filter(name='room').exists())
+
+    def test_failed_flush_requeued(self):
+        Room.objects.create(name='good', password='', num_players=1, game_started=False)
+        self.store.update_room('good', 2, False)
+        self.store.update_room('bad', 'not a number', False)
+        with self.assertLogs(level='ERROR'):
+            self.store.flush_sync()
+        # The batch is one transaction, nothing written
+        self.assertEqual(self.get_room('good').num_players, 1)
+        self.assertEqual(self.store.num_pending, 2)
+        self.assertEqual(self.store.num_failed_flushes, 1)
+
+        # Newer changes win over requeued ones
+        self.store.update_room('bad', 4, False)
+        self.store.flush_sync()
+        self.assertEqual(self.get_room('good').num_players, 2)
+        self.assertEqual(self.store.num_pending, 0)
+
+    def test_requeue_does_not_undo_newer_delete(self):
+        self.store.add_room('room')
+        writes = self.store._take_pending()
+        self.store.delete_room('room')
+        self.store._requeue(writes)
+        self.store.flush_sync()
+        self.assertFalse(Room.objects.filter(name='room').exists())
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_background_flush_on_batch_size():
+    store = WriteBehindRoomStore(flush_interval=60, batch_size=2)
+    store.add_room('a')
+    assert store.num_pending == 1
+    store.add_room('b')
+    # Queueing returns at once, the flush runs in the background
+    for _ in range(100):
+        if store.num_written == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert await database_sync_to_async(Room.objects.count)() == 2
+    store.update_room('a', 3, False)
+    await store.close()
+    assert (await database_sync_to_async(Room.objects.get)(name='a')).num_players == 3
@@ -0,0 +1,55 @@
+from django.test import TestCase
+import game.serializers as serializers
+from game.benchmarks.receive import measure_receive
+import itertools
+
+STRING_VALUES = ['bob', '  bob  ', '', '   ', 'x' * 50, 'x' * 51, ' ' + 'x' * 50 + ' ', 'x' * 201, 'a\x00b', 'a\ud800b',
+                 0, 7, 1.5, True, False, None, [], ['bob'], {}, {'a': 1}]
+INTEGER_VALUES = [0, 1, 100, 101, -1, '5', ' 5 ', '5.0', '5.00 ', '5.5', '1_000', '', 'x', '9' * 1001, 2.0, 2.5,
+                  True, None, [], {}]
+
+class EventValidatorTestCase(TestCase):
+    """The fast validators must behave exactly like the DRF serializers"""
+    def assertSameAsDRF(self, data):
+        fast = serializers.create_serializer(data)
+        drf = serializers.create_drf_serializer(data)
+        self.assertEqual(fast.is_valid(), drf.is_valid(), data)
+        self.assertEqual(fast.errors, drf.errors, data)
+        self.assertEqual(fast.validated_data, dict(drf.validated_data), data)
+
+    def test_chat(self):
+        for player, message in itertools.product(STRING_VALUES, STRING_VALUES):
+            self.assertSameAsDRF({'type': 'chat', 'player': player, 'message': message})
+
+    def test_game_move(self):
+        for move, target in itertools.product(STRING_VALUES, STRING_VALUES):
+            self.assertSameAsDRF({'type': 'game.move', 'player': 'bob', 'move': move, 'target': target})
+
+    def test_game_control(self):
+        for control, value in itertools.product(STRING_VALUES, INTEGER_VALUES):
+            self.assertSameAsDRF({'type': 'game.control', 'player': 'bob', 'control': control, 'value': value})
+
+    def test_missing_and_extra_fields(self):
+        self.assertSameAsDRF({'type': 'game.move'})
+        self.assertSameAsDRF({'type': 'game.move', 'player': 'bob', 'move': 'income'})
+        self.assertSameAsDRF({'type': 'game.control', 'player': 'bob', 'control': 'start-game'})
+        self.assertSameAsDRF({'type': 'chat', 'player': 'bob', 'message': 'hi', 'room': 'room0', 'extra': [1]})
+
+    def test_bad_type(self):
+        for create in (serializers.create_serializer, serializers.create_drf_serializer):
+            with self.assertRaises(KeyError):
+                create({'player': 'bob'})
+            with self.assertRaises(ValueError):
+                create({'type': 'no-such-type'})
+
+    def test_valid_move(self):
+        validator = serializers.create_serializer({'type': 'game.move', 'player': 'bob', 'move': 'coup', 'target': 'tom'})
+        self.assertTrue(validator.is_valid())
+        self.assertEqual(validator.validated_data, {'type': 'game.move', 'player': 'bob', 'move': 'coup', 'target': 'tom'})
+        self.assertEqual(validator.errors, {})
+
+class ReceiveTestCase(TestCase):
+    def test_receive_forwards_valid_messages(self):
+        # Fails if receive replies with an error to any of the benchmark messages
+        self.assertGreater(measure_receive(40), 0)
+        self.assertGreater(measure_receive(40, use_drf=True), 0)
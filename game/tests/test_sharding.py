@@ -0,0 +1,54 @@
+from django.test import TestCase, override_settings
+from game.sharding import HashRing, get_room_manager_channel, get_room_manager_channels
+from game.benchmarks.shards import place_rooms
+
+class HashRingTestCase(TestCase):
+    def setUp(self):
+        self.rooms = [f'room{i}' for i in range(2000)]
+
+    def test_placement_is_stable(self):
+        ring0 = HashRing(['a', 'b', 'c'])
+        ring1 = HashRing(['c', 'a', 'b'])
+        self.assertEqual([ring0.get_node(room) for room in self.rooms], [ring1.get_node(room) for room in self.rooms])
+
+    def test_rooms_spread_over_nodes(self):
+        ring = HashRing([f'node{i}' for i in range(4)])
+        counts = dict()
+        for room in self.rooms:
+            node = ring.get_node(room)
+            counts[node] = counts.get(node, 0) + 1
+        self.assertEqual(len(counts), 4)
+        for count in counts.values():
+            self.assertGreater(count, len(self.rooms) / 4 * 0.7)
+
+    def test_adding_node_moves_few_rooms(self):
+        ring = HashRing([f'node{i}' for i in range(4)])
+        before = {room: ring.get_node(room) for room in self.rooms}
+        ring.add_node('node4')
+        moved = [room for room in self.rooms if ring.get_node(room) != before[room]]
+        # Only rooms taken over by the new node move
+        self.assertTrue(all(ring.get_node(room) == 'node4' for room in moved))
+        self.assertLess(len(moved), len(self.rooms) / 5 * 1.5)
+
+    def test_remove_node(self):
+        ring = HashRing(['a', 'b'])
+        ring.remove_node('a')
+        self.assertEqual({ring.get_node(room) for room in self.rooms}, {'b'})
+        ring.remove_node('b')
+        with self.assertRaises(ValueError):
+            ring.get_node('room0')
+
+class RoomManagerChannelTestCase(TestCase):
+    @override_settings(COUP_ROOM_MANAGER_SHARDS=3)
+    def test_room_manager_channels(self):
+        self.assertEqual(get_room_manager_channels(), ['room-manager-0', 'room-manager-1', 'room-manager-2'])
+        channels = {get_room_manager_channel(f'room{i}') for i in range(100)}
+        self.assertEqual(channels, set(get_room_manager_channels()))
+
+    @override_settings(COUP_ROOM_MANAGER_SHARDS=1)
+    def test_single_shard(self):
+        self.assertEqual(get_room_manager_channel('room0'), 'room-manager-0')
+
+    def test_place_rooms(self):
+        placement = place_rooms(100, 4)
+        self.assertEqual(sum(len(rooms) for rooms in placement.values()), 100)
@@ -0,0 +1,125 @@
+from django.test import TestCase
+from game.coup_game.simulator import simulate, play_game, random_policy, default_policy, SimulationStats
+from game.coup_game.tournament import run_tournament, make_chunks
+from game.coup_game.coup_game import CoupGame
+from game.coup_game.mcts import ISMCTSBot
+import game.coup_game.turn.move_factory as move_factory
+import logging
+import random
+
+class SimulatorTestCase(TestCase):
+    def test_random_games_finish(self):
+        stats = simulate(200, num_players=4, policies=['random'], seed=0)
+        self.assertEqual(stats.games, 200)
+        self.assertEqual(stats.finished, 200)
+        self.assertEqual(stats.stalled, 0)
+        self.assertEqual(sum(stats.wins_by_seat.values()), 200)
+        self.assertGreater(stats.moves, stats.turns)
+
+    def test_default_games_finish(self):
+        stats = simulate(20, num_players=6, policies=['default'], seed=0)
+        self.assertEqual(stats.finished, 20)
+
+    def test_same_seed_same_result(self):
+        stats0 = simulate(50, num_players=3, policies=['random', 'default'], seed=42)
+        stats1 = simulate(50, num_players=3, policies=['random', 'default'], seed=42)
+        self.assertEqual(stats0.wins_by_seat, stats1.wins_by_seat)
+        self.assertEqual(stats0.moves, stats1.moves)
+
+    def test_play_game(self):
+        result = play_game(2, [random_policy, default_policy], random.Random(1))
+        self.assertTrue(result.finished)
+        self.assertIn(result.winner_seat, (0, 1))
+
+    def test_merge_stats(self):
+        stats = simulate(10, seed=1).merge(simulate(10, seed=2))
+        self.assertEqual(stats.games, 20)
+        self.assertIsInstance(stats, SimulationStats)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            simulate(1, policies=['no-such-policy'])
+
+class TournamentTestCase(TestCase):
+    def test_chunks_cover_all_games(self):
+        chunks = make_chunks(250, 4, ('random',), seed=1, chunk_size=100)
+        self.assertEqual([chunk[0] for chunk in chunks], [100, 100, 50])
+        self.assertEqual([chunk[4] for chunk in chunks], [0, 1, 2])    # Seat rotation
+        self.assertEqual(len({chunk[3] for chunk in chunks}), 3)        # Distinct chunk seeds
+
+    def test_tournament_is_reproducible(self):
+        result0 = run_tournament(120, 3, ('random', 'default'), seed=5, workers=2, chunk_size=40)
+        result1 = run_tournament(120, 3, ('random', 'default'), seed=5, workers=1, chunk_size=40)
+        self.assertEqual(result0.stats.games, 120)
+        self.assertEqual(result0.stats.finished, 120)
+        self.assertEqual(result0.stats.wins_by_policy, result1.stats.wins_by_policy)
+        self.assertEqual(result0.stats.wins_by_seat, result1.stats.wins_by_seat)
+
+    def test_win_rate_by_policy(self):
+        result = run_tournament(60, 2, ('random', 'default'), seed=2, workers=1, chunk_size=20)
+        win_rates = result.stats.win_rate_by_policy()
+        self.assertCountEqual(win_rates.keys(), ['random', 'default'])
+        self.assertAlmostEqual(sum(win_rates.values()) / 2, 0.5)
+
+class ISMCTSBotTestCase(TestCase):
+    def setUp(self):
+        self.bot = ISMCTSBot(max_iterations=50, rng=random.Random(0))
+        self.game = CoupGame('test', rng=random.Random(0), default_move_policy=self.bot)
+        for i in range(3):
+            self.game.add_player(f'player{i}')
+        self.game.start()
+
+    def test_choose_legal_move(self):
+        turn_player = self.game.turn_player
+        move_targets = list(move_factory.iter_move_target_tuples_for_player(self.game.turn, turn_player))
+        self.assertIn(self.bot.choose_move(self.game, turn_player), move_targets)
+        self.assertEqual(self.bot.iterations, 50)
+
+    def test_search_does_not_change_game(self):
+        snapshot = self.game.snapshot()
+        self.bot.choose_move(self.game, self.game.turn_player)
+        self.assertEqual(self.game.snapshot(), snapshot)
+
+    def test_no_move(self):
+        opponent = [pl for pl in self.game.players if pl is not self.game.turn_player][0]
+        self.assertIsNone(self.bot.choose_move(self.game, opponent))
+
+    def test_default_moves_use_bot(self):
+        turn_player = self.game.turn_player
+        self.game.make_default_moves()
+        self.assertGreaterEqual(self.bot.decisions, 1)
+        self.assertTrue(self.game.turn_player is not turn_player or self.game.turn.action_played)
+
+    def test_time_budget(self):
+        bot = ISMCTSBot(budget_ms=20, rng=random.Random(0))
+        bot.choose_move(self.game, self.game.turn_player)
+        self.assertGreater(bot.iterations, 0)
+        self.assertLess(bot.search_time, 0.5)
+        self.assertGreater(bot.iterations_per_sec, 0)
+
+    def test_logging_restored_after_search(self):
+        level = logging.root.manager.disable
+        engine_level = logging.getLogger('game.coup_game').level
+        self.bot.choose_move(self.game, self.game.turn_player)
+        self.assertEqual(logging.root.manager.disable, level)
+        self.assertEqual(logging.getLogger('game.coup_game').level, engine_level)
+
+    def test_search_only_quiets_engine_logging(self):
+        bot = ISMCTSBot(max_iterations=5, rng=random.Random(0))
+        search = bot._search
+        seen = list()
+        def recording_search(*args):
+            seen.append((logging.getLogger('game.coup_game.coup_game').isEnabledFor(logging.INFO),
+                         logging.root.manager.disable))
+            return search(*args)
+        bot._search = recording_search
+        logging.getLogger('game.coup_game').setLevel(logging.INFO)
+        try:
+            bot.choose_move(self.game, self.game.turn_player)
+        finally:
+            logging.getLogger('game.coup_game').setLevel(logging.NOTSET)
+        self.assertEqual(seen, [(False, logging.root.manager.disable)])
+
+    def test_plays_full_games(self):
+        stats = simulate(3, num_players=2, policies=[ISMCTSBot(max_iterations=20, rng=random.Random(1)), 'random'], seed=1)
+        self.assertEqual(stats.finished, 3)
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from game.timer_wheel import TimerWheel, TimerHandle
+
+@pytest.mark.asyncio
+async def test_timer_fires_after_delay():
+    wheel = TimerWheel(tick=0.01)
+    loop = asyncio.get_event_loop()
+    fired = list()
+    start = loop.time()
+    wheel.call_later(0.05, lambda: fired.append(loop.time() - start))
+    await asyncio.sleep(0.15)
+    wheel.stop()
+    assert len(fired) == 1
+    assert fired[0] >= 0.05
+
+@pytest.mark.asyncio
+async def test_cancelled_timer_does_not_fire():
+    wheel = TimerWheel(tick=0.01)
+    fired = list()
+    handle = wheel.call_later(0.03, fired.append, 'cancelled')
+    wheel.call_later(0.03, fired.append, 'kept')
+    wheel.cancel(handle)
+    await asyncio.sleep(0.1)
+    wheel.stop()
+    assert fired == ['kept']
+    assert wheel.get_metrics()['cancelled'] == 1
+
+@pytest.mark.asyncio
+async def test_same_tick_timers_fire_in_one_batch():
+    wheel = TimerWheel(tick=0.02)
+    fired = list()
+    for i in range(100):
+        wheel.call_later(0.02, fired.append, i)
+    await asyncio.sleep(0.1)
+    wheel.stop()
+    assert sorted(fired) == list(range(100))
+    metrics = wheel.get_metrics()
+    assert metrics['batches'] == 1
+    assert metrics['max_batch_size'] == 100
+    assert metrics['pending'] == 0
+
+@pytest.mark.asyncio
+async def test_coroutine_callback_is_awaited():
+    wheel = TimerWheel(tick=0.01)
+    fired = asyncio.Event()
+    async def callback():
+        await asyncio.sleep(0)
+        fired.set()
+    wheel.call_later(0.01, callback)
+    await asyncio.wait_for(fired.wait(), 1)
+    wheel.stop()
+
+@pytest.mark.asyncio
+async def test_timers_cascade_across_levels():
+    # 4 slots per level, so these delays land in levels 0 to 3 and overflow the top level
+    wheel = TimerWheel(tick=0.001, slots_per_level=4, num_levels=3)
+    fired = list()
+    delays = [0.002, 0.009, 0.030, 0.070, 0.150]
+    for delay in delays:
+        wheel.call_later(delay, fired.append, delay)
+    await asyncio.sleep(0.4)
+    wheel.stop()
+    assert fired == delays
+
+def test_wheel_expiry_order_without_loop():
+    # Drive the wheel tick by tick to check every timer fires on its exact tick
+    wheel = TimerWheel(tick=1, slots_per_level=8, num_levels=2)
+    handles = [TimerHandle(expiry, None, ()) for expiry in range(1, 200, 7)]
+    for handle in handles:
+        wheel._insert(handle)
+    fired = dict()
+    for _ in range(200):
+        for handle in wheel._advance() or ():
+            fired[handle] = wheel._current_tick
+    assert all(fired[handle] == handle.expiry_tick for handle in handles)
+    assert wheel.num_pending == 0
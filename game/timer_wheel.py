@@ -0,0 +1,202 @@
+"""Hierarchical timer wheel running on the asyncio event loop.
+Schedules thousands of timers, e.g. one move timeout per room, with a
+single ticking task instead of one OS thread per timer.
+
+Time is split into ticks. Level 0 has one slot per tick; every slot of
+level n covers a full turn of level n-1. A timer is put in the lowest
+level that can hold its expiry, and is moved down a level (cascaded)
+when the wheel below comes round to it. Insert and cancel are O(1).
+All timers expiring on the same tick are fired together in one batch.
+
+    wheel = TimerWheel(tick=0.1)
+    handle = wheel.call_later(25, callback, arg0, arg1)
+    handle.cancel()
+"""
+
+import asyncio
+import inspect
+import logging
+import math
+
+class TimerHandle(object):
+    __slots__ = ('expiry_tick', 'callback', 'args', 'cancelled', '_slot')
+
+    def __init__(self, expiry_tick, callback, args):
+        self.expiry_tick = expiry_tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._slot = None   # Slot currently holding the timer
+
+    def cancel(self):
+        if self._slot is not None:
+            self._slot.discard(self)
+            self._slot = None
+        self.cancelled = True
+
+class TimerWheel(object):
+    def __init__(self, tick=0.1, slots_per_level=64, num_levels=4, drift_warning=1.0):
+        assert slots_per_level & (slots_per_level - 1) == 0, "Slots per level must be a power of 2"
+        self.tick = tick
+        self.drift_warning = drift_warning
+        self._slot_bits = slots_per_level.bit_length() - 1
+        self._slot_mask = slots_per_level - 1
+        self._levels = [[set() for _ in range(slots_per_level)] for _ in range(num_levels)]
+        self._current_tick = 0
+        self._start_time = None
+        self._task = None
+        self._loop = None
+
+        # Metrics
+        self.num_scheduled = 0
+        self.num_cancelled = 0
+        self.num_fired = 0
+        self.num_batches = 0
+        self.max_batch_size = 0
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self._total_drift = 0.0
+        self._num_ticks = 0
+
+    @property
+    def num_pending(self):
+        return sum(len(slot) for level in self._levels for slot in level)
+
+    def get_metrics(self):
+        """Timer counters and drift, i.e. how late ticks ran compared to schedule"""
+        return {
+            'pending': self.num_pending,
+            'scheduled': self.num_scheduled,
+            'cancelled': self.num_cancelled,
+            'fired': self.num_fired,
+            'batches': self.num_batches,
+            'max_batch_size': self.max_batch_size,
+            'ticks': self._num_ticks,
+            'last_drift_sec': self.last_drift,
+            'mean_drift_sec': self._total_drift / self._num_ticks if self._num_ticks else 0.0,
+            'max_drift_sec': self.max_drift,
+        }
+
+    def call_later(self, delay, callback, *args):
+        """Call callback(*args) after delay seconds, rounded up to the next tick.
+        Coroutine functions are awaited on the event loop.
+        Returns a TimerHandle that can be cancelled."""
+        self._ensure_running()
+        ticks = max(1, math.ceil((self._loop.time() - self._start_time + delay) / self.tick) - self._current_tick)
+        handle = TimerHandle(self._current_tick + ticks, callback, args)
+        self._insert(handle)
+        self.num_scheduled += 1
+        return handle
+
+    def cancel(self, handle):
+        if handle is not None and not handle.cancelled:
+            handle.cancel()
+            self.num_cancelled += 1
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    # Wheel internals
+    def _insert(self, handle):
+        remaining = handle.expiry_tick - self._current_tick
+        level = 0
+        while level < len(self._levels) - 1 and remaining >> (self._slot_bits * (level + 1)):
+            level += 1
+        # Timers beyond the span of the top level wait in its furthest slot and are
+        # re-inserted when that slot comes round.
+        max_remaining = (1 << (self._slot_bits * (level + 1))) - 1
+        expiry = self._current_tick + min(remaining, max_remaining)
+        index = (expiry >> (self._slot_bits * level)) & self._slot_mask
+        slot = self._levels[level][index]
+        slot.add(handle)
+        handle._slot = slot
+
+    def _advance(self):
+        """Move the wheel one tick forward. Returns the timers expiring on it."""
+        self._current_tick += 1
+        tick = self._current_tick
+        # Cascade higher levels whose slot comes round on this tick
+        for level in range(1, len(self._levels)):
+            if tick & ((1 << (self._slot_bits * level)) - 1):
+                break
+            index = (tick >> (self._slot_bits * level)) & self._slot_mask
+            slot = self._levels[level][index]
+            if slot:
+                self._levels[level][index] = set()
+                for handle in slot:
+                    self._insert(handle)
+
+        index = tick & self._slot_mask
+        slot = self._levels[0][index]
+        if not slot:
+            return None
+        self._levels[0][index] = set()
+        expired = list()
+        for handle in slot:
+            if handle.expiry_tick <= tick:
+                handle._slot = None
+                expired.append(handle)
+            else:
+                self._insert(handle)
+        return expired
+
+    # Event loop driver
+    def _ensure_running(self):
+        loop = asyncio.get_event_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        if self._loop is not loop:
+            self._loop = loop
+            self._start_time = loop.time()
+            self._current_tick = 0
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = self._loop
+        while True:
+            next_tick_time = self._start_time + (self._current_tick + 1) * self.tick
+            await asyncio.sleep(max(0.0, next_tick_time - loop.time()))
+            now = loop.time()
+            self._record_drift(now - next_tick_time)
+            # Catch up on every tick that is due, in case the loop was blocked
+            expired = list()
+            while self._start_time + (self._current_tick + 1) * self.tick <= now:
+                batch = self._advance()
+                if batch:
+                    expired.extend(batch)
+            if expired:
+                self._fire(expired)
+
+    def _record_drift(self, drift):
+        self.last_drift = drift
+        self.max_drift = max(self.max_drift, drift)
+        self._total_drift += drift
+        self._num_ticks += 1
+        if drift > self.drift_warning:
+            logging.warning("Timer wheel tick ran %.3fs late", drift)
+
+    def _fire(self, expired):
+        self.num_batches += 1
+        self.num_fired += len(expired)
+        self.max_batch_size = max(self.max_batch_size, len(expired))
+        coroutines = list()
+        for handle in expired:
+            try:
+                result = handle.callback(*handle.args)
+            except Exception as ex:
+                logging.exception(f"Timer callback {handle.callback} raised: {ex}")
+                continue
+            if inspect.isawaitable(result):
+                coroutines.append(result)
+        if coroutines:
+            self._loop.create_task(self._await_batch(coroutines))
+
+    @staticmethod
+    async def _await_batch(coroutines):
+        for coroutine in coroutines:
+            try:
+                await coroutine
+            except Exception as ex:
+                logging.exception(f"Timer callback raised: {ex}")
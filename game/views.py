@@ -1,15 +1,18 @@
 from django.shortcuts import render
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed, HttpResponseNotFound, HttpResponseNotModified
+from django.utils.http import parse_etags
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login
-from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveAPIView, DestroyAPIView
 from rest_framework.response import Response
-from game.serializers import RoomSerializer
-from game.models import Room
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 from game.forms import RoomForm
+from game.sharding import get_room_manager_channels
+from game.room_registry import get_cached_lobby_snapshot, read_lobby_snapshot
+from game.replays import get_log_path, load_replay_index, replay_view
 
 def lobby_view(request):
     form = RoomForm()
@@ -32,7 +35,7 @@ def test_view(request):
     'target':None
     }
     channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.send)('room-manager', data)
+    async_to_sync(channel_layer.send)(get_room_manager_channels()[0], data)
 
     return render(request, 'game/index.html')
 
@@ -44,29 +47,65 @@ def login_view(request):
         login(request, user)
         return HttpResponseRedirect('/lobby/')
 
-class RoomListView(ListAPIView):
-    permission_classes = [IsAuthenticated]
-    queryset = Room.objects.all()
-    serializer_class = RoomSerializer
+async def _get_lobby_snapshot():
+    snapshot = get_cached_lobby_snapshot()
+    if snapshot is None:
+        snapshot = await sync_to_async(read_lobby_snapshot)()
+    return snapshot
 
-class RoomDetailView(RetrieveAPIView):
-    lookup_field = "name"
-    permission_classes = [IsAuthenticated]
-    queryset = Room.objects.all()
-    serializer_class = RoomSerializer
+def _conditional_json_response(request, body, etag):
+    """Body, or 304 Not Modified if the client already has the ETag"""
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = f'max-age={settings.COUP_LOBBY_TTL_SEC:g}'
+    return response
 
-class RoomCreateView(CreateAPIView):
-    permission_classes = [IsAuthenticated]
-    queryset = Room.objects.all()
-    serializer_class = RoomSerializer
+async def _forbid_anonymous(request):
+    """403 response unless a user is logged in, as DRF IsAuthenticated. Reads the session."""
+    if await sync_to_async(lambda: request.user.is_authenticated)():
+        return None
+    return HttpResponseForbidden(b'{"detail":"Authentication credentials were not provided."}',
+                                 content_type='application/json')
 
-class RoomDeleteView(DestroyAPIView):
-    lookup_field = "name"
-    permission_classes = [IsAuthenticated]
-    queryset = Room.objects.all()
-    serializer_class = RoomSerializer
+async def room_list_view(request):
+    """Rooms of the room managers, from the room registry. Never reads the Room table."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    forbidden = await _forbid_anonymous(request)
+    if forbidden is not None:
+        return forbidden
+    snapshot = await _get_lobby_snapshot()
+    return _conditional_json_response(request, snapshot.body, snapshot.etag)
 
-    def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        self.perform_destroy(instance)
-        return Response('deleted')
\ No newline at end of file
+async def room_detail_view(request, name):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    forbidden = await _forbid_anonymous(request)
+    if forbidden is not None:
+        return forbidden
+    snapshot = await _get_lobby_snapshot()
+    room = snapshot.rooms.get(name)
+    if room is None:
+        return HttpResponseNotFound()
+    body, etag = room
+    return _conditional_json_response(request, body, etag)
+
+class ReplayView(APIView):
+    """Game view of a logged game at a move, for moderation.
+    Query parameter game selects the game of the log, 0 by default."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, log_name, move):
+        path = get_log_path(log_name)
+        if path is None:
+            return Response({'detail': f'No game log {log_name}'}, status=404)
+        try:
+            index = load_replay_index(path, int(request.query_params.get('game', 0)))
+            return Response(replay_view(index, move))
+        except IndexError as ex:
+            return Response({'detail': str(ex)}, status=404)
+        except ValueError as ex:
+            return Response({'detail': str(ex)}, status=400)